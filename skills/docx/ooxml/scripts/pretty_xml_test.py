@@ -0,0 +1,78 @@
+import unittest
+from pretty_xml import minidom_pretty_xml_bytes, pretty_xml_bytes
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+# Benchmark on real parts with: python pretty_xml.py <file.xml> [file.xml ...]
+class TestPrettyXmlMatchesMinidom(unittest.TestCase):
+
+    def assert_same_as_minidom(self, content):
+        self.assertEqual(pretty_xml_bytes(content), minidom_pretty_xml_bytes(content))
+
+    def test_empty_and_nested_elements(self):
+        self.assert_same_as_minidom("<a/>")
+        self.assert_same_as_minidom("<a><b/><c><d/></c></a>")
+
+    def test_single_text_child_is_inline(self):
+        self.assert_same_as_minidom("<a><b>text</b></a>")
+        self.assert_same_as_minidom("<a><b>  padded  </b></a>")
+
+    def test_mixed_content(self):
+        self.assert_same_as_minidom("<a>before<b>x</b>after</a>")
+        self.assert_same_as_minidom("<a>\n  <b/>\n</a>")
+        self.assert_same_as_minidom('<a xml:space="preserve"> x <b>y</b>z</a>')
+
+    def test_namespaces_and_attribute_order(self):
+        self.assert_same_as_minidom(
+            '<a xmlns:b="urn:b" c="1" b:d="2" xmlns="urn:default"><b:e f="3"/></a>'
+        )
+        self.assert_same_as_minidom('<a xmlns:x="urn:x"><b xmlns:x="urn:x"/></a>')
+
+    def test_escaping(self):
+        self.assert_same_as_minidom("<a>&amp;&lt;&gt;\"'</a>")
+        self.assert_same_as_minidom('<a b="&amp;&lt;&gt;&quot;\'"/>')
+        self.assert_same_as_minidom('<a b="&#10;&#9;&#13;">&#13;</a>')
+
+    def test_non_ascii_becomes_character_references(self):
+        self.assert_same_as_minidom('<a b="é">café 中文 \U0001f600</a>')
+
+    def test_cdata_sections(self):
+        self.assert_same_as_minidom("<a><![CDATA[x<y]]></a>")
+        self.assert_same_as_minidom("<a>t<![CDATA[x]]>u</a>")
+        self.assert_same_as_minidom("<a>a<![CDATA[]]>b</a>")
+        self.assert_same_as_minidom("<a><![CDATA[1]]><![CDATA[2]]></a>")
+
+    def test_comments_and_processing_instructions(self):
+        self.assert_same_as_minidom("<!--c--><?pi data?><a><!--only--></a><!--after-->")
+        self.assert_same_as_minidom("<a>text<!--x--><?p?>more</a>")
+
+    def test_doctype_falls_back_to_minidom(self):
+        self.assert_same_as_minidom("<!DOCTYPE a><a><b/></a>")
+
+    def test_wordprocessing_document(self):
+        paragraphs = "".join(
+            f'<w:p w:rsidR="00AB12CD"><w:pPr><w:pStyle w:val="Normal"/></w:pPr>'
+            f'<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve"> Paragraph {i} </w:t></w:r>'
+            f"<w:r><w:t>café &amp; more</w:t></w:r></w:p>"
+            for i in range(200)
+        )
+        content = (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main" '
+            'xmlns:mc="http://schemas.openxmlformats.org/markup-compatibility/2006" '
+            'mc:Ignorable="w14"><w:body>'
+            f"{paragraphs}<w:sectPr/></w:body></w:document>"
+        )
+        self.assert_same_as_minidom(content)
+
+    def test_already_pretty_printed_input(self):
+        content = minidom_pretty_xml_bytes("<a><b>x</b><c/></a>").decode("ascii")
+        self.assert_same_as_minidom(content)
+
+    def test_malformed_xml_raises(self):
+        with self.assertRaises(Exception):
+            pretty_xml_bytes("<a><b></a>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,29 +1,241 @@
 #!/usr/bin/env python3
-"""Unpack and format XML contents of Office files (.docx, .pptx, .xlsx)"""
+"""Unpack and format XML contents of Office files (.docx, .pptx, .xlsx)
 
+Example usage:
+    python unpack.py <office_file> <output_dir>
+    python unpack.py <office_file> <output_dir> --lazy word/document.xml "word/comments*.xml"
+
+With --lazy only the listed parts (plus [Content_Types].xml and every .rels
+file) are extracted up front. Other parts are extracted, and pretty printed
+if they are XML, the first time Document, a validator or extract_parts()
+asks for them; pack.py copies parts never extracted straight from the
+original file.
+"""
+
+import argparse
+import fnmatch
+import hashlib
+import json
+import os
 import random
-import sys
-import defusedxml.minidom
 import zipfile
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
-# Get command line arguments
-assert len(sys.argv) == 3, "Usage: python unpack.py <office_file> <output_dir>"
-input_file, output_dir = sys.argv[1], sys.argv[2]
-
-# Extract and format
-output_path = Path(output_dir)
-output_path.mkdir(parents=True, exist_ok=True)
-zipfile.ZipFile(input_file).extractall(output_path)
-
-# Pretty print all XML files
-xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-for xml_file in xml_files:
-    content = xml_file.read_text(encoding="utf-8")
-    dom = defusedxml.minidom.parseString(content)
-    xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="ascii"))
-
-# For .docx files, suggest an RSID for tracked changes
-if input_file.endswith(".docx"):
-    suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
-    print(f"Suggested RSID for edit session: {suggested_rsid}")
+try:
+    from .pretty_xml import pretty_xml_bytes
+except ImportError:
+    from pretty_xml import pretty_xml_bytes
+
+# Records where each unpacked part came from so pack.py can reuse untouched parts
+MANIFEST_NAME = ".unpack-manifest.json"
+
+# Total XML size below which parts are processed in-process (pool startup
+# costs more than it saves on small documents)
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+
+def unpack_document(input_file, output_dir, workers=None, parts=None):
+    """Extract an Office file and pretty print its XML parts.
+
+    Also writes MANIFEST_NAME into output_dir with the hash of every
+    extracted file and the location of its compressed entry in input_file.
+
+    Parts are pretty printed and hashed across a process pool when the
+    document is large (workers defaults to the CPU count then, 1
+    otherwise), largest parts first. Each worker reads and rewrites its
+    own files, so only paths and hashes cross process boundaries.
+
+    If parts is given (lazy mode), only parts matching those names or glob
+    patterns are extracted, together with [Content_Types].xml and the .rels
+    files; the rest are listed in the manifest as not extracted yet.
+    """
+    input_file = Path(input_file)
+    output_path = Path(output_dir)
+    output_path.mkdir(parents=True, exist_ok=True)
+
+    with zipfile.ZipFile(input_file) as zf:
+        infos = [info for info in zf.infolist() if not info.is_dir()]
+        if parts is None:
+            zf.extractall(output_path)
+        else:
+            for info in infos:
+                if _always_extracted(info.filename) or _matches(info.filename, parts):
+                    zf.extract(info, output_path)
+
+    entries = []
+    for info in infos:
+        part_path = output_path / info.filename
+        if part_path.is_file():
+            entries.append((info, part_path))
+    hashes = _process_parts(entries, workers)
+
+    # Parts are listed in archive order whatever order they finished in
+    manifest_parts = {}
+    for info in infos:
+        path = output_path / info.filename
+        manifest_parts[info.filename] = {
+            "sha256": hashes.get(path),
+            "header_offset": info.header_offset,
+            "compress_size": info.compress_size,
+            "CRC": info.CRC,
+            "extracted": path in hashes,
+        }
+
+    stat = input_file.stat()
+    manifest = {
+        "source": str(input_file.resolve()),
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "parts": manifest_parts,
+    }
+    _write_manifest(output_path, manifest)
+
+
+def pending_parts(unpacked_dir):
+    """List parts a lazy unpack has not extracted yet, in archive order."""
+    manifest = _read_manifest(unpacked_dir)
+    if manifest is None:
+        return []
+    return [
+        name
+        for name, part in manifest["parts"].items()
+        if not part.get("extracted", True) and not (Path(unpacked_dir) / name).exists()
+    ]
+
+
+def extract_parts(unpacked_dir, names=None, xml_only=False, workers=None):
+    """Extract parts skipped by a lazy unpack and record them in the manifest.
+
+    Args:
+        unpacked_dir: Directory written by unpack_document()
+        names: Part names or glob patterns to extract (default: all pending)
+        xml_only: Only extract .xml and .rels parts, leaving media packed
+        workers: Processes used to pretty print (default as unpack_document)
+
+    Returns:
+        list: Names of the parts that were extracted
+
+    Raises:
+        ValueError: If the original file was changed or removed since unpacking
+    """
+    unpacked_dir = Path(unpacked_dir)
+    wanted = [
+        name
+        for name in pending_parts(unpacked_dir)
+        if (names is None or _matches(name, names))
+        and (not xml_only or _is_xml(name))
+    ]
+    if not wanted:
+        return []
+
+    manifest = _read_manifest(unpacked_dir)
+    source = Path(manifest["source"])
+    try:
+        stat = source.stat()
+    except OSError:
+        raise ValueError(f"Original file {source} of {unpacked_dir} no longer exists")
+    if (stat.st_size, stat.st_mtime_ns) != (
+        manifest["source_size"],
+        manifest["source_mtime_ns"],
+    ):
+        raise ValueError(f"Original file {source} changed since {unpacked_dir} was unpacked")
+
+    entries = []
+    with zipfile.ZipFile(source) as zf:
+        for name in wanted:
+            info = zf.getinfo(name)
+            zf.extract(info, unpacked_dir)
+            entries.append((info, unpacked_dir / name))
+    hashes = _process_parts(entries, workers)
+
+    for info, path in entries:
+        manifest["parts"][info.filename]["sha256"] = hashes[path]
+        manifest["parts"][info.filename]["extracted"] = True
+    _write_manifest(unpacked_dir, manifest)
+    return wanted
+
+
+def extract_part(unpacked_dir, name):
+    """Make sure a part is on disk, extracting it if pending; returns its path."""
+    extract_parts(unpacked_dir, [name])
+    return Path(unpacked_dir) / name
+
+
+def _process_parts(entries, workers):
+    """Pretty print and hash extracted (info, path) entries; returns {path: sha256}."""
+    xml_size = sum(info.file_size for info, path in entries if _is_xml(path.name))
+    if workers is None:
+        workers = (os.cpu_count() or 1) if xml_size >= PARALLEL_MIN_BYTES else 1
+    workers = min(workers, len(entries))
+
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                path: executor.submit(_process_part, str(path))
+                for info, path in sorted(entries, key=lambda entry: -entry[0].file_size)
+            }
+            return {path: future.result() for path, future in futures.items()}
+    return {path: _process_part(str(path)) for info, path in entries}
+
+
+def _process_part(path):
+    """Pretty print an extracted XML part in place; returns the file's sha256."""
+    path = Path(path)
+    data = path.read_bytes()
+    if _is_xml(path.name):
+        data = pretty_xml_bytes(data.decode("utf-8"))
+        path.write_bytes(data)
+    return hashlib.sha256(data).hexdigest()
+
+
+def _is_xml(name):
+    return name.endswith((".xml", ".rels"))
+
+
+def _always_extracted(name):
+    """Package structure parts, needed to navigate the package at all."""
+    return name == "[Content_Types].xml" or name.endswith(".rels")
+
+
+def _matches(name, patterns):
+    return any(name == pattern or fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def _read_manifest(unpacked_dir):
+    try:
+        return json.loads((Path(unpacked_dir) / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _write_manifest(unpacked_dir, manifest):
+    # Written to a temporary file first so a reader never sees half a manifest
+    path = Path(unpacked_dir) / MANIFEST_NAME
+    temp_path = path.with_name(path.name + ".tmp")
+    temp_path.write_text(json.dumps(manifest, indent=2))
+    os.replace(temp_path, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Unpack an Office file")
+    parser.add_argument("office_file", help="Office file (.docx/.pptx/.xlsx)")
+    parser.add_argument("output_dir", help="Directory to unpack into")
+    parser.add_argument(
+        "--lazy",
+        nargs="*",
+        metavar="PART",
+        help="Only extract these parts (glob patterns allowed); the rest on demand",
+    )
+    args = parser.parse_args()
+
+    unpack_document(args.office_file, args.output_dir, parts=args.lazy)
+
+    # For .docx files, suggest an RSID for tracked changes
+    if args.office_file.endswith(".docx"):
+        suggested_rsid = "".join(random.choices("0123456789ABCDEF", k=8))
+        print(f"Suggested RSID for edit session: {suggested_rsid}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Persistent cache of XSD errors found in original document parts.
+
+Validators only report errors that the original document did not already
+have, so every run used to re-validate the original's copy of each failing
+part. The same templates are validated over and over, so those baseline
+error sets are stored on disk, keyed by the part's content hash, its schema
+and the schema bundle version.
+
+Entries are written to a temporary file and renamed into place, so
+concurrent validators never see partial entries, and the least recently
+used entries are removed once the cache grows past its size limit.
+
+The cache lives in $OOXML_VALIDATION_CACHE_DIR, defaulting to
+~/.cache/ooxml-validation; set the variable to an empty string to disable it.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+
+# Bump when the preprocessing before XSD validation changes, since that
+# changes the errors a part produces
+CACHE_FORMAT_VERSION = 1
+
+# Size above which least recently used entries are removed
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+# Temporary files older than this were left by a crashed writer
+STALE_TEMP_SECONDS = 3600
+
+# Schema bundle versions by schemas directory, computed once per process
+_BUNDLE_VERSIONS = {}
+
+
+def schema_bundle_version(schemas_dir):
+    """Hash of every file in the schema bundle, so schema updates invalidate entries."""
+    schemas_dir = Path(schemas_dir).resolve()
+    if schemas_dir not in _BUNDLE_VERSIONS:
+        digest = hashlib.sha256()
+        for path in sorted(schemas_dir.rglob("*")):
+            if path.is_file():
+                digest.update(path.relative_to(schemas_dir).as_posix().encode())
+                digest.update(hashlib.sha256(path.read_bytes()).digest())
+        _BUNDLE_VERSIONS[schemas_dir] = digest.hexdigest()
+    return _BUNDLE_VERSIONS[schemas_dir]
+
+
+class BaselineErrorCache:
+    """On-disk store of original-part XSD error sets."""
+
+    def __init__(self, cache_dir, schemas_dir, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = Path(cache_dir)
+        self.schemas_dir = Path(schemas_dir).resolve()
+        self.max_bytes = max_bytes
+        self.written = 0
+
+    @classmethod
+    def from_environment(cls, schemas_dir):
+        """Create the cache configured by the environment, or None if disabled."""
+        cache_dir = os.environ.get("OOXML_VALIDATION_CACHE_DIR")
+        if cache_dir is None:
+            cache_home = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+            cache_dir = Path(cache_home) / "ooxml-validation"
+        elif not cache_dir:
+            return None
+        return cls(cache_dir, schemas_dir)
+
+    def key(self, part_bytes, schema_path, cleaned_namespaces):
+        """Key for a part's errors under a schema and preprocessing mode."""
+        digest = hashlib.sha256()
+        digest.update(f"{CACHE_FORMAT_VERSION}\0".encode())
+        digest.update(f"{schema_bundle_version(self.schemas_dir)}\0".encode())
+        schema_name = Path(schema_path).resolve().relative_to(self.schemas_dir).as_posix()
+        digest.update(f"{schema_name}\0{int(cleaned_namespaces)}\0".encode())
+        digest.update(hashlib.sha256(part_bytes).digest())
+        return digest.hexdigest()
+
+    def get(self, key):
+        """Return the cached error set, or None on a miss or unreadable entry."""
+        path = self._entry_path(key)
+        try:
+            errors = set(json.loads(path.read_text(encoding="utf-8")))
+        except (OSError, ValueError, TypeError):
+            return None
+        try:
+            os.utime(path)  # Mark as recently used
+        except OSError:
+            pass
+        return errors
+
+    def put(self, key, errors):
+        """Store an error set; failures are ignored since the cache is optional."""
+        path = self._entry_path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(suffix=".tmp", dir=path.parent)
+            try:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(sorted(errors), f)
+                os.replace(temp_path, path)
+            except BaseException:
+                Path(temp_path).unlink(missing_ok=True)
+                raise
+            self.written += 1
+        except OSError:
+            pass
+
+    def prune(self):
+        """Remove least recently used entries if the cache is over its size limit.
+
+        Only scans the cache when this instance wrote entries.
+        """
+        if not self.written:
+            return
+        self.written = 0
+
+        entries = []
+        total = 0
+        now = time.time()
+        for path in self.cache_dir.glob("*/*"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue  # Removed by another process
+            if path.suffix == ".tmp":
+                if now - stat.st_mtime > STALE_TEMP_SECONDS:
+                    path.unlink(missing_ok=True)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_bytes:
+            return
+        # Trim to 90% so the next few writes do not trigger another scan
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes * 0.9:
+                break
+            try:
+                path.unlink()
+            except OSError:
+                pass
+            total -= size
+
+    def _entry_path(self, key):
+        return self.cache_dir / key[:2] / f"{key[2:]}.json"
@@ -30,11 +30,12 @@ import html
 import random
 import shutil
 import tempfile
+import time
 from datetime import datetime, timezone
 from pathlib import Path
 
 from defusedxml import minidom
-from ooxml.scripts.pack import pack_document
+from ooxml.scripts.unpack import MANIFEST_NAME, extract_part, extract_parts
 from ooxml.scripts.validation.docx import DOCXSchemaValidator
 from ooxml.scripts.validation.redlining import RedliningValidator
 
@@ -607,6 +608,17 @@ def _generate_hex_id() -> str:
     return f"{random.randint(1, 0x7FFFFFFE):08X}"
 
 
+def _ignore_non_xml_parts(directory, names):
+    """shutil.copytree ignore function keeping only XML parts and the unpack manifest."""
+    return [
+        name
+        for name in names
+        if (Path(directory) / name).is_file()
+        and not name.endswith((".xml", ".rels"))
+        and name != MANIFEST_NAME
+    ]
+
+
 def _generate_rsid() -> str:
     """Generate random 8-character hex RSID."""
     return "".join(random.choices("0123456789ABCDEF", k=8))
@@ -644,9 +656,24 @@ class Document:
         self.unpacked_path = Path(self.temp_dir) / "unpacked"
         shutil.copytree(self.original_path, self.unpacked_path)
 
-        # Pack original directory into temporary .docx for validation baseline (outside unpacked dir)
-        self.original_docx = Path(self.temp_dir) / "original.docx"
-        pack_document(self.original_path, self.original_docx, validate=False)
+        # Parts this class reads up front (others are extracted on first access
+        # if the directory was unpacked with --lazy)
+        extract_parts(
+            self.unpacked_path,
+            [
+                "word/document.xml",
+                "word/settings.xml",
+                "word/people.xml",
+                "word/comments*.xml",
+            ],
+        )
+
+        # Snapshot the original XML parts as the validation baseline (outside unpacked dir);
+        # validators read them through OOXMLPackage, so nothing needs packing
+        self.original_snapshot = Path(self.temp_dir) / "original"
+        shutil.copytree(
+            self.original_path, self.original_snapshot, ignore=_ignore_non_xml_parts
+        )
 
         self.word_path = self.unpacked_path / "word"
 
@@ -704,7 +731,7 @@ class Document:
             comment = doc["word/comments.xml"].get_node(tag="w:comment", attrs={"w:id": "0"})
         """
         if xml_path not in self._editors:
-            file_path = self.unpacked_path / xml_path
+            file_path = extract_part(self.unpacked_path, xml_path)
             if not file_path.exists():
                 raise ValueError(f"XML file not found: {xml_path}")
             # Use DocxXMLEditor with RSID, author, and initials for all editors
@@ -851,24 +878,34 @@ class Document:
         if hasattr(self, "temp_dir") and Path(self.temp_dir).exists():
             shutil.rmtree(self.temp_dir)
 
-    def validate(self) -> None:
+    def validate(self, fail_fast=False, time_budget=None) -> None:
         """
         Validate the document against XSD schema and redlining rules.
 
+        Args:
+            fail_fast: Run cheap checks first and stop at the first failure.
+            time_budget: Seconds after which no further checks are started;
+                skipped checks are printed.
+
         Raises:
             ValueError: If validation fails.
         """
+        started = time.monotonic()
+
         # Create validators with current state
         schema_validator = DOCXSchemaValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path, self.original_snapshot, verbose=False
         )
         redlining_validator = RedliningValidator(
-            self.unpacked_path, self.original_docx, verbose=False
+            self.unpacked_path, self.original_snapshot, verbose=False
         )
 
         # Run validations
-        if not schema_validator.validate():
+        if not schema_validator.validate(fail_fast=fail_fast, time_budget=time_budget):
             raise ValueError("Schema validation failed")
+        if time_budget is not None and time.monotonic() - started >= time_budget:
+            print("SKIPPED - RedliningValidator not run (time budget used up)")
+            return
         if not redlining_validator.validate():
             raise ValueError("Redlining validation failed")
 
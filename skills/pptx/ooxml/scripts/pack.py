@@ -7,25 +7,77 @@ Example usage:
 """
 
 import argparse
-import shutil
+import hashlib
+import json
+import os
+import struct
 import subprocess
 import sys
 import tempfile
-import defusedxml.minidom
+import time
 import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
 
+import lxml.etree
+
+try:
+    from .unpack import MANIFEST_NAME, pending_parts
+except ImportError:
+    from unpack import MANIFEST_NAME, pending_parts
+
+# Never resolve entities or fetch external resources while condensing
+XML_PARSER = lxml.etree.XMLParser(
+    remove_blank_text=True, resolve_entities=False, no_network=True, huge_tree=True
+)
+
+# Total XML size below which parts are processed in-process (pool startup
+# costs more than it saves on small documents)
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+# Formats that are already compressed; deflating them costs CPU and saves
+# nothing, so they are stored as-is
+STORED_EXTENSIONS = {
+    # Images
+    ".png", ".jpg", ".jpeg", ".jpe", ".gif", ".wdp", ".jxr", ".webp",
+    # Audio and video
+    ".mp4", ".m4v", ".m4a", ".mov", ".mp3", ".wma", ".wmv", ".avi", ".mpg", ".mpeg",
+    # Fonts (.fntdata is MicroType Express compressed)
+    ".fntdata", ".woff", ".woff2",
+    # Embedded Office packages and archives
+    ".docx", ".docm", ".pptx", ".pptm", ".xlsx", ".xlsm", ".zip",
+}
+
+# Other non-XML parts at least this large are deflated in threads
+# (zlib releases the GIL while compressing)
+THREADED_DEFLATE_MIN_BYTES = 1024 * 1024
+
+# Size of the chunks large parts are read and deflated in
+DEFLATE_CHUNK_SIZE = 1024 * 1024
+
 
 def main():
     parser = argparse.ArgumentParser(description="Pack a directory into an Office file")
     parser.add_argument("input_directory", help="Unpacked Office document directory")
     parser.add_argument("output_file", help="Output Office file (.docx/.pptx/.xlsx)")
     parser.add_argument("--force", action="store_true", help="Skip validation")
+    parser.add_argument(
+        "--level",
+        type=int,
+        choices=range(0, 10),
+        default=zlib.Z_DEFAULT_COMPRESSION,
+        metavar="0-9",
+        help="Deflate level for XML and other compressible parts",
+    )
     args = parser.parse_args()
 
     try:
         success = pack_document(
-            args.input_directory, args.output_file, validate=not args.force
+            args.input_directory,
+            args.output_file,
+            validate=not args.force,
+            level=args.level,
         )
 
         # Show warning if validation was skipped
@@ -42,13 +94,23 @@ def main():
         sys.exit(f"Error: {e}")
 
 
-def pack_document(input_dir, output_file, validate=False):
+def pack_document(
+    input_dir,
+    output_file,
+    validate=False,
+    workers=None,
+    level=zlib.Z_DEFAULT_COMPRESSION,
+):
     """Pack a directory into an Office file (.docx/.pptx/.xlsx).
 
     Args:
         input_dir: Path to unpacked Office document directory
         output_file: Path to output Office file
         validate: If True, validates with soffice (default: False)
+        workers: Processes used to condense and compress XML parts
+            (default: CPU count for large documents, 1 for small ones)
+        level: Deflate level (0-9) for XML and other compressible parts;
+            files in STORED_EXTENSIONS are always stored uncompressed
 
     Returns:
         bool: True if successful, False if validation failed
@@ -61,32 +123,255 @@ def pack_document(input_dir, output_file, validate=False):
     if output_file.suffix.lower() not in {".docx", ".pptx", ".xlsx"}:
         raise ValueError(f"{output_file} must be a .docx, .pptx, or .xlsx file")
 
-    # Work in temporary directory to avoid modifying original
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        # Process XML files to remove pretty-printing whitespace
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                condense_xml(xml_file)
-
-        # Create final Office file as zip archive
-        output_file.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-        # Validate if requested
-        if validate:
-            if not validate_document(output_file):
-                output_file.unlink()  # Delete the corrupt file
-                return False
+    # Parts unchanged since unpack.py are copied raw from the original file
+    manifest = load_manifest(input_dir)
+    source = Path(manifest["source"]) if manifest else None
+    if manifest is None and pending_parts(input_dir):
+        raise ValueError(
+            f"{input_dir} was unpacked with --lazy and its original file has changed"
+        )
+    in_place = source is not None and source == output_file.resolve()
+
+    # Stream each part into the zip; the unpacked directory is never modified
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    target = output_file
+    if in_place:
+        fd, target = tempfile.mkstemp(suffix=output_file.suffix, dir=output_file.parent)
+        os.close(fd)
+        target = Path(target)
+    try:
+        with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED) as zf:
+            original = zipfile.ZipFile(source) if source else None
+            try:
+                _write_package(zf, input_dir, manifest, original, workers, level)
+            finally:
+                if original is not None:
+                    original.close()
+        if in_place:
+            os.replace(target, output_file)
+    except BaseException:
+        if in_place:
+            target.unlink(missing_ok=True)
+        raise
+
+    # Validate if requested
+    if validate:
+        if not validate_document(output_file):
+            output_file.unlink()  # Delete the corrupt file
+            return False
 
     return True
 
 
+def _write_package(zf, input_dir, manifest, original, workers, level):
+    """Write every part of input_dir into zf in package order.
+
+    XML parts that changed are condensed and deflated by _condense_part,
+    across a process pool when the document is large, largest parts first
+    so a big document.xml does not finish last. Results are written as
+    each part's turn comes, so only compressed data waits in memory.
+    Parts a lazy unpack never extracted are taken from the original file.
+
+    Already-compressed media is stored, and other large binary parts are
+    deflated in a thread pool alongside the XML.
+    """
+    files = package_files(input_dir)
+    pending = set()
+    if original is not None:
+        pending = {input_dir / name for name in pending_parts(input_dir)}
+        files = _package_order(input_dir, files + list(pending))
+
+    unchanged = {}
+    condense = []
+    deflate = []
+    for f in files:
+        arcname = f.relative_to(input_dir).as_posix()
+        if f in pending:
+            continue
+        info = _unchanged_entry(original, manifest, arcname, f)
+        if info is not None:
+            unchanged[f] = info
+        elif f.suffix in (".xml", ".rels"):
+            condense.append(f)
+        elif (
+            f.suffix.lower() not in STORED_EXTENSIONS
+            and f.stat().st_size >= THREADED_DEFLATE_MIN_BYTES
+        ):
+            deflate.append(f)
+
+    sizes = {f: f.stat().st_size for f in condense + deflate}
+    if workers is None:
+        workers = (os.cpu_count() or 1) if sum(sizes.values()) >= PARALLEL_MIN_BYTES else 1
+    process_workers = min(workers, len(condense))
+    thread_workers = min(workers, len(deflate))
+
+    executor = ProcessPoolExecutor(max_workers=process_workers) if process_workers > 1 else None
+    threads = ThreadPoolExecutor(max_workers=thread_workers) if thread_workers > 1 else None
+    try:
+        futures = {}
+        if executor is not None:
+            for f in sorted(condense, key=lambda f: -sizes[f]):
+                futures[f] = executor.submit(_condense_part, str(f), level)
+        if threads is not None:
+            for f in sorted(deflate, key=lambda f: -sizes[f]):
+                futures[f] = threads.submit(_deflate_file, f, level)
+
+        for f in files:
+            arcname = f.relative_to(input_dir).as_posix()
+            if f in pending:
+                copy_pending_member(original, arcname, zf)
+            elif f in unchanged:
+                copy_raw_member(original, unchanged[f], zf)
+            elif f in futures:
+                write_compressed_member(zf, arcname, *futures[f].result())
+            elif f in sizes:
+                if f.suffix in (".xml", ".rels"):
+                    result = _condense_part(str(f), level)
+                else:
+                    result = _deflate_file(f, level)
+                write_compressed_member(zf, arcname, *result)
+            elif f.suffix.lower() in STORED_EXTENSIONS:
+                zf.write(f, arcname, compress_type=zipfile.ZIP_STORED)
+            else:
+                zf.write(f, arcname, compresslevel=level)
+    finally:
+        for pool in (executor, threads):
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+
+def _condense_part(path, level=zlib.Z_DEFAULT_COMPRESSION):
+    """Condense and deflate one XML part; returns (data, CRC, file_size)."""
+    data = condense_xml_bytes(Path(path).read_bytes())
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    return compressor.compress(data) + compressor.flush(), zlib.crc32(data), len(data)
+
+
+def _deflate_file(path, level=zlib.Z_DEFAULT_COMPRESSION):
+    """Deflate a binary part in chunks; returns (data, CRC, file_size)."""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, -15)
+    chunks = []
+    crc = 0
+    file_size = 0
+    with open(path, "rb") as f:
+        while chunk := f.read(DEFLATE_CHUNK_SIZE):
+            chunks.append(compressor.compress(chunk))
+            crc = zlib.crc32(chunk, crc)
+            file_size += len(chunk)
+    chunks.append(compressor.flush())
+    return b"".join(chunks), crc, file_size
+
+
+def package_files(input_dir):
+    """List the files of an unpacked document, [Content_Types].xml first."""
+    files = [
+        f
+        for f in Path(input_dir).rglob("*")
+        if f.is_file() and f.name != MANIFEST_NAME
+    ]
+    return _package_order(input_dir, files)
+
+
+def _package_order(input_dir, files):
+    files = sorted(files)
+    return sorted(files, key=lambda f: f.relative_to(input_dir).as_posix() != "[Content_Types].xml")
+
+
+def load_manifest(input_dir):
+    """Load the unpack manifest if its original file is still unchanged."""
+    manifest_path = Path(input_dir) / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_path.read_text())
+        stat = Path(manifest["source"]).stat()
+    except (OSError, ValueError, KeyError):
+        return None
+    if (
+        stat.st_size != manifest.get("source_size")
+        or stat.st_mtime_ns != manifest.get("source_mtime_ns")
+    ):
+        return None
+    return manifest
+
+
+def _unchanged_entry(original, manifest, arcname, path):
+    """Return the original ZipInfo for a part whose content is unchanged."""
+    if original is None:
+        return None
+    recorded = manifest["parts"].get(arcname)
+    if recorded is None:
+        return None
+    with open(path, "rb") as f:
+        if recorded["sha256"] != hashlib.file_digest(f, "sha256").hexdigest():
+            return None
+    try:
+        info = original.getinfo(arcname)
+    except KeyError:
+        return None
+    if (
+        info.header_offset != recorded["header_offset"]
+        or info.compress_size != recorded["compress_size"]
+        or info.CRC != recorded["CRC"]
+        or info.flag_bits & 0x1  # encrypted
+        or max(info.compress_size, info.file_size) >= zipfile.ZIP64_LIMIT
+    ):
+        return None
+    return info
+
+
+def copy_pending_member(source, arcname, zf):
+    """Copy a part that was never extracted, recompressing only if it must."""
+    info = source.getinfo(arcname)
+    if info.flag_bits & 0x1 or max(info.compress_size, info.file_size) >= zipfile.ZIP64_LIMIT:
+        zf.writestr(arcname, source.read(arcname))
+    else:
+        copy_raw_member(source, info, zf)
+
+
+def copy_raw_member(source, info, zf):
+    """Copy a member's compressed bytes from source into zf without recompressing.
+
+    zipfile has no public API for writing pre-compressed data, so
+    _write_entry writes the local header directly and registers the entry
+    the way ZipFile.write() does.
+    """
+    source.fp.seek(info.header_offset)
+    header = struct.unpack(zipfile.structFileHeader, source.fp.read(zipfile.sizeFileHeader))
+    # Skip the local file name and extra field (indices 10 and 11 of the header)
+    source.fp.seek(header[10] + header[11], os.SEEK_CUR)
+    raw = source.fp.read(info.compress_size)
+
+    zinfo = zipfile.ZipInfo(info.filename, info.date_time)
+    zinfo.compress_type = info.compress_type
+    zinfo.CRC = info.CRC
+    zinfo.compress_size = info.compress_size
+    zinfo.file_size = info.file_size
+    zinfo.external_attr = info.external_attr
+    # Sizes are known up front, so no trailing data descriptor
+    zinfo.flag_bits = info.flag_bits & ~0x08
+    _write_entry(zf, zinfo, raw)
+
+
+def write_compressed_member(zf, arcname, data, crc, file_size):
+    """Add a member whose content was already raw-deflated (wbits=-15)."""
+    zinfo = zipfile.ZipInfo(arcname, time.localtime(time.time())[:6])
+    zinfo.compress_type = zipfile.ZIP_DEFLATED
+    zinfo.CRC = crc
+    zinfo.compress_size = len(data)
+    zinfo.file_size = file_size
+    zinfo.external_attr = 0o600 << 16
+    _write_entry(zf, zinfo, data)
+
+
+def _write_entry(zf, zinfo, data):
+    """Write a local header and compressed data, registering the entry in zf."""
+    zinfo.header_offset = zf.fp.tell()
+    zf.fp.write(zinfo.FileHeader())
+    zf.fp.write(data)
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+    zf.start_dir = zf.fp.tell()
+
+
 def validate_document(doc_path):
     """Validate document by converting to HTML with soffice."""
     # Determine the correct filter based on file extension
@@ -132,27 +417,53 @@ def validate_document(doc_path):
 
 def condense_xml(xml_file):
     """Strip unnecessary whitespace and remove comments."""
-    with open(xml_file, "r", encoding="utf-8") as f:
-        dom = defusedxml.minidom.parse(f)
+    xml_file = Path(xml_file)
+    xml_file.write_bytes(condense_xml_bytes(xml_file.read_bytes()))
 
-    # Process each element to remove whitespace and comments
-    for element in dom.getElementsByTagName("*"):
-        # Skip w:t elements and their processing
-        if element.tagName.endswith(":t"):
+
+def condense_xml_bytes(data):
+    """Return XML content with pretty-printing whitespace and comments removed.
+
+    Whitespace-only text and comments are dropped everywhere except inside
+    *:t text elements (w:t, a:t, ...), where whitespace is content. The parser
+    removes most blank text while parsing; XPath then finds the remaining
+    whitespace-only nodes so only those are visited from Python.
+    """
+    root = lxml.etree.fromstring(data, XML_PARSER)
+
+    for text in root.xpath("//text()[normalize-space(.) = '']"):
+        node = text.getparent()
+        if text.is_text:
+            if not _is_text_element(node):
+                node.text = None
+        elif node.getparent() is not None and not _is_text_element(node.getparent()):
+            node.tail = None
+
+    for comment in root.xpath("//comment()"):
+        parent = comment.getparent()
+        # Comments before or after the root element are kept, as before
+        if parent is None or _is_text_element(parent):
             continue
+        tail = comment.tail
+        if tail and tail.strip() != "":
+            previous = comment.getprevious()
+            if previous is not None:
+                previous.tail = (previous.tail or "") + tail
+            else:
+                parent.text = (parent.text or "") + tail
+        parent.remove(comment)
+
+    # Keep standalone="yes"; lxml would write standalone='no' for any other
+    # explicit value, which the pretty-printed parts no longer declare
+    options = {"standalone": True} if root.getroottree().docinfo.standalone else {}
+    return lxml.etree.tostring(
+        root.getroottree(), xml_declaration=True, encoding="UTF-8", **options
+    )
+
 
-        # Remove whitespace-only text nodes and comment nodes
-        for child in list(element.childNodes):
-            if (
-                child.nodeType == child.TEXT_NODE
-                and child.nodeValue
-                and child.nodeValue.strip() == ""
-            ) or child.nodeType == child.COMMENT_NODE:
-                element.removeChild(child)
-
-    # Write back the condensed XML
-    with open(xml_file, "wb") as f:
-        f.write(dom.toxml(encoding="UTF-8"))
+def _is_text_element(element):
+    """Check whether an element is a prefixed text element such as w:t."""
+    return element.prefix is not None and lxml.etree.QName(element).localname == "t"
 
 
 if __name__ == "__main__":
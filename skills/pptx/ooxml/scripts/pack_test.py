@@ -0,0 +1,67 @@
+import tempfile
+import unittest
+import zipfile
+from pathlib import Path
+
+from pack import condense_xml_bytes, pack_document
+from unpack import unpack_document
+
+
+CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="xml" ContentType="application/xml"/></Types>'
+)
+PART = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<p:sld xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main">'
+    "<p:cSld/></p:sld>"
+)
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestXmlDeclaration(unittest.TestCase):
+
+    def test_condense_keeps_standalone_yes(self):
+        self.assertTrue(
+            condense_xml_bytes(PART.encode()).startswith(
+                b"<?xml version='1.0' encoding='UTF-8' standalone='yes'?>"
+            )
+        )
+
+    def test_condense_never_adds_standalone(self):
+        self.assertTrue(
+            condense_xml_bytes(b"<a>\n  <b/>\n</a>").startswith(
+                b"<?xml version='1.0' encoding='UTF-8'?>"
+            )
+        )
+
+    def test_condense_keeps_top_level_comments(self):
+        self.assertEqual(
+            condense_xml_bytes(b'<?xml version="1.0"?>\n<!-- top --><a><!-- x --><b/></a>'),
+            b"<?xml version='1.0' encoding='UTF-8'?>\n<!-- top --><a><b/></a>",
+        )
+
+    def test_unpack_pack_round_trip(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            temp_dir = Path(temp_dir)
+            original = temp_dir / "original.pptx"
+            with zipfile.ZipFile(original, "w") as zf:
+                zf.writestr("[Content_Types].xml", CONTENT_TYPES)
+                zf.writestr("ppt/slides/slide1.xml", PART)
+
+            unpacked = temp_dir / "unpacked"
+            unpack_document(original, unpacked)
+            # Edit the part so it is condensed rather than copied raw
+            slide = unpacked / "ppt/slides/slide1.xml"
+            slide.write_text(slide.read_text().replace("<p:cSld/>", "<p:cSld></p:cSld>"))
+
+            packed = temp_dir / "packed.pptx"
+            self.assertTrue(pack_document(unpacked, packed))
+            with zipfile.ZipFile(packed) as zf:
+                declaration = zf.read("ppt/slides/slide1.xml").split(b"?>")[0] + b"?>"
+            self.assertEqual(declaration, b"<?xml version='1.0' encoding='UTF-8'?>")
+
+
+if __name__ == "__main__":
+    unittest.main()
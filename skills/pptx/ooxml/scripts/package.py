@@ -0,0 +1,231 @@
+"""
+Read-only access to the parts of an Office package (.docx, .pptx, .xlsx).
+
+OOXMLPackage works the same on the zip file and on a directory written by
+unpack.py, so code that needs a few parts of a document never has to
+extract the whole archive. Part bytes and parsed trees are loaded on first
+use and cached.
+
+Example usage:
+    package = OOXMLPackage("deck.pptx")
+    root = package.parse("ppt/presentation.xml").getroot()
+    for rel in package.relationships("ppt/presentation.xml"):
+        print(rel.id, rel.type, rel.part)
+"""
+
+import io
+import posixpath
+import zipfile
+from collections import namedtuple
+from pathlib import Path
+
+import lxml.etree
+
+try:
+    from .unpack import MANIFEST_NAME, extract_part, pending_parts
+except ImportError:
+    from unpack import MANIFEST_NAME, extract_part, pending_parts
+
+PACKAGE_RELATIONSHIPS_NAMESPACE = (
+    "http://schemas.openxmlformats.org/package/2006/relationships"
+)
+CONTENT_TYPES_NAMESPACE = (
+    "http://schemas.openxmlformats.org/package/2006/content-types"
+)
+
+# A relationship from a .rels part. part is the target's part name
+# (resolved against the source part) or None for external and empty
+# targets; line is the Relationship element's line in the .rels part.
+Relationship = namedtuple(
+    "Relationship", ["id", "type", "target", "target_mode", "part", "line"]
+)
+
+# Targets that are URIs rather than part names, even without TargetMode
+EXTERNAL_TARGET_PREFIXES = ("http:", "https:", "mailto:")
+
+# Declarations of [Content_Types].xml: extension -> type and part name -> type
+ContentTypes = namedtuple("ContentTypes", ["defaults", "overrides"])
+
+
+class OOXMLPackage:
+    """An Office package backed by either a zip file or an unpacked directory.
+
+    Part names are zip member names ("word/document.xml"). Trees returned by
+    parse() are shared between callers and must not be modified; use
+    copy.deepcopy() or parse the bytes from read() to get a private copy.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.is_directory = self.path.is_dir()
+        self._zip = None
+        self._names = None
+        self._name_set = None
+        self._bytes = {}
+        self._trees = {}
+        self._relationships = {}
+        self._content_types = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the zip file, if open. Cached parts stay readable."""
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+    def part_names(self):
+        """Return the names of all parts, sorted."""
+        if self._names is None:
+            if self.is_directory:
+                names = {
+                    f.relative_to(self.path).as_posix()
+                    for f in self.path.rglob("*")
+                    if f.is_file() and not f.name.startswith(MANIFEST_NAME)
+                }
+                # Parts a lazy unpack has not extracted yet still exist
+                names.update(pending_parts(self.path))
+            else:
+                names = {
+                    name for name in self._zipfile().namelist() if not name.endswith("/")
+                }
+            self._names = sorted(names)
+            self._name_set = names
+        return self._names
+
+    def __contains__(self, name):
+        self.part_names()
+        return name in self._name_set
+
+    def read(self, name):
+        """Return the bytes of a part.
+
+        Raises:
+            KeyError: If the package has no such part
+        """
+        if name not in self._bytes:
+            if name not in self:
+                raise KeyError(f"There is no part named {name!r} in {self.path}")
+            if self.is_directory:
+                self._bytes[name] = extract_part(self.path, name).read_bytes()
+            else:
+                self._bytes[name] = self._zipfile().read(name)
+        return self._bytes[name]
+
+    def parse(self, name):
+        """Return the parsed lxml ElementTree of an XML part (shared, read-only).
+
+        Raises:
+            KeyError: If the package has no such part
+            lxml.etree.XMLSyntaxError: If the part is not well-formed
+        """
+        if name not in self._trees:
+            self._trees[name] = lxml.etree.parse(io.BytesIO(self.read(name)))
+        return self._trees[name]
+
+    def relationships(self, source=""):
+        """Return the relationships of a part ("" for the package itself).
+
+        Raises:
+            lxml.etree.XMLSyntaxError: If the .rels part is not well-formed
+        """
+        if source not in self._relationships:
+            rels_name = rels_part_name(source)
+            relationships = []
+            if rels_name in self:
+                relationships = read_relationships(source, self.parse(rels_name).getroot())
+            self._relationships[source] = relationships
+        return self._relationships[source]
+
+    def relationship_graph(self):
+        """Return {source part: [Relationship, ...]} for every .rels part."""
+        return {
+            source_part_name(name): self.relationships(source_part_name(name))
+            for name in self.part_names()
+            if name.endswith(".rels")
+        }
+
+    def content_types(self):
+        """Return the Default and Override declarations of [Content_Types].xml.
+
+        Extensions are lower case and part names have no leading slash.
+        """
+        if self._content_types is None:
+            self._content_types = read_content_types(
+                self.parse("[Content_Types].xml").getroot()
+            )
+        return self._content_types
+
+    def content_type(self, name):
+        """Return the declared content type of a part, or None."""
+        content_types = self.content_types()
+        if name in content_types.overrides:
+            return content_types.overrides[name]
+        extension = posixpath.splitext(name)[1].lstrip(".").lower()
+        return content_types.defaults.get(extension)
+
+    def _zipfile(self):
+        if self._zip is None:
+            self._zip = zipfile.ZipFile(self.path)
+        return self._zip
+
+
+def read_content_types(root):
+    """Return the ContentTypes declared by a parsed [Content_Types].xml root."""
+    defaults = {}
+    overrides = {}
+    for default in root.iter(f"{{{CONTENT_TYPES_NAMESPACE}}}Default"):
+        if default.get("Extension") is not None:
+            defaults[default.get("Extension").lower()] = default.get("ContentType")
+    for override in root.iter(f"{{{CONTENT_TYPES_NAMESPACE}}}Override"):
+        if override.get("PartName") is not None:
+            overrides[override.get("PartName").lstrip("/")] = override.get("ContentType")
+    return ContentTypes(defaults, overrides)
+
+
+def read_relationships(source, rels_root):
+    """Return the Relationships of a parsed .rels root for source ("" = package).
+
+    A target is external if its TargetMode says so or it is a URI such as
+    http: or mailto:, which can never name a part.
+    """
+    relationships = []
+    for rel in rels_root.iter(f"{{{PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"):
+        target = rel.get("Target") or ""
+        target_mode = rel.get("TargetMode", "Internal")
+        part = None
+        if (
+            target
+            and target_mode != "External"
+            and not target.startswith(EXTERNAL_TARGET_PREFIXES)
+        ):
+            part = resolve_target(source, target)
+        relationships.append(
+            Relationship(
+                rel.get("Id"), rel.get("Type"), target, target_mode, part, rel.sourceline
+            )
+        )
+    return relationships
+
+
+def rels_part_name(source):
+    """Name of the .rels part holding a part's relationships ("" = package)."""
+    directory, name = posixpath.split(source)
+    return posixpath.join(directory, "_rels", f"{name}.rels")
+
+
+def source_part_name(rels_name):
+    """Inverse of rels_part_name()."""
+    rels_directory, rels_file = posixpath.split(rels_name)
+    return posixpath.join(posixpath.dirname(rels_directory), rels_file[: -len(".rels")])
+
+
+def resolve_target(source, target):
+    """Resolve an internal relationship target to a part name."""
+    if target.startswith("/"):
+        return posixpath.normpath(target.lstrip("/"))
+    return posixpath.normpath(posixpath.join(posixpath.dirname(source), target))
@@ -3,11 +3,20 @@
 Command line tool to validate Office document XML files against XSD schemas and tracked changes.
 
 Usage:
-    python validate.py <dir> --original <original_file>
+    python validate.py <dir> --original <original_file> [--full]
+        [--fail-fast] [--time-budget SECONDS]
+
+Parts unchanged from the original are only covered by package-level checks
+(relationships, content types, global IDs); --full checks every part.
+
+--fail-fast and --time-budget run checks from cheapest to most expensive and
+stop at the first failure or once the budget is used up, listing the checks
+that were skipped.
 """
 
 import argparse
 import sys
+import time
 from pathlib import Path
 
 from validation import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
@@ -30,6 +39,22 @@ def main():
         action="store_true",
         help="Enable verbose output",
     )
+    parser.add_argument(
+        "--full",
+        action="store_true",
+        help="Also run per-part checks on parts unchanged from the original",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Run cheap checks first and stop at the first failure",
+    )
+    parser.add_argument(
+        "--time-budget",
+        type=float,
+        metavar="SECONDS",
+        help="Start no further checks after this many seconds",
+    )
     args = parser.parse_args()
 
     # Validate paths
@@ -53,13 +78,40 @@ def main():
             sys.exit(1)
 
     # Run validators
+    started = time.monotonic()
     success = True
+    skipped = False
     for V in validators:
-        validator = V(unpacked_dir, original_file, verbose=args.verbose)
-        if not validator.validate():
+        if args.fail_fast and not success:
+            print(f"SKIPPED - {V.__name__} not run (stopped at the first failure)")
+            skipped = True
+            continue
+        time_budget = None
+        if args.time_budget is not None:
+            time_budget = max(args.time_budget - (time.monotonic() - started), 0)
+
+        if V is RedliningValidator:
+            if time_budget == 0:
+                print(f"SKIPPED - {V.__name__} not run (time budget used up)")
+                skipped = True
+                continue
+            validator = V(unpacked_dir, original_file, verbose=args.verbose)
+            valid = validator.validate()
+        else:
+            validator = V(
+                unpacked_dir,
+                original_file,
+                verbose=args.verbose,
+                incremental=not args.full,
+            )
+            valid = validator.validate(fail_fast=args.fail_fast, time_budget=time_budget)
+            skipped = skipped or bool(validator.skipped_checks)
+        if not valid:
             success = False
 
-    if success:
+    if success and skipped:
+        print("No failures found, but some checks were skipped")
+    elif success:
         print("All validations PASSED!")
 
     sys.exit(0 if success else 1)
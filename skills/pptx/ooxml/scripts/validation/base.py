@@ -2,11 +2,45 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
+import hashlib
+import os
+import posixpath
 import re
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import lxml.etree
 
+from .cache import BaselineErrorCache
+from .index import PackageIndex
+from .rules import ElementRule, LocalNames, RuleWalker
+
+try:
+    from ..pack import condense_xml_bytes, load_manifest
+    from ..package import OOXMLPackage
+    from ..unpack import extract_parts, pending_parts
+except ImportError:
+    from pack import condense_xml_bytes, load_manifest
+    from package import OOXMLPackage
+    from unpack import extract_parts, pending_parts
+
+# Directory of the XSD schema bundle
+SCHEMAS_DIR = Path(__file__).parent.parent.parent / "schemas"
+
+# Compiled schemas by resolved schema path, shared by all validators in the
+# process (compiling wml.xsd or pml.xsd takes far longer than validating).
+# Schemas that fail to compile are cached as their exception.
+_SCHEMA_CACHE = {}
+
+# Total size of schema-validated parts below which XSD validation runs
+# in-process (starting workers costs more than it saves on small documents)
+XSD_PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+# Validator used by an XSD worker process (see _init_xsd_worker)
+_worker_validator = None
+
 
 class BaseSchemaValidator:
     """Base validator with common validation logic for document files."""
@@ -37,6 +71,10 @@ class BaseSchemaValidator:
         "grpsp": ("id", "file"),  # Group shape IDs
     }
 
+    # Checks run by validate() after XML well-formedness, as (method name,
+    # relative cost) pairs in report order; set by subclasses
+    CHECKS = ()
+
     # Mapping of element names to expected relationship types
     # Subclasses should override this with format-specific mappings
     ELEMENT_RELATIONSHIP_TYPES = {}
@@ -81,6 +119,9 @@ class BaseSchemaValidator:
         "http://schemas.openxmlformats.org/package/2006/content-types"
     )
 
+    # Template tags ({{ ... }}) are placeholders, removed from text before XSD validation
+    TEMPLATE_TAG_PATTERN = re.compile(r"\{\{[^}]*\}\}")
+
     # Folders where we should clean ignorable namespaces
     MAIN_CONTENT_FOLDERS = {"word", "ppt", "xl"}
 
@@ -103,13 +144,37 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file, verbose=False):
+    def __init__(self, unpacked_dir, original_file, verbose=False, incremental=True):
         self.unpacked_dir = Path(unpacked_dir).resolve()
         self.original_file = Path(original_file)
         self.verbose = verbose
+        # Skip per-part checks of parts unchanged from the original (see unchanged_files)
+        self.incremental = incremental
+        self._unchanged_files = None
+
+        # Original document (zip or unpacked directory), read part by part
+        self.original = OOXMLPackage(self.original_file)
+        # XSD errors of original parts by part name, computed at most once per run
+        self._original_errors = {}
+        # Original part errors persisted across runs (None if disabled)
+        self.baseline_cache = BaselineErrorCache.from_environment(SCHEMAS_DIR)
 
         # Set schemas directory
-        self.schemas_dir = Path(__file__).parent.parent.parent / "schemas"
+        self.schemas_dir = SCHEMAS_DIR
+
+        # Directories unpacked with --lazy: XML parts are extracted so they can
+        # be validated, media stays in the original file and counts as present
+        extract_parts(self.unpacked_dir, xml_only=True)
+        self.pending_parts = pending_parts(self.unpacked_dir)
+
+        # Parsed trees by path, shared by all checks of this run (see _parse)
+        self._trees = {}
+        # Element rules by name, run together on first use (see element_rules)
+        self._rule_results = None
+        # Parts, content types and relationships (see package_index)
+        self._package_index = None
+        # Checks the last validate() call did not run
+        self.skipped_checks = []
 
         # Get all XML and .rels files
         patterns = ["*.xml", "*.rels"]
@@ -120,9 +185,144 @@ class BaseSchemaValidator:
         if not self.xml_files:
             print(f"Warning: No XML files found in {self.unpacked_dir}")
 
-    def validate(self):
-        """Run all validation checks and return True if all pass."""
-        raise NotImplementedError("Subclasses must implement the validate method")
+    def _parse(self, xml_file):
+        """Parse an XML file once per run and return the shared ElementTree.
+
+        Checks must not modify the returned tree; one that needs to copies
+        it first. Parse errors are cached too and raised again.
+        """
+        if xml_file not in self._trees:
+            try:
+                self._trees[xml_file] = lxml.etree.parse(str(xml_file))
+            except Exception as e:
+                self._trees[xml_file] = e
+        tree = self._trees[xml_file]
+        if isinstance(tree, Exception):
+            raise tree
+        return tree
+
+    def unchanged_files(self):
+        """Parts identical to their original member, which cannot have new errors.
+
+        A part is unchanged if its bytes match the original member or the
+        hash unpack.py recorded when extracting it from the original file,
+        or if both condense to the same XML the way pack.py writes parts (so
+        pretty printing and other whitespace-only layout do not count).
+        XSD validation and incremental element rules skip these parts;
+        package-level checks still cover them. Empty unless incremental.
+        """
+        if self._unchanged_files is None:
+            self._unchanged_files = set()
+            if self.incremental:
+                recorded = self._unpacked_hashes()
+                self._unchanged_files = {
+                    xml_file
+                    for xml_file in self.xml_files
+                    if self._is_unchanged(xml_file, recorded)
+                }
+        return self._unchanged_files
+
+    def _unpacked_hashes(self):
+        """Hashes of the parts unpack.py extracted from the original file, by part name."""
+        manifest = load_manifest(self.unpacked_dir)
+        if manifest is None or Path(manifest["source"]) != self.original_file.resolve():
+            return {}
+        return {
+            name: part["sha256"]
+            for name, part in manifest["parts"].items()
+            if part.get("sha256")
+        }
+
+    def _is_unchanged(self, xml_file, recorded):
+        part_name = xml_file.relative_to(self.unpacked_dir).as_posix()
+        data = xml_file.read_bytes()
+        if recorded.get(part_name) == hashlib.sha256(data).hexdigest():
+            return True
+        if part_name not in self.original:
+            return False
+
+        original = self.original.read(part_name)
+        if data == original:
+            return True
+        try:
+            return _condensed_content(data) == _condensed_content(original)
+        except Exception:
+            return False  # Not comparable, so validate it
+
+    def package_index(self):
+        """Index of the package's parts, content types and relationships.
+
+        Built on first use from one listing of the unpacked directory and
+        the shared parsed trees, and reused by every check of the run.
+        """
+        if self._package_index is None:
+            self._package_index = PackageIndex(
+                self.unpacked_dir, self._parse, self.pending_parts
+            )
+        return self._package_index
+
+    def element_rules(self):
+        """Element-level rules, run in a single pass over each part.
+
+        Subclasses add their own rules to this list.
+        """
+        return [UniqueIdRule(self), RelationshipIdRule(self)]
+
+    def _element_rule_errors(self, rule_name):
+        """Errors found by an element rule, running all rules on first use."""
+        if self._rule_results is None:
+            walker = RuleWalker(
+                self.element_rules(), self._parse, unchanged=self.unchanged_files()
+            )
+            self._rule_results = walker.run(self.xml_files)
+        return self._rule_results[rule_name].errors
+
+    def validate(self, fail_fast=False, time_budget=None):
+        """Run all validation checks and return True if all pass.
+
+        Args:
+            fail_fast: Stop at the first failing check
+            time_budget: Seconds after which no further check is started
+
+        With either option, checks run from cheapest to most expensive, and
+        the checks that were not run are printed and left in skipped_checks.
+        """
+        started = time.monotonic()
+        self.skipped_checks = [name for name, cost in self.CHECKS]
+
+        # Test 0: XML well-formedness; the other checks need parseable parts
+        if not self.validate_xml():
+            self._report_skipped("XML is not well-formed")
+            return False
+
+        checks = list(self.CHECKS)
+        if fail_fast or time_budget is not None:
+            checks.sort(key=lambda check: check[1])
+        names = [name for name, cost in checks]
+
+        all_valid = True
+        self.skipped_checks = []
+        for i, name in enumerate(names):
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                self.skipped_checks = names[i:]
+                reason = "time budget used up"
+                break
+            if not getattr(self, name)():
+                all_valid = False
+                if fail_fast:
+                    self.skipped_checks = names[i + 1 :]
+                    reason = "stopped at the first failure"
+                    break
+
+        if self.skipped_checks:
+            self._report_skipped(reason)
+        return all_valid
+
+    def _report_skipped(self, reason):
+        print(
+            f"SKIPPED - {len(self.skipped_checks)} checks not run ({reason}): "
+            + ", ".join(self.skipped_checks)
+        )
 
     def validate_xml(self):
         """Validate that all XML files are well-formed."""
@@ -131,7 +331,7 @@ class BaseSchemaValidator:
         for xml_file in self.xml_files:
             try:
                 # Try to parse the XML file
-                lxml.etree.parse(str(xml_file))
+                self._parse(xml_file)
             except lxml.etree.XMLSyntaxError as e:
                 errors.append(
                     f"  {xml_file.relative_to(self.unpacked_dir)}: "
@@ -159,7 +359,7 @@ class BaseSchemaValidator:
 
         for xml_file in self.xml_files:
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse(xml_file).getroot()
                 declared = set(root.nsmap.keys()) - {None}  # Exclude default namespace
 
                 for attr_val in [
@@ -185,84 +385,7 @@ class BaseSchemaValidator:
 
     def validate_unique_ids(self):
         """Validate that specific IDs are unique according to OOXML requirements."""
-        errors = []
-        global_ids = {}  # Track globally unique IDs across all files
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  # Track IDs that must be unique within this file
-
-                # Remove all mc:AlternateContent elements from the tree
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
-                )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
-
-                # Now check IDs in the cleaned tree
-                for elem in root.iter():
-                    # Get the element name without namespace
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
-                    )
-
-                    # Check if this element type has ID uniqueness requirements
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        # Look for the specified attribute
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                # Check global uniqueness
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                # Check file-level uniqueness
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors(UniqueIdRule.name)
 
         if errors:
             print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
@@ -279,94 +402,46 @@ class BaseSchemaValidator:
         Validate that all .rels files properly reference files and that all files are referenced.
         """
         errors = []
+        index = self.package_index()
 
         # Find all .rels files
-        rels_files = list(self.unpacked_dir.rglob("*.rels"))
+        rels_names = [name for name in index.part_names if name.endswith(".rels")]
 
-        if not rels_files:
+        if not rels_names:
             if self.verbose:
                 print("PASSED - No .rels files found")
             return True
 
-        # Get all files in the unpacked directory (excluding reference files)
-        all_files = []
-        for file_path in self.unpacked_dir.rglob("*"):
-            if (
-                file_path.is_file()
-                and file_path.name != "[Content_Types].xml"
-                and not file_path.name.endswith(".rels")
-            ):  # This file is not referenced by .rels
-                all_files.append(file_path.resolve())
-
-        # Track all files that are referenced by any .rels file
-        all_referenced_files = set()
+        # Get all parts (excluding reference files, which are not referenced by .rels)
+        all_files = [
+            name
+            for name in index.part_names
+            if posixpath.basename(name) != "[Content_Types].xml"
+            and not name.endswith(".rels")
+        ]
 
         if self.verbose:
             print(
-                f"Found {len(rels_files)} .rels files and {len(all_files)} target files"
+                f"Found {len(rels_names)} .rels files and {len(all_files)} target files"
             )
 
-        # Check each .rels file
-        for rels_file in rels_files:
-            try:
-                # Parse relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-
-                # Get the directory where this .rels file is located
-                rels_dir = rels_file.parent
-
-                # Find all relationships and their targets
-                referenced_files = set()
-                broken_refs = []
-
-                for rel in rels_root.findall(
-                    ".//ns:Relationship",
-                    namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
-                ):
-                    target = rel.get("Target")
-                    if target and not target.startswith(
-                        ("http", "mailto:")
-                    ):  # Skip external URLs
-                        # Resolve the target path relative to the .rels file location
-                        if rels_file.name == ".rels":
-                            # Root .rels file - targets are relative to unpacked_dir
-                            target_path = self.unpacked_dir / target
-                        else:
-                            # Other .rels files - targets are relative to their parent's parent
-                            # e.g., word/_rels/document.xml.rels -> targets relative to word/
-                            base_dir = rels_dir.parent
-                            target_path = base_dir / target
-
-                        # Normalize the path and check if it exists
-                        try:
-                            target_path = target_path.resolve()
-                            if target_path.exists() and target_path.is_file():
-                                referenced_files.add(target_path)
-                                all_referenced_files.add(target_path)
-                            else:
-                                broken_refs.append((target, rel.sourceline))
-                        except (OSError, ValueError):
-                            broken_refs.append((target, rel.sourceline))
-
-                # Report broken references
-                if broken_refs:
-                    rel_path = rels_file.relative_to(self.unpacked_dir)
-                    for broken_ref, line_num in broken_refs:
-                        errors.append(
-                            f"  {rel_path}: Line {line_num}: Broken reference to {broken_ref}"
-                        )
+        # Check each .rels file; targets were resolved to part names by the index
+        for rels_name in rels_names:
+            if rels_name in index.rels_errors:
+                errors.append(f"  Error parsing {rels_name}: {index.rels_errors[rels_name]}")
+                continue
 
-            except Exception as e:
-                rel_path = rels_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error parsing {rel_path}: {e}")
+            # Report broken references
+            for rel in index.relationships[rels_name]:
+                if index.broken(rel):
+                    errors.append(
+                        f"  {rels_name}: Line {rel.line}: Broken reference to {rel.target}"
+                    )
 
         # Check for unreferenced files (files that exist but are not referenced anywhere)
-        unreferenced_files = set(all_files) - all_referenced_files
-
-        if unreferenced_files:
-            for unref_file in sorted(unreferenced_files):
-                unref_rel_path = unref_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Unreferenced file: {unref_rel_path}")
+        for name in all_files:
+            if name not in index.referenced:
+                errors.append(f"  Unreferenced file: {name}")
 
         if errors:
             print(f"FAILED - Found {len(errors)} relationship validation errors:")
@@ -390,87 +465,7 @@ class BaseSchemaValidator:
         Validate that all r:id attributes in XML files reference existing IDs
         in their corresponding .rels files, and optionally validate relationship types.
         """
-        import lxml.etree
-
-        errors = []
-
-        # Process each XML file that might contain r:id references
-        for xml_file in self.xml_files:
-            # Skip .rels files themselves
-            if xml_file.suffix == ".rels":
-                continue
-
-            # Determine the corresponding .rels file
-            # For dir/file.xml, it's dir/_rels/file.xml.rels
-            rels_dir = xml_file.parent / "_rels"
-            rels_file = rels_dir / f"{xml_file.name}.rels"
-
-            # Skip if there's no corresponding .rels file (that's okay)
-            if not rels_file.exists():
-                continue
-
-            try:
-                # Parse the .rels file to get valid relationship IDs and their types
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-                rid_to_type = {}
-
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
-                    if rid:
-                        # Check for duplicate rIds
-                        if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
-                            errors.append(
-                                f"  {rels_rel_path}: Line {rel.sourceline}: "
-                                f"Duplicate relationship ID '{rid}' (IDs must be unique)"
-                            )
-                        # Extract just the type name from the full URL
-                        type_name = (
-                            rel_type.split("/")[-1] if "/" in rel_type else rel_type
-                        )
-                        rid_to_type[rid] = type_name
-
-                # Parse the XML file to find all r:id references
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all elements with r:id attributes
-                for elem in xml_root.iter():
-                    # Check for r:id attribute (relationship ID)
-                    rid_attr = elem.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
-                    if rid_attr:
-                        xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                        elem_name = (
-                            elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
-                        )
-
-                        # Check if the ID exists
-                        if rid_attr not in rid_to_type:
-                            errors.append(
-                                f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                f"<{elem_name}> references non-existent relationship '{rid_attr}' "
-                                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
-                            )
-                        # Check if we have type expectations for this element
-                        elif self.ELEMENT_RELATIONSHIP_TYPES:
-                            expected_type = self._get_expected_relationship_type(
-                                elem_name
-                            )
-                            if expected_type:
-                                actual_type = rid_to_type[rid_attr]
-                                # Check if the actual type matches or contains the expected type
-                                if expected_type not in actual_type.lower():
-                                    errors.append(
-                                        f"  {xml_rel_path}: Line {elem.sourceline}: "
-                                        f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
-                                        f"but should point to a '{expected_type}' relationship"
-                                    )
-
-            except Exception as e:
-                xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error processing {xml_rel_path}: {e}")
+        errors = self._element_rule_errors(RelationshipIdRule.name)
 
         if errors:
             print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
@@ -524,32 +519,17 @@ class BaseSchemaValidator:
         errors = []
 
         # Find [Content_Types].xml file
-        content_types_file = self.unpacked_dir / "[Content_Types].xml"
-        if not content_types_file.exists():
+        index = self.package_index()
+        if "[Content_Types].xml" not in index.parts:
             print("FAILED - [Content_Types].xml file not found")
             return False
 
         try:
-            # Parse and get all declared parts and extensions
-            root = lxml.etree.parse(str(content_types_file)).getroot()
-            declared_parts = set()
-            declared_extensions = set()
-
-            # Get Override declarations (specific files)
-            for override in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Override"
-            ):
-                part_name = override.get("PartName")
-                if part_name is not None:
-                    declared_parts.add(part_name.lstrip("/"))
-
-            # Get Default declarations (by extension)
-            for default in root.findall(
-                f".//{{{self.CONTENT_TYPES_NAMESPACE}}}Default"
-            ):
-                extension = default.get("Extension")
-                if extension is not None:
-                    declared_extensions.add(extension.lower())
+            # Get all declared parts (Override) and extensions (Default)
+            if index.content_types_error is not None:
+                raise index.content_types_error
+            declared_parts = index.content_types.overrides.keys()
+            declared_extensions = index.content_types.defaults.keys()
 
             # Root elements that require content type declaration
             declarable_roots = {
@@ -575,10 +555,6 @@ class BaseSchemaValidator:
                 "emf": "image/x-emf",
             }
 
-            # Get all files in the unpacked directory
-            all_files = list(self.unpacked_dir.rglob("*"))
-            all_files = [f for f in all_files if f.is_file()]
-
             # Check all XML files for Override declarations
             for xml_file in self.xml_files:
                 path_str = str(xml_file.relative_to(self.unpacked_dir)).replace(
@@ -593,7 +569,7 @@ class BaseSchemaValidator:
                     continue
 
                 try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
+                    root_tag = self._parse(xml_file).getroot().tag
                     root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
 
                     if root_name in declarable_roots and path_str not in declared_parts:
@@ -605,22 +581,21 @@ class BaseSchemaValidator:
                     continue  # Skip unparseable files
 
             # Check all non-XML files for Default extension declarations
-            for file_path in all_files:
+            for part_name in index.part_names:
                 # Skip XML files and metadata files (already checked above)
-                if file_path.suffix.lower() in {".xml", ".rels"}:
-                    continue
-                if file_path.name == "[Content_Types].xml":
+                suffix = posixpath.splitext(part_name)[1].lower()
+                if suffix in {".xml", ".rels"}:
                     continue
-                if "_rels" in file_path.parts or "docProps" in file_path.parts:
+                folders = part_name.split("/")[:-1]
+                if "_rels" in folders or "docProps" in folders:
                     continue
 
-                extension = file_path.suffix.lstrip(".").lower()
+                extension = suffix.lstrip(".")
                 if extension and extension not in declared_extensions:
                     # Check if it's a known media extension that should be declared
                     if extension in media_extensions:
-                        relative_path = file_path.relative_to(self.unpacked_dir)
                         errors.append(
-                            f'  {relative_path}: File with extension \'{extension}\' not declared in [Content_Types].xml - should add: <Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>'
+                            f'  {part_name}: File with extension \'{extension}\' not declared in [Content_Types].xml - should add: <Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>'
                         )
 
         except Exception as e:
@@ -673,7 +648,7 @@ class BaseSchemaValidator:
             if verbose:
                 relative_path = xml_file.relative_to(unpacked_dir)
                 print(f"FAILED - {relative_path}: {len(new_errors)} new error(s)")
-                for error in list(new_errors)[:3]:
+                for error in sorted(new_errors)[:3]:
                     truncated = error[:250] + "..." if len(error) > 250 else error
                     print(f"  - {truncated}")
             return False, new_errors
@@ -685,18 +660,25 @@ class BaseSchemaValidator:
                 )
             return True, set()
 
-    def validate_against_xsd(self):
-        """Validate XML files against XSD schemas, showing only new errors compared to original."""
+    def validate_against_xsd(self, workers=None):
+        """Validate XML files against XSD schemas, showing only new errors compared to original.
+
+        Args:
+            workers: Processes to validate parts with (see _validate_files_against_xsd)
+        """
         new_errors = []
         original_error_count = 0
         valid_count = 0
         skipped_count = 0
+        unchanged_count = 0
 
+        results = self._validate_files_against_xsd(workers)
         for xml_file in self.xml_files:
             relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
+            if xml_file not in results:
+                unchanged_count += 1
+                continue
+            is_valid, new_file_errors = results[xml_file]
 
             if is_valid is None:
                 skipped_count += 1
@@ -712,16 +694,21 @@ class BaseSchemaValidator:
 
             # Has new errors
             new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  # Show first 3 errors
+            for error in sorted(new_file_errors)[:3]:  # Show first 3 errors
                 new_errors.append(
                     f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
                 )
 
+        if self.baseline_cache is not None:
+            self.baseline_cache.prune()
+
         # Print summary
         if self.verbose:
             print(f"Validated {len(self.xml_files)} files:")
             print(f"  - Valid: {valid_count}")
             print(f"  - Skipped (no schema): {skipped_count}")
+            if unchanged_count:
+                print(f"  - Unchanged from original (skipped): {unchanged_count}")
             if original_error_count:
                 print(f"  - With original errors (ignored): {original_error_count}")
             print(
@@ -738,6 +725,55 @@ class BaseSchemaValidator:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _validate_files_against_xsd(self, workers=None):
+        """Run validate_file_against_xsd() on every changed part; returns {xml_file: result}.
+
+        Parts are validated across a process pool when the parts that have
+        a schema are large (workers defaults to the CPU count then, 1
+        otherwise), largest parts first. Each worker builds its own
+        validator, so compiled schemas and parsed trees stay in the worker
+        and only part names and error sets cross process boundaries.
+        """
+        unchanged = self.unchanged_files()
+        xml_files = [xml_file for xml_file in self.xml_files if xml_file not in unchanged]
+        sizes = {
+            xml_file: xml_file.stat().st_size
+            for xml_file in xml_files
+            if self._get_schema_path(xml_file.relative_to(self.unpacked_dir))
+        }
+        if workers is None:
+            total_size = sum(sizes.values())
+            workers = (os.cpu_count() or 1) if total_size >= XSD_PARALLEL_MIN_BYTES else 1
+        workers = min(workers, len(sizes))
+
+        if workers <= 1:
+            return {
+                xml_file: self.validate_file_against_xsd(xml_file, verbose=False)
+                for xml_file in xml_files
+            }
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_xsd_worker,
+            initargs=(type(self), self.unpacked_dir, self.original_file),
+        ) as executor:
+            futures = {
+                xml_file: executor.submit(
+                    _validate_part_xsd, xml_file.relative_to(self.unpacked_dir).as_posix()
+                )
+                for xml_file in sorted(sizes, key=lambda xml_file: -sizes[xml_file])
+            }
+            results = {}
+            for xml_file, future in futures.items():
+                is_valid, new_file_errors, cache_writes = future.result()
+                results[xml_file] = (is_valid, new_file_errors)
+                if self.baseline_cache is not None:
+                    # Lets prune() see entries the workers added
+                    self.baseline_cache.written += cache_writes
+
+        # Parts without a schema are skipped, as in validate_file_against_xsd()
+        return {xml_file: results.get(xml_file, (None, set())) for xml_file in xml_files}
+
     def _get_schema_path(self, xml_file):
         """Determine the appropriate schema path for an XML file."""
         # Check exact filename match
@@ -762,96 +798,122 @@ class BaseSchemaValidator:
 
         return None
 
-    def _clean_ignorable_namespaces(self, xml_doc):
-        """Remove attributes and elements not in allowed namespaces."""
-        # Create a clean copy
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
+    @staticmethod
+    def load_schema(schema_path):
+        """Return the compiled XMLSchema for an XSD file, compiling it on first use.
 
-        # Remove attributes not in allowed namespaces
-        for elem in xml_copy.iter():
-            attrs_to_remove = []
+        Compiled schemas are cached for the life of the process and shared
+        by all validator instances.
 
-            for attr in elem.attrib:
-                # Check if attribute is from a namespace other than allowed ones
-                if "{" in attr:
-                    ns = attr.split("}")[0][1:]
-                    if ns not in self.OOXML_NAMESPACES:
-                        attrs_to_remove.append(attr)
-
-            # Remove collected attributes
-            for attr in attrs_to_remove:
-                del elem.attrib[attr]
-
-        # Remove elements not in allowed namespaces
-        self._remove_ignorable_elements(xml_copy)
-
-        return lxml.etree.ElementTree(xml_copy)
-
-    def _remove_ignorable_elements(self, root):
-        """Recursively remove all elements not in allowed namespaces."""
-        elements_to_remove = []
-
-        # Find elements to remove
-        for elem in list(root):
-            # Skip non-element nodes (comments, processing instructions, etc.)
-            if not hasattr(elem, "tag") or callable(elem.tag):
-                continue
-
-            tag_str = str(elem.tag)
-            if tag_str.startswith("{"):
-                ns = tag_str.split("}")[0][1:]
-                if ns not in self.OOXML_NAMESPACES:
-                    elements_to_remove.append(elem)
-                    continue
+        Raises:
+            lxml.etree.XMLSchemaParseError: If the schema does not compile
+                (raised again on every call without recompiling)
+        """
+        key = Path(schema_path).resolve()
+        if key not in _SCHEMA_CACHE:
+            try:
+                with open(key, "rb") as xsd_file:
+                    parser = lxml.etree.XMLParser()
+                    xsd_doc = lxml.etree.parse(
+                        xsd_file, parser=parser, base_url=str(key)
+                    )
+                _SCHEMA_CACHE[key] = lxml.etree.XMLSchema(xsd_doc)
+            except (OSError, lxml.etree.LxmlError) as e:
+                _SCHEMA_CACHE[key] = e
+        schema = _SCHEMA_CACHE[key]
+        if isinstance(schema, Exception):
+            raise schema
+        return schema
 
-            # Recursively clean child elements
-            self._remove_ignorable_elements(elem)
+    @classmethod
+    def preload_schemas(cls):
+        """Compile every schema in SCHEMA_MAPPINGS ahead of time.
 
-        # Remove collected elements
-        for elem in elements_to_remove:
-            root.remove(elem)
+        Long-running workers can call this once at startup so the first
+        validation does not pay for compiling the schemas.
 
-    def _preprocess_for_mc_ignorable(self, xml_doc):
-        """Preprocess XML to handle mc:Ignorable attribute properly."""
-        # Remove mc:Ignorable attributes before validation
-        root = xml_doc.getroot()
+        Returns:
+            int: Number of schemas that compiled successfully
+        """
+        compiled = 0
+        for schema_name in sorted(set(cls.SCHEMA_MAPPINGS.values())):
+            try:
+                cls.load_schema(SCHEMAS_DIR / schema_name)
+                compiled += 1
+            except (OSError, lxml.etree.LxmlError):
+                pass
+        return compiled
+
+    def _preprocess_for_xsd(self, xml_doc, clean_namespaces):
+        """Return a copy of a tree prepared for XSD validation.
+
+        The tree may be shared, so it is copied once and the copy is
+        transformed in a single pass:
+        - Template tags ({{ ... }}) are removed from text and tails, except
+          in text elements (w:t, a:t, ...)
+        - mc:Ignorable is removed from the root element
+        - If clean_namespaces, attributes and elements from namespaces other
+          than OOXML_NAMESPACES are removed
+        """
+        xml_copy = copy.deepcopy(xml_doc)
+        root = xml_copy.getroot()
+        root.attrib.pop(f"{{{self.MC_NAMESPACE}}}Ignorable", None)
 
-        # Remove mc:Ignorable attribute from root
-        if f"{{{self.MC_NAMESPACE}}}Ignorable" in root.attrib:
-            del root.attrib[f"{{{self.MC_NAMESPACE}}}Ignorable"]
+        foreign = {}  # Clark name -> whether its namespace is not allowed
 
-        return xml_doc
+        def is_foreign(name):
+            if name not in foreign:
+                foreign[name] = (
+                    name.startswith("{")
+                    and name[1:].split("}")[0] not in self.OOXML_NAMESPACES
+                )
+            return foreign[name]
+
+        removed = []
+        for elem in root.iter(lxml.etree.Element):
+            tag = elem.tag
+            if not (tag.endswith("}t") or tag == "t"):
+                if elem.text and "{{" in elem.text:
+                    elem.text = self.TEMPLATE_TAG_PATTERN.sub("", elem.text)
+                if elem.tail and "{{" in elem.tail:
+                    elem.tail = self.TEMPLATE_TAG_PATTERN.sub("", elem.tail)
+
+            if clean_namespaces:
+                for attr in [attr for attr in elem.attrib if is_foreign(attr)]:
+                    del elem.attrib[attr]
+                if elem is not root and is_foreign(tag):
+                    removed.append(elem)
+
+        # Removed afterwards so iteration is not disturbed; elements inside
+        # removed elements are removed from their (detached) parent
+        for elem in removed:
+            elem.getparent().remove(elem)
+
+        return xml_copy
 
     def _validate_single_file_xsd(self, xml_file, base_path):
         """Validate a single XML file against XSD schema. Returns (is_valid, errors_set)."""
-        schema_path = self._get_schema_path(xml_file)
+        relative_path = Path(xml_file).relative_to(base_path)
+        return self._validate_xsd(relative_path, lambda: self._parse(xml_file))
+
+    def _validate_xsd(self, relative_path, load_xml):
+        """Validate a part against XSD schema. Returns (is_valid, errors_set).
+
+        Args:
+            relative_path: Part path within the package, used to pick the schema
+            load_xml: Callable returning the part's parsed ElementTree
+        """
+        schema_path = self._get_schema_path(relative_path)
         if not schema_path:
             return None, None  # Skip file
 
         try:
-            # Load schema
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
-
-            # Load and preprocess XML
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
-
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
+            schema = self.load_schema(schema_path)
 
-            # Clean ignorable namespaces if needed
-            relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
+            # Load and preprocess XML (preprocessing copies, so a shared tree is not modified)
+            xml_doc = self._preprocess_for_xsd(
+                load_xml(), self._cleans_ignorable_namespaces(relative_path)
+            )
 
             # Validate
             if schema.validate(xml_doc):
@@ -866,85 +928,246 @@ class BaseSchemaValidator:
         except Exception as e:
             return False, {str(e)}
 
+    def _cleans_ignorable_namespaces(self, relative_path):
+        """Whether non-OOXML namespaces are removed from a part before XSD validation."""
+        return bool(
+            relative_path.parts and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
+        )
+
     def _get_original_file_errors(self, xml_file):
         """Get XSD validation errors from a single file in the original document.
 
+        Only that member is read from the original, in memory, and the result
+        is memoized by part name for the rest of the run.
+
         Args:
             xml_file: Path to the XML file in unpacked_dir to check
 
         Returns:
             set: Set of error messages from the original file
         """
-        import tempfile
-        import zipfile
-
         # Resolve both paths to handle symlinks (e.g., /var vs /private/var on macOS)
         xml_file = Path(xml_file).resolve()
         unpacked_dir = self.unpacked_dir.resolve()
         relative_path = xml_file.relative_to(unpacked_dir)
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
+        part_name = relative_path.as_posix()
+        if part_name not in self._original_errors:
+            self._original_errors[part_name] = self._compute_original_errors(
+                relative_path
+            )
+        return self._original_errors[part_name]
 
-            # Extract original file
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
+    def _compute_original_errors(self, relative_path):
+        """Validate one member of the original document, read in memory.
 
-            # Find corresponding file in original
-            original_xml_file = temp_path / relative_path
+        Results are looked up in and saved to the persistent baseline cache.
+        """
+        part_name = relative_path.as_posix()
+        if part_name not in self.original:
+            # File didn't exist in original, so no original errors
+            return set()
+
+        cache_key = None
+        schema_path = self._get_schema_path(relative_path)
+        if self.baseline_cache is not None and schema_path is not None:
+            cache_key = self.baseline_cache.key(
+                self.original.read(part_name),
+                schema_path,
+                self._cleans_ignorable_namespaces(relative_path),
+            )
+            errors = self.baseline_cache.get(cache_key)
+            if errors is not None:
+                return errors
 
-            if not original_xml_file.exists():
-                # File didn't exist in original, so no original errors
-                return set()
+        # Validate the specific file in original
+        is_valid, errors = self._validate_xsd(
+            relative_path, lambda: self.original.parse(part_name)
+        )
+        errors = errors if errors else set()
+        if cache_key is not None:
+            self.baseline_cache.put(cache_key, errors)
+        return errors
 
-            # Validate the specific file in original
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
 
-    def _remove_template_tags_from_text_nodes(self, xml_doc):
-        """Remove template tags from XML text nodes and collect warnings.
+def _condensed_content(data):
+    """XML as pack.py would write it, without the XML declaration."""
+    condensed = condense_xml_bytes(data)
+    if condensed.startswith(b"<?xml"):
+        condensed = condensed.split(b"?>", 1)[1]
+    return condensed
 
-        Template tags follow the pattern {{ ... }} and are used as placeholders
-        for content replacement. They should be removed from text content before
-        XSD validation while preserving XML structure.
 
-        Returns:
-            tuple: (cleaned_xml_doc, warnings_list)
-        """
-        warnings = []
-        template_pattern = re.compile(r"\{\{[^}]*\}\}")
-
-        # Create a copy of the document to avoid modifying the original
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
-
-        def process_text_content(text, content_type):
-            if not text:
-                return text
-            matches = list(template_pattern.finditer(text))
-            if matches:
-                for match in matches:
-                    warnings.append(
-                        f"Found template tag in {content_type}: {match.group()}"
-                    )
-                return template_pattern.sub("", text)
-            return text
+def _init_xsd_worker(validator_class, unpacked_dir, original_file):
+    """Create the validator an XSD worker process validates parts with."""
+    global _worker_validator
+    _worker_validator = validator_class(unpacked_dir, original_file)
 
-        # Process all text nodes in the document
-        for elem in xml_copy.iter():
-            # Skip processing if this is a w:t element
-            if not hasattr(elem, "tag") or callable(elem.tag):
-                continue
-            tag_str = str(elem.tag)
-            if tag_str.endswith("}t") or tag_str == "t":
-                continue
 
-            elem.text = process_text_content(elem.text, "text content")
-            elem.tail = process_text_content(elem.tail, "tail content")
+def _validate_part_xsd(part_name):
+    """Validate one part in an XSD worker.
+
+    Returns:
+        tuple: (is_valid, new_errors_set, baseline cache entries written)
+    """
+    validator = _worker_validator
+    cache = validator.baseline_cache
+    written = cache.written if cache is not None else 0
+    is_valid, new_errors = validator.validate_file_against_xsd(
+        validator.unpacked_dir / part_name
+    )
+    cache_writes = (cache.written - written) if cache is not None else 0
+    return is_valid, new_errors, cache_writes
+
+
+class UniqueIdRule(ElementRule):
+    """IDs listed in UNIQUE_ID_REQUIREMENTS must be unique per file or globally.
+
+    Elements inside mc:AlternateContent are ignored, since the choice and
+    fallback branches repeat the same IDs.
+    """
+
+    name = "unique_ids"
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.alternate_content = f"{{{validator.MC_NAMESPACE}}}AlternateContent"
+        self.scopes = (self.alternate_content,)
+        self.requirements = validator.UNIQUE_ID_REQUIREMENTS
+        self.local_names = LocalNames()
+        self.global_ids = {}  # Track globally unique IDs across all files
+        self.file_ids = {}
+
+    def start_file(self, xml_file, root):
+        self.path = self.relative_path(xml_file)
+        self.file_ids = {}  # Track IDs that must be unique within this file
+
+    def visit(self, elem, open_scopes):
+        if open_scopes.get(self.alternate_content):
+            return
+
+        # Check if this element type has ID uniqueness requirements
+        tag = self.local_names[elem.tag]
+        requirement = self.requirements.get(tag)
+        if requirement is None:
+            return
+        attr_name, scope = requirement
+
+        # Look for the specified attribute
+        id_value = None
+        for attr, value in elem.attrib.items():
+            if self.local_names[attr] == attr_name:
+                id_value = value
+                break
+        if id_value is None:
+            return
+
+        if scope == "global":
+            # Check global uniqueness
+            if id_value in self.global_ids:
+                prev_file, prev_line, prev_tag = self.global_ids[id_value]
+                self.errors.append(
+                    f"  {self.path}: "
+                    f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
+                    f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
+                )
+            else:
+                self.global_ids[id_value] = (self.path, elem.sourceline, tag)
+        elif scope == "file":
+            # Check file-level uniqueness
+            ids = self.file_ids.setdefault((tag, attr_name), {})
+            if id_value in ids:
+                self.errors.append(
+                    f"  {self.path}: "
+                    f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
+                    f"(first occurrence at line {ids[id_value]})"
+                )
+            else:
+                ids[id_value] = elem.sourceline
+
+
+class RelationshipIdRule(ElementRule):
+    """r:id attributes must name a relationship of the part's .rels file.
+
+    Where the validator expects a relationship type for an element
+    (ELEMENT_RELATIONSHIP_TYPES), the relationship must also be of that type.
+    """
+
+    name = "relationship_ids"
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.rid_attribute = f"{{{validator.OFFICE_RELATIONSHIPS_NAMESPACE}}}id"
+        self.relationship_tag = (
+            f"{{{validator.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+        )
+        self.element_names = {}
+        self.expected_types = {}
+
+    def applies_to(self, xml_file):
+        # Parts without a .rels file are skipped (that's okay)
+        return xml_file.suffix != ".rels" and self._rels_file(xml_file).exists()
+
+    def _rels_file(self, xml_file):
+        # For dir/file.xml, it's dir/_rels/file.xml.rels
+        return xml_file.parent / "_rels" / f"{xml_file.name}.rels"
+
+    def start_file(self, xml_file, root):
+        # Parse the .rels file to get valid relationship IDs and their types
+        rels_file = self._rels_file(xml_file)
+        rels_root = self.validator._parse(rels_file).getroot()
+        self.path = self.relative_path(xml_file)
+        self.rid_to_type = {}
+
+        for rel in rels_root.findall(f".//{self.relationship_tag}"):
+            rid = rel.get("Id")
+            rel_type = rel.get("Type", "")
+            if rid:
+                # Check for duplicate rIds
+                if rid in self.rid_to_type:
+                    self.errors.append(
+                        f"  {self.relative_path(rels_file)}: Line {rel.sourceline}: "
+                        f"Duplicate relationship ID '{rid}' (IDs must be unique)"
+                    )
+                # Extract just the type name from the full URL
+                type_name = rel_type.split("/")[-1] if "/" in rel_type else rel_type
+                self.rid_to_type[rid] = type_name
+
+    def visit(self, elem, open_scopes):
+        rid_attr = elem.get(self.rid_attribute)
+        if not rid_attr:
+            return
+        elem_name = self.element_names.get(elem.tag)
+        if elem_name is None:
+            elem_name = self.element_names[elem.tag] = elem.tag.split("}")[-1]
+
+        rid_to_type = self.rid_to_type
+        # Check if the ID exists
+        if rid_attr not in rid_to_type:
+            self.errors.append(
+                f"  {self.path}: Line {elem.sourceline}: "
+                f"<{elem_name}> references non-existent relationship '{rid_attr}' "
+                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
+            )
+        # Check if we have type expectations for this element
+        elif self.validator.ELEMENT_RELATIONSHIP_TYPES:
+            if elem_name not in self.expected_types:
+                self.expected_types[elem_name] = (
+                    self.validator._get_expected_relationship_type(elem_name)
+                )
+            expected_type = self.expected_types[elem_name]
+            if expected_type:
+                actual_type = rid_to_type[rid_attr]
+                # Check if the actual type matches or contains the expected type
+                if expected_type not in actual_type.lower():
+                    self.errors.append(
+                        f"  {self.path}: Line {elem.sourceline}: "
+                        f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
+                        f"but should point to a '{expected_type}' relationship"
+                    )
 
-        return lxml.etree.ElementTree(xml_copy), warnings
+    def file_error(self, xml_file, error):
+        self.errors.append(f"  Error processing {self.relative_path(xml_file)}: {error}")
 
 
 if __name__ == "__main__":
@@ -3,12 +3,9 @@ Validator for Word document XML files against XSD schemas.
 """
 
 import re
-import tempfile
-import zipfile
-
-import lxml.etree
 
 from .base import BaseSchemaValidator
+from .rules import ElementRule
 
 
 class DOCXSchemaValidator(BaseSchemaValidator):
@@ -21,51 +18,39 @@ class DOCXSchemaValidator(BaseSchemaValidator):
     # Start with empty mapping - add specific cases as we discover them
     ELEMENT_RELATIONSHIP_TYPES = {}
 
-    def validate(self):
-        """Run all validation checks and return True if all pass."""
-        # Test 0: XML well-formedness
-        if not self.validate_xml():
-            return False
-
-        # Test 1: Namespace declarations
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
-
-        # Test 2: Unique IDs
-        if not self.validate_unique_ids():
-            all_valid = False
-
-        # Test 3: Relationship and file reference validation
-        if not self.validate_file_references():
-            all_valid = False
-
-        # Test 4: Content type declarations
-        if not self.validate_content_types():
-            all_valid = False
-
-        # Test 5: XSD schema validation
-        if not self.validate_against_xsd():
-            all_valid = False
-
-        # Test 6: Whitespace preservation
-        if not self.validate_whitespace_preservation():
-            all_valid = False
-
-        # Test 7: Deletion validation
-        if not self.validate_deletions():
-            all_valid = False
-
-        # Test 8: Insertion validation
-        if not self.validate_insertions():
-            all_valid = False
-
-        # Test 9: Relationship ID reference validation
-        if not self.validate_all_relationship_ids():
-            all_valid = False
+    # Checks run by validate() after XML well-formedness, in report order,
+    # with their relative cost (element rule checks share one pass over the
+    # parts; XSD validation is the most expensive)
+    CHECKS = (
+        ("validate_namespaces", 0),
+        ("validate_unique_ids", 2),
+        ("validate_file_references", 1),
+        ("validate_content_types", 1),
+        ("validate_against_xsd", 3),
+        ("validate_whitespace_preservation", 2),
+        ("validate_deletions", 2),
+        ("validate_insertions", 2),
+        ("validate_all_relationship_ids", 2),
+    )
+
+    def element_rules(self):
+        """Element-level rules, run in a single pass over each part."""
+        return super().element_rules() + [
+            WhitespacePreservationRule(self),
+            DeletionRule(self),
+            InsertionRule(self),
+        ]
+
+    def validate(self, fail_fast=False, time_budget=None):
+        """Run all validation checks and return True if all pass.
+
+        See BaseSchemaValidator.validate() for fail_fast and time_budget.
+        """
+        all_valid = super().validate(fail_fast=fail_fast, time_budget=time_budget)
 
-        # Count and compare paragraphs
-        self.compare_paragraph_counts()
+        # Count and compare paragraphs, unless checks were cut short
+        if not self.skipped_checks:
+            self.compare_paragraph_counts()
 
         return all_valid
 
@@ -73,43 +58,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         """
         Validate that w:t elements with whitespace have xml:space='preserve'.
         """
-        errors = []
-
-        for xml_file in self.xml_files:
-            # Only check document.xml files
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all w:t elements
-                for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
-                    if elem.text:
-                        text = elem.text
-                        # Check if text starts or ends with whitespace
-                        if re.match(r"^\s.*", text) or re.match(r".*\s$", text):
-                            # Check if xml:space="preserve" attribute exists
-                            xml_space_attr = f"{{{self.XML_NAMESPACE}}}space"
-                            if (
-                                xml_space_attr not in elem.attrib
-                                or elem.attrib[xml_space_attr] != "preserve"
-                            ):
-                                # Show a preview of the text
-                                text_preview = (
-                                    repr(text)[:50] + "..."
-                                    if len(repr(text)) > 50
-                                    else repr(text)
-                                )
-                                errors.append(
-                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                    f"Line {elem.sourceline}: w:t element with whitespace missing xml:space='preserve': {text_preview}"
-                                )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors(WhitespacePreservationRule.name)
 
         if errors:
             print(f"FAILED - Found {len(errors)} whitespace preservation violations:")
@@ -126,39 +75,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         Validate that w:t elements are not within w:del elements.
         For some reason, XSD validation does not catch this, so we do it manually.
         """
-        errors = []
-
-        for xml_file in self.xml_files:
-            # Only check document.xml files
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Find all w:t elements that are descendants of w:del elements
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-                xpath_expression = ".//w:del//w:t"
-                problematic_t_elements = root.xpath(
-                    xpath_expression, namespaces=namespaces
-                )
-                for t_elem in problematic_t_elements:
-                    if t_elem.text:
-                        # Show a preview of the text
-                        text_preview = (
-                            repr(t_elem.text)[:50] + "..."
-                            if len(repr(t_elem.text)) > 50
-                            else repr(t_elem.text)
-                        )
-                        errors.append(
-                            f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                            f"Line {t_elem.sourceline}: <w:t> found within <w:del>: {text_preview}"
-                        )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors(DeletionRule.name)
 
         if errors:
             print(f"FAILED - Found {len(errors)} deletion validation violations:")
@@ -180,7 +97,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
+                root = self._parse(xml_file).getroot()
                 # Count all w:p elements
                 paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
                 count = len(paragraphs)
@@ -194,19 +111,12 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         count = 0
 
         try:
-            # Create temporary directory to unpack original
-            with tempfile.TemporaryDirectory() as temp_dir:
-                # Unpack original docx
-                with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
+            # Parse document.xml straight from the original package
+            root = self.original.parse("word/document.xml").getroot()
 
-                # Parse document.xml
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
-
-                # Count all w:p elements
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+            # Count all w:p elements
+            paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
+            count = len(paragraphs)
 
         except Exception as e:
             print(f"Error counting paragraphs in original document: {e}")
@@ -218,37 +128,7 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         Validate that w:delText elements are not within w:ins elements.
         w:delText is only allowed in w:ins if nested within a w:del.
         """
-        errors = []
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-                # Find w:delText in w:ins that are NOT within w:del
-                invalid_elements = root.xpath(
-                    ".//w:ins//w:delText[not(ancestor::w:del)]",
-                    namespaces=namespaces
-                )
-
-                for elem in invalid_elements:
-                    text_preview = (
-                        repr(elem.text or "")[:50] + "..."
-                        if len(repr(elem.text or "")) > 50
-                        else repr(elem.text or "")
-                    )
-                    errors.append(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Line {elem.sourceline}: <w:delText> within <w:ins>: {text_preview}"
-                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors(InsertionRule.name)
 
         if errors:
             print(f"FAILED - Found {len(errors)} insertion validation violations:")
@@ -270,5 +150,89 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         print(f"\nParagraphs: {original_count} → {new_count} ({diff_str})")
 
 
+def _text_preview(text):
+    """Show a preview of the text."""
+    return repr(text)[:50] + "..." if len(repr(text)) > 50 else repr(text)
+
+
+class _DocumentRule(ElementRule):
+    """Element rule that only checks document.xml files."""
+
+    incremental = True
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        w = validator.WORD_2006_NAMESPACE
+        self.t_tag = f"{{{w}}}t"
+        self.del_tag = f"{{{w}}}del"
+        self.ins_tag = f"{{{w}}}ins"
+        self.del_text_tag = f"{{{w}}}delText"
+
+    def applies_to(self, xml_file):
+        # Only check document.xml files
+        return xml_file.name == "document.xml"
+
+    def start_file(self, xml_file, root):
+        self.path = self.relative_path(xml_file)
+
+
+class WhitespacePreservationRule(_DocumentRule):
+    """w:t text with leading or trailing whitespace needs xml:space='preserve'."""
+
+    name = "whitespace_preservation"
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.tags = (self.t_tag,)
+        self.xml_space_attr = f"{{{validator.XML_NAMESPACE}}}space"
+
+    def visit(self, elem, open_scopes):
+        text = elem.text
+        # Check if text starts or ends with whitespace
+        if text and (re.match(r"^\s.*", text) or re.match(r".*\s$", text)):
+            # Check if xml:space="preserve" attribute exists
+            if elem.get(self.xml_space_attr) != "preserve":
+                self.errors.append(
+                    f"  {self.path}: "
+                    f"Line {elem.sourceline}: w:t element with whitespace missing xml:space='preserve': {_text_preview(text)}"
+                )
+
+
+class DeletionRule(_DocumentRule):
+    """w:t must not appear within w:del (deleted text uses w:delText)."""
+
+    name = "deletions"
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.tags = (self.t_tag,)
+        self.scopes = (self.del_tag,)
+
+    def visit(self, elem, open_scopes):
+        if open_scopes.get(self.del_tag) and elem.text:
+            self.errors.append(
+                f"  {self.path}: "
+                f"Line {elem.sourceline}: <w:t> found within <w:del>: {_text_preview(elem.text)}"
+            )
+
+
+class InsertionRule(_DocumentRule):
+    """w:delText within w:ins is only allowed inside a nested w:del."""
+
+    name = "insertions"
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.tags = (self.del_text_tag,)
+        self.scopes = (self.ins_tag, self.del_tag)
+
+    def visit(self, elem, open_scopes):
+        if open_scopes.get(self.ins_tag) and not open_scopes.get(self.del_tag):
+            self.errors.append(
+                f"  {self.path}: "
+                f"Line {elem.sourceline}: <w:delText> within <w:ins>: {_text_preview(elem.text or '')}"
+            )
+
+
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,80 @@
+"""
+Index of the parts, content types and relationships of an unpacked package.
+
+Reference and content type checks used to walk the unpacked directory and
+resolve every file and relationship target on disk. PackageIndex lists the
+directory once and resolves relationship targets to part names, so those
+checks become set operations over it.
+"""
+
+import os
+
+try:
+    from ..package import read_content_types, read_relationships, source_part_name
+    from ..unpack import MANIFEST_NAME
+except ImportError:
+    from package import read_content_types, read_relationships, source_part_name
+    from unpack import MANIFEST_NAME
+
+
+class PackageIndex:
+    """Part names, content types and relationships of an unpacked package.
+
+    Attributes:
+        part_names: Part names on disk or not yet extracted, sorted by path
+        parts: Set of part_names
+        content_types: ContentTypes of [Content_Types].xml, or None if it is
+            missing or could not be parsed (see content_types_error)
+        relationships: {.rels part name: [package.Relationship, ...]}
+        rels_errors: {.rels part name: exception raised parsing it}
+        referenced: Names of existing parts targeted by a relationship
+    """
+
+    def __init__(self, unpacked_dir, parse, pending=()):
+        """
+        Args:
+            unpacked_dir: Directory written by unpack.py
+            parse: Callable returning the (shared, read-only) ElementTree of a file
+            pending: Names of parts a lazy unpack has not extracted yet
+        """
+        self.unpacked_dir = unpacked_dir
+
+        names = set(pending)
+        for directory, _, files in os.walk(unpacked_dir):
+            prefix = os.path.relpath(directory, unpacked_dir).replace(os.sep, "/")
+            for file_name in files:
+                if not file_name.startswith(MANIFEST_NAME):
+                    names.add(file_name if prefix == "." else f"{prefix}/{file_name}")
+        self.parts = names
+        self.part_names = sorted(names, key=lambda name: name.split("/"))
+
+        self.content_types = None
+        self.content_types_error = None
+        if "[Content_Types].xml" in names:
+            try:
+                self.content_types = read_content_types(
+                    parse(unpacked_dir / "[Content_Types].xml").getroot()
+                )
+            except Exception as e:
+                self.content_types_error = e
+
+        self.relationships = {}
+        self.rels_errors = {}
+        self.referenced = set()
+        for name in self.part_names:
+            if not name.endswith(".rels"):
+                continue
+            try:
+                rels_root = parse(unpacked_dir / name).getroot()
+            except Exception as e:
+                self.rels_errors[name] = e
+                continue
+            relationships = read_relationships(source_part_name(name), rels_root)
+            self.relationships[name] = relationships
+            self.referenced.update(
+                rel.part for rel in relationships if rel.part in names
+            )
+
+    def broken(self, relationship):
+        """Whether an internal relationship targets a part that does not exist."""
+        return relationship.part is not None and relationship.part not in self.parts
@@ -5,6 +5,7 @@ Validator for PowerPoint presentation XML files against XSD schemas.
 import re
 
 from .base import BaseSchemaValidator
+from .rules import ElementRule, LocalNames
 
 
 class PPTXSchemaValidator(BaseSchemaValidator):
@@ -25,88 +26,29 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         "tablestyleid": "tablestyles",
     }
 
-    def validate(self):
-        """Run all validation checks and return True if all pass."""
-        # Test 0: XML well-formedness
-        if not self.validate_xml():
-            return False
-
-        # Test 1: Namespace declarations
-        all_valid = True
-        if not self.validate_namespaces():
-            all_valid = False
-
-        # Test 2: Unique IDs
-        if not self.validate_unique_ids():
-            all_valid = False
-
-        # Test 3: UUID ID validation
-        if not self.validate_uuid_ids():
-            all_valid = False
-
-        # Test 4: Relationship and file reference validation
-        if not self.validate_file_references():
-            all_valid = False
-
-        # Test 5: Slide layout ID validation
-        if not self.validate_slide_layout_ids():
-            all_valid = False
-
-        # Test 6: Content type declarations
-        if not self.validate_content_types():
-            all_valid = False
-
-        # Test 7: XSD schema validation
-        if not self.validate_against_xsd():
-            all_valid = False
-
-        # Test 8: Notes slide reference validation
-        if not self.validate_notes_slide_references():
-            all_valid = False
-
-        # Test 9: Relationship ID reference validation
-        if not self.validate_all_relationship_ids():
-            all_valid = False
-
-        # Test 10: Duplicate slide layout references validation
-        if not self.validate_no_duplicate_slide_layouts():
-            all_valid = False
+    # Checks run by validate() after XML well-formedness, in report order,
+    # with their relative cost (element rule checks share one pass over the
+    # parts; XSD validation is the most expensive)
+    CHECKS = (
+        ("validate_namespaces", 0),
+        ("validate_unique_ids", 2),
+        ("validate_uuid_ids", 2),
+        ("validate_file_references", 1),
+        ("validate_slide_layout_ids", 1),
+        ("validate_content_types", 1),
+        ("validate_against_xsd", 3),
+        ("validate_notes_slide_references", 1),
+        ("validate_all_relationship_ids", 2),
+        ("validate_no_duplicate_slide_layouts", 1),
+    )
 
-        return all_valid
+    def element_rules(self):
+        """Element-level rules, run in a single pass over each part."""
+        return super().element_rules() + [UuidIdRule(self)]
 
     def validate_uuid_ids(self):
         """Validate that ID attributes that look like UUIDs contain only hex values."""
-        import lxml.etree
-
-        errors = []
-        # UUID pattern: 8-4-4-4-12 hex digits with optional braces/hyphens
-        uuid_pattern = re.compile(
-            r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
-        )
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                # Check all elements for ID attributes
-                for elem in root.iter():
-                    for attr, value in elem.attrib.items():
-                        # Check if this is an ID attribute
-                        attr_name = attr.split("}")[-1].lower()
-                        if attr_name == "id" or attr_name.endswith("id"):
-                            # Check if value looks like a UUID (has the right length and pattern structure)
-                            if self._looks_like_uuid(value):
-                                # Validate that it contains only hex characters in the right positions
-                                if not uuid_pattern.match(value):
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: ID '{value}' appears to be a UUID but contains invalid hex characters"
-                                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors(UuidIdRule.name)
 
         if errors:
             print(f"FAILED - Found {len(errors)} UUID ID validation errors:")
@@ -142,7 +84,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         for slide_master in slide_masters:
             try:
                 # Parse the slide master file
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                root = self._parse(slide_master).getroot()
 
                 # Find the corresponding _rels file for this slide master
                 rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
@@ -155,7 +97,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                     continue
 
                 # Parse the relationships file
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self._parse(rels_file).getroot()
 
                 # Build a set of valid relationship IDs that point to slide layouts
                 valid_layout_rids = set()
@@ -209,7 +151,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self._parse(rels_file).getroot()
 
                 # Find all slideLayout relationships
                 layout_rels = [
@@ -258,7 +200,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         for rels_file in slide_rels_files:
             try:
                 # Parse the relationships file
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self._parse(rels_file).getroot()
 
                 # Find all notesSlide relationships
                 for rel in root.findall(
@@ -311,5 +253,43 @@ class PPTXSchemaValidator(BaseSchemaValidator):
             return True
 
 
+class UuidIdRule(ElementRule):
+    """ID attributes whose values look like UUIDs must be valid hex UUIDs."""
+
+    name = "uuid_ids"
+    incremental = True
+
+    # UUID pattern: 8-4-4-4-12 hex digits with optional braces/hyphens
+    UUID_PATTERN = re.compile(
+        r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
+    )
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.local_names = LocalNames()
+        self.id_attributes = {}  # Clark name -> whether it is an ID attribute
+
+    def start_file(self, xml_file, root):
+        self.path = self.relative_path(xml_file)
+
+    def visit(self, elem, open_scopes):
+        for attr, value in elem.attrib.items():
+            # Check if this is an ID attribute
+            is_id = self.id_attributes.get(attr)
+            if is_id is None:
+                attr_name = self.local_names[attr]
+                is_id = self.id_attributes[attr] = attr_name == "id" or attr_name.endswith("id")
+            # Check if value looks like a UUID and contains only hex characters in the right positions
+            if (
+                is_id
+                and self.validator._looks_like_uuid(value)
+                and not self.UUID_PATTERN.match(value)
+            ):
+                self.errors.append(
+                    f"  {self.path}: "
+                    f"Line {elem.sourceline}: ID '{value}' appears to be a UUID but contains invalid hex characters"
+                )
+
+
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
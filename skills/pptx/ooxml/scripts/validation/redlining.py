@@ -4,9 +4,15 @@ Validator for tracked changes in Word documents.
 
 import subprocess
 import tempfile
-import zipfile
 from pathlib import Path
 
+try:
+    from ..package import OOXMLPackage
+    from ..unpack import extract_part
+except ImportError:
+    from package import OOXMLPackage
+    from unpack import extract_part
+
 
 class RedliningValidator:
     """Validator for tracked changes in Word documents."""
@@ -22,7 +28,7 @@ class RedliningValidator:
     def validate(self):
         """Main validation method that returns True if valid, False otherwise."""
         # Verify unpacked directory exists and has correct structure
-        modified_file = self.unpacked_dir / "word" / "document.xml"
+        modified_file = extract_part(self.unpacked_dir, "word/document.xml")
         if not modified_file.exists():
             print(f"FAILED - Modified document.xml not found at {modified_file}")
             return False
@@ -60,56 +66,49 @@ class RedliningValidator:
             # If we can't parse the XML, continue with full validation
             pass
 
-        # Create temporary directory for unpacking original docx
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            # Unpack original docx
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"FAILED - Error unpacking original docx: {e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
-                print(
-                    f"FAILED - Original document.xml not found in {self.original_docx}"
-                )
-                return False
-
-            # Parse both XML files using xml.etree.ElementTree for redlining validation
-            try:
-                import xml.etree.ElementTree as ET
-
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
-            except ET.ParseError as e:
-                print(f"FAILED - Error parsing XML files: {e}")
-                return False
-
-            # Remove Claude's tracked changes from both documents
-            self._remove_claude_tracked_changes(original_root)
-            self._remove_claude_tracked_changes(modified_root)
-
-            # Extract and compare text content
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
-
-            if modified_text != original_text:
-                # Show detailed character-level differences for each paragraph
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
-                )
-                print(error_message)
-                return False
+        # Read only document.xml from the original docx
+        try:
+            with OOXMLPackage(self.original_docx) as original:
+                if "word/document.xml" not in original:
+                    print(
+                        f"FAILED - Original document.xml not found in {self.original_docx}"
+                    )
+                    return False
+                original_xml = original.read("word/document.xml")
+        except Exception as e:
+            print(f"FAILED - Error reading original docx: {e}")
+            return False
+
+        # Parse both XML files using xml.etree.ElementTree for redlining validation
+        try:
+            import xml.etree.ElementTree as ET
+
+            modified_tree = ET.parse(modified_file)
+            modified_root = modified_tree.getroot()
+            original_root = ET.fromstring(original_xml)
+        except ET.ParseError as e:
+            print(f"FAILED - Error parsing XML files: {e}")
+            return False
+
+        # Remove Claude's tracked changes from both documents
+        self._remove_claude_tracked_changes(original_root)
+        self._remove_claude_tracked_changes(modified_root)
+
+        # Extract and compare text content
+        modified_text = self._extract_text_content(modified_root)
+        original_text = self._extract_text_content(original_root)
+
+        if modified_text != original_text:
+            # Show detailed character-level differences for each paragraph
+            error_message = self._generate_detailed_diff(
+                original_text, modified_text
+            )
+            print(error_message)
+            return False
 
-            if self.verbose:
-                print("PASSED - All changes by Claude are properly tracked")
-            return True
+        if self.verbose:
+            print("PASSED - All changes by Claude are properly tracked")
+        return True
 
     def _generate_detailed_diff(self, original_text, modified_text):
         """Generate detailed word-level differences using git word diff."""
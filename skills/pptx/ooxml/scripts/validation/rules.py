@@ -0,0 +1,151 @@
+"""
+Single-pass engine for element-level validation rules.
+
+Element-level checks (unique IDs, relationship ID references, whitespace
+preservation, ...) are written as ElementRule subclasses. RuleWalker walks
+each part once and calls every rule that applies to the part for each
+element, instead of every check walking every part on its own. Validators
+keep one validate_* method per check, which prints the errors its rule
+collected.
+"""
+
+from collections import defaultdict
+
+import lxml.etree
+
+
+class LocalNames(dict):
+    """Lower-case local names of Clark names ({uri}local), computed once per name."""
+
+    def __missing__(self, name):
+        local = name.split("}")[-1].lower()
+        self[name] = local
+        return local
+
+
+class ElementRule:
+    """An element-level check whose errors are collected across all parts.
+
+    Subclasses set name, and optionally tags (Clark names of the elements
+    to visit; None visits every element) and scopes (Clark names of
+    elements whose open count is passed to visit(), for "inside a w:del"
+    style conditions).
+
+    Rules whose errors in a part depend on nothing but that part set
+    incremental, so parts unchanged from the original are not checked.
+    """
+
+    name = None
+    tags = None
+    scopes = ()
+    incremental = False
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.errors = []
+
+    def relative_path(self, xml_file):
+        return xml_file.relative_to(self.validator.unpacked_dir)
+
+    def applies_to(self, xml_file):
+        """Whether the rule checks this part."""
+        return True
+
+    def start_file(self, xml_file, root):
+        """Prepare for a part; an exception skips the part with file_error()."""
+
+    def visit(self, elem, open_scopes):
+        """Check one element; open_scopes maps each scope tag to its open count."""
+        raise NotImplementedError
+
+    def file_error(self, xml_file, error):
+        """Record that a part could not be checked."""
+        self.errors.append(f"  {self.relative_path(xml_file)}: Error: {error}")
+
+
+class RuleWalker:
+    """Runs element rules over parts with one traversal per part."""
+
+    def __init__(self, rules, parse, unchanged=()):
+        """
+        Args:
+            rules: ElementRule instances
+            parse: Callable returning the (shared, read-only) ElementTree of a file
+            unchanged: Files unchanged from the original, skipped by incremental rules
+        """
+        self.rules = rules
+        self.parse = parse
+        self.unchanged = unchanged
+
+    def run(self, xml_files):
+        """Walk every part, in order, and return {rule name: rule}."""
+        for xml_file in xml_files:
+            unchanged = xml_file in self.unchanged
+            rules = [
+                rule
+                for rule in self.rules
+                if not (rule.incremental and unchanged) and rule.applies_to(xml_file)
+            ]
+            if not rules:
+                continue
+
+            try:
+                root = self.parse(xml_file).getroot()
+            except Exception as e:
+                for rule in rules:
+                    rule.file_error(xml_file, e)
+                continue
+
+            active = []
+            for rule in rules:
+                try:
+                    rule.start_file(xml_file, root)
+                    active.append(rule)
+                except Exception as e:
+                    rule.file_error(xml_file, e)
+
+            try:
+                self._walk(root, active)
+            except Exception as e:
+                for rule in active:
+                    rule.file_error(xml_file, e)
+
+        return {rule.name: rule for rule in self.rules}
+
+    def _walk(self, root, rules):
+        every = [rule.visit for rule in rules if rule.tags is None]
+        by_tag = defaultdict(list)
+        for rule in rules:
+            for tag in rule.tags or ():
+                by_tag[tag].append(rule.visit)
+
+        # Only track scopes that occur in this part; without any, a plain
+        # iteration is much cheaper than start/end events
+        open_scopes = {
+            tag: 0
+            for rule in rules
+            for tag in rule.scopes
+            if next(root.iter(tag), None) is not None
+        }
+
+        if not open_scopes:
+            for elem in root.iter(lxml.etree.Element):
+                for visit in every:
+                    visit(elem, open_scopes)
+                for visit in by_tag.get(elem.tag, ()):
+                    visit(elem, open_scopes)
+            return
+
+        # Scope elements count as open while they are visited themselves
+        for event, elem in lxml.etree.iterwalk(root, events=("start", "end")):
+            tag = elem.tag
+            if event == "end":
+                if tag in open_scopes:
+                    open_scopes[tag] -= 1
+                continue
+            if tag in open_scopes:
+                open_scopes[tag] += 1
+            for visit in every:
+                visit(elem, open_scopes)
+            for visit in by_tag.get(tag, ()):
+                visit(elem, open_scopes)
@@ -12,6 +12,12 @@ Output:
 - Single grid: {prefix}.jpg (if slides fit in one grid)
 - Multiple grids: {prefix}-1.jpg, {prefix}-2.jpg, etc.
 
+Optionally also writes web-ready outputs for the editor UI:
+- Per-slide thumbnails: {prefix}-slide-N.{ext} (--slides)
+- Sprite sheet(s): {prefix}-sprite.{ext} plus {prefix}-sprite.json (--sprite)
+  The JSON index lists each slide's cell coordinates, hidden flag and
+  content hash so clients can fetch one image and crop it themselves.
+
 Grid limits by column count:
 - 3 cols: max 12 slides per grid (3×4)
 - 4 cols: max 20 slides per grid (4×5)
@@ -20,6 +26,7 @@ Grid limits by column count:
 
 Usage:
     python thumbnail.py input.pptx [output_prefix] [--cols N] [--outline-placeholders]
+                        [--slides] [--sprite] [--image-format {jpg,webp,avif}]
 
 Examples:
     python thumbnail.py presentation.pptx
@@ -38,17 +45,26 @@ Examples:
 
     python thumbnail.py template.pptx analysis --outline-placeholders
     # Creates thumbnail grids with red outlines around text placeholders
+
+    python thumbnail.py deck.pptx web/deck --sprite --slides --image-format avif
+    # Creates: web/deck.jpg, web/deck-sprite.avif, web/deck-sprite.json,
+    #          web/deck-slide-0.avif, web/deck-slide-1.avif, ...
 """
 
 import argparse
+import hashlib
+import json
+import posixpath
 import subprocess
 import sys
 import tempfile
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 
-from inventory import extract_text_inventory
-from PIL import Image, ImageDraw, ImageFont
-from pptx import Presentation
+import lxml.etree
+from PIL import Image, ImageDraw, ImageFont, features
 
 # Constants
 THUMBNAIL_WIDTH = 300  # Fixed thumbnail width in pixels
@@ -56,6 +72,9 @@ CONVERSION_DPI = 100  # DPI for PDF to image conversion
 MAX_COLS = 6  # Maximum number of columns
 DEFAULT_COLS = 5  # Default number of columns
 JPEG_QUALITY = 95  # JPEG compression quality
+WEB_QUALITY = 80  # WebP/AVIF compression quality
+IMAGE_FORMATS = {"jpg": "JPEG", "webp": "WEBP", "avif": "AVIF"}  # Extension -> PIL format
+MAX_SPRITE_DIMENSION = 16383  # Largest image dimension WebP can encode
 
 # Grid layout constants
 GRID_PADDING = 20  # Padding between thumbnails
@@ -63,6 +82,24 @@ BORDER_WIDTH = 2  # Border width around thumbnails
 FONT_SIZE_RATIO = 0.12  # Font size as fraction of thumbnail width
 LABEL_PADDING_RATIO = 0.4  # Label padding as fraction of font size
 
+# Slide XML constants
+EMU_PER_INCH = 914400
+DEFAULT_SLIDE_SIZE = (9144000, 5143500)  # 16:9 in EMUs, used if sldSz is missing
+NAMESPACES = {
+    "p": "http://schemas.openxmlformats.org/presentationml/2006/main",
+    "a": "http://schemas.openxmlformats.org/drawingml/2006/main",
+    "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
+    "rel": "http://schemas.openxmlformats.org/package/2006/relationships",
+}
+# Layout placeholder type -> master placeholder type it inherits position from
+MASTER_PLACEHOLDER_TYPES = {
+    "ctrTitle": "title",
+    "title": "title",
+    "dt": "dt",
+    "ftr": "ftr",
+    "sldNum": "sldNum",
+}
+
 
 def main():
     parser = argparse.ArgumentParser(
@@ -86,6 +123,22 @@ def main():
         action="store_true",
         help="Outline text placeholders with a colored border",
     )
+    parser.add_argument(
+        "--slides",
+        action="store_true",
+        help="Also write one thumbnail per slide (prefix-slide-N.ext)",
+    )
+    parser.add_argument(
+        "--sprite",
+        action="store_true",
+        help="Also write sprite sheet(s) with a JSON index (prefix-sprite.ext/.json)",
+    )
+    parser.add_argument(
+        "--image-format",
+        choices=sorted(IMAGE_FORMATS),
+        default="webp",
+        help="Image format for --slides and --sprite outputs (default: webp)",
+    )
 
     args = parser.parse_args()
 
@@ -100,6 +153,11 @@ def main():
         print(f"Error: Invalid PowerPoint file: {args.input}")
         sys.exit(1)
 
+    # Validate image format support in this Pillow build
+    if (args.slides or args.sprite) and not features.check(args.image_format):
+        print(f"Error: Pillow was built without {args.image_format} support")
+        sys.exit(1)
+
     # Construct output path (always JPG)
     output_path = Path(f"{args.output_prefix}.jpg")
 
@@ -107,23 +165,23 @@ def main():
 
     try:
         with tempfile.TemporaryDirectory() as temp_dir:
-            # Get placeholder regions if outlining is enabled
+            # Convert slides to images (the deck is analyzed while LibreOffice renders)
+            slide_images, analysis = convert_to_images(
+                input_path, Path(temp_dir), CONVERSION_DPI
+            )
+            if not slide_images:
+                print("Error: No slides found")
+                sys.exit(1)
+
+            # Use text regions only if outlining is enabled
             placeholder_regions = None
             slide_dimensions = None
             if args.outline_placeholders:
-                print("Extracting placeholder regions...")
-                placeholder_regions, slide_dimensions = get_placeholder_regions(
-                    input_path
-                )
+                placeholder_regions = analysis.text_regions
+                slide_dimensions = analysis.slide_dimensions
                 if placeholder_regions:
                     print(f"Found placeholders on {len(placeholder_regions)} slides")
 
-            # Convert slides to images
-            slide_images = convert_to_images(input_path, Path(temp_dir), CONVERSION_DPI)
-            if not slide_images:
-                print("Error: No slides found")
-                sys.exit(1)
-
             print(f"Found {len(slide_images)} slides")
 
             # Create grids (max cols×(cols+1) images per grid)
@@ -141,6 +199,33 @@ def main():
             for grid_file in grid_files:
                 print(f"  - {grid_file}")
 
+            if args.slides:
+                slide_files = create_slide_thumbnails(
+                    slide_images,
+                    THUMBNAIL_WIDTH,
+                    output_path,
+                    args.image_format,
+                    placeholder_regions,
+                    slide_dimensions,
+                )
+                print(f"Created {len(slide_files)} slide thumbnail(s)")
+
+            if args.sprite:
+                sprite_files, index_file = create_sprites(
+                    slide_images,
+                    cols,
+                    THUMBNAIL_WIDTH,
+                    output_path,
+                    args.image_format,
+                    analysis.hidden_slides,
+                    placeholder_regions,
+                    slide_dimensions,
+                )
+                print(f"Created {len(sprite_files)} sprite sheet(s):")
+                for sprite_file in sprite_files:
+                    print(f"  - {sprite_file}")
+                print(f"Sprite index: {index_file}")
+
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
@@ -156,62 +241,291 @@ def create_hidden_slide_placeholder(size):
     return img
 
 
-def get_placeholder_regions(pptx_path):
-    """Extract ALL text regions from the presentation.
+@dataclass
+class PresentationAnalysis:
+    """Slide metadata read from the presentation XML in a single pass."""
+
+    total_slides: int
+    hidden_slides: set = field(default_factory=set)  # 1-based slide numbers
+    slide_dimensions: tuple = (0.0, 0.0)  # (width_inches, height_inches)
+    text_regions: dict = field(default_factory=dict)  # slide index -> regions
 
-    Returns a tuple of (placeholder_regions, slide_dimensions).
-    text_regions is a dict mapping slide indices to lists of text regions.
-    Each region is a dict with 'left', 'top', 'width', 'height' in inches.
-    slide_dimensions is a tuple of (width_inches, height_inches).
+
+def analyze_presentation(pptx_path):
+    """Read hidden flags, slide size and text regions straight from the slide XML.
+
+    The package is opened once and only presentation, slide, layout and master
+    parts are parsed; no text measurement or python-pptx object model is built.
+    Text regions are the boxes of shapes with visible text (excluding slide
+    numbers and numeric footers), with group transforms and placeholder
+    positions inherited from layouts and masters resolved. Each region is a
+    dict with 'left', 'top', 'width', 'height' in inches.
     """
-    prs = Presentation(str(pptx_path))
-    inventory = extract_text_inventory(pptx_path, prs)
-    placeholder_regions = {}
-
-    # Get actual slide dimensions in inches (EMU to inches conversion)
-    slide_width_inches = (prs.slide_width or 9144000) / 914400.0
-    slide_height_inches = (prs.slide_height or 5143500) / 914400.0
-
-    for slide_key, shapes in inventory.items():
-        # Extract slide index from "slide-N" format
-        slide_idx = int(slide_key.split("-")[1])
-        regions = []
-
-        for shape_key, shape_data in shapes.items():
-            # The inventory only contains shapes with text, so all shapes should be highlighted
-            regions.append(
-                {
-                    "left": shape_data.left,
-                    "top": shape_data.top,
-                    "width": shape_data.width,
-                    "height": shape_data.height,
-                }
+    parser = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+
+    with zipfile.ZipFile(pptx_path) as zf:
+        parts = {}
+
+        def load(part_name):
+            if part_name not in parts:
+                try:
+                    parts[part_name] = lxml.etree.fromstring(
+                        zf.read(part_name), parser
+                    )
+                except KeyError:
+                    parts[part_name] = None
+            return parts[part_name]
+
+        def related(part_name, rel_type=None, rid=None):
+            """Resolve relationship targets of a part, by type or by r:id."""
+            rels_name = posixpath.join(
+                posixpath.dirname(part_name),
+                "_rels",
+                posixpath.basename(part_name) + ".rels",
+            )
+            rels = load(rels_name)
+            if rels is None:
+                return []
+            targets = []
+            for rel in rels.iterfind("rel:Relationship", NAMESPACES):
+                if rel.get("TargetMode") == "External":
+                    continue
+                if rid is not None and rel.get("Id") != rid:
+                    continue
+                if rel_type is not None and not rel.get("Type", "").endswith(
+                    "/" + rel_type
+                ):
+                    continue
+                target = rel.get("Target", "")
+                if target.startswith("/"):
+                    targets.append(target.lstrip("/"))
+                else:
+                    targets.append(
+                        posixpath.normpath(
+                            posixpath.join(posixpath.dirname(part_name), target)
+                        )
+                    )
+            return targets
+
+        presentation = load("ppt/presentation.xml")
+        if presentation is None:
+            raise RuntimeError("ppt/presentation.xml not found")
+
+        sld_sz = presentation.find("p:sldSz", NAMESPACES)
+        slide_width = int(sld_sz.get("cx")) if sld_sz is not None else 0
+        slide_height = int(sld_sz.get("cy")) if sld_sz is not None else 0
+        analysis = PresentationAnalysis(
+            total_slides=0,
+            slide_dimensions=(
+                (slide_width or DEFAULT_SLIDE_SIZE[0]) / EMU_PER_INCH,
+                (slide_height or DEFAULT_SLIDE_SIZE[1]) / EMU_PER_INCH,
+            ),
+        )
+
+        slide_ids = presentation.findall("p:sldIdLst/p:sldId", NAMESPACES)
+        for slide_idx, sld_id in enumerate(slide_ids):
+            analysis.total_slides += 1
+            targets = related(
+                "ppt/presentation.xml", rid=sld_id.get(f"{{{NAMESPACES['r']}}}id")
+            )
+            slide = load(targets[0]) if targets else None
+            if slide is None:
+                continue
+
+            if slide.get("show") == "0":
+                analysis.hidden_slides.add(slide_idx + 1)
+
+            layout_name = next(iter(related(targets[0], "slideLayout")), None)
+            master_name = (
+                next(iter(related(layout_name, "slideMaster")), None)
+                if layout_name
+                else None
             )
 
-        if regions:
-            placeholder_regions[slide_idx] = regions
+            regions = []
+            sp_tree = slide.find("p:cSld/p:spTree", NAMESPACES)
+            if sp_tree is not None:
+                _collect_text_regions(
+                    sp_tree,
+                    (1.0, 1.0, 0.0, 0.0),
+                    lambda name: load(name) if name else None,
+                    layout_name,
+                    master_name,
+                    regions,
+                )
+            if regions:
+                analysis.text_regions[slide_idx] = regions
 
-    return placeholder_regions, (slide_width_inches, slide_height_inches)
+    return analysis
+
+
+def _collect_text_regions(tree, transform, load, layout_name, master_name, regions):
+    """Append the boxes of text shapes under a p:spTree or p:grpSp to regions.
+
+    transform is (scale_x, scale_y, offset_x, offset_y) mapping the container's
+    child coordinates to slide EMUs.
+    """
+    scale_x, scale_y, offset_x, offset_y = transform
+
+    for shape in tree:
+        if shape.tag == f"{{{NAMESPACES['p']}}}grpSp":
+            xfrm = shape.find("p:grpSpPr/a:xfrm", NAMESPACES)
+            box = _xfrm_box(xfrm)
+            # A group without a transform places its children as they are
+            group_transform = transform
+            if box is not None:
+                child_off = xfrm.find("a:chOff", NAMESPACES)
+                child_ext = xfrm.find("a:chExt", NAMESPACES)
+                ch_x = int(child_off.get("x", 0)) if child_off is not None else box[0]
+                ch_y = int(child_off.get("y", 0)) if child_off is not None else box[1]
+                ch_cx = int(child_ext.get("cx", 0)) if child_ext is not None else 0
+                ch_cy = int(child_ext.get("cy", 0)) if child_ext is not None else 0
+                group_sx = box[2] / ch_cx if ch_cx else 1.0
+                group_sy = box[3] / ch_cy if ch_cy else 1.0
+                group_transform = (
+                    scale_x * group_sx,
+                    scale_y * group_sy,
+                    offset_x + scale_x * (box[0] - ch_x * group_sx),
+                    offset_y + scale_y * (box[1] - ch_y * group_sy),
+                )
+            _collect_text_regions(
+                shape,
+                group_transform,
+                load,
+                layout_name,
+                master_name,
+                regions,
+            )
+            continue
+
+        if shape.tag != f"{{{NAMESPACES['p']}}}sp":
+            continue
+
+        tx_body = shape.find("p:txBody", NAMESPACES)
+        if tx_body is None:
+            continue
+        text = "".join(t.text or "" for t in tx_body.iterfind(".//a:t", NAMESPACES))
+        text = text.strip()
+        if not text:
+            continue
+
+        # Skip slide numbers and numeric footers
+        ph = shape.find("p:nvSpPr/p:nvPr/p:ph", NAMESPACES)
+        if ph is not None:
+            ph_type = ph.get("type", "obj")
+            if ph_type == "sldNum" or (ph_type == "ftr" and text.isdigit()):
+                continue
+
+        box = _xfrm_box(shape.find("p:spPr/a:xfrm", NAMESPACES))
+        if box is None and ph is not None:
+            box = _inherited_placeholder_box(ph, load, layout_name, master_name)
+        if box is None:
+            continue
+
+        left, top, width, height = box
+        regions.append(
+            {
+                "left": (offset_x + left * scale_x) / EMU_PER_INCH,
+                "top": (offset_y + top * scale_y) / EMU_PER_INCH,
+                "width": width * scale_x / EMU_PER_INCH,
+                "height": height * scale_y / EMU_PER_INCH,
+            }
+        )
+
+
+def _xfrm_box(xfrm):
+    """Return (x, y, cx, cy) in EMUs from an a:xfrm element, or None."""
+    if xfrm is None:
+        return None
+    off = xfrm.find("a:off", NAMESPACES)
+    ext = xfrm.find("a:ext", NAMESPACES)
+    if off is None or ext is None:
+        return None
+    return (
+        int(off.get("x", 0)),
+        int(off.get("y", 0)),
+        int(ext.get("cx", 0)),
+        int(ext.get("cy", 0)),
+    )
+
+
+def _inherited_placeholder_box(ph, load, layout_name, master_name):
+    """Find a placeholder's position on its layout (by idx), then master (by type)."""
+    layout = load(layout_name)
+    if layout is None:
+        return None
+
+    idx = ph.get("idx", "0")
+    for layout_ph in layout.iterfind(".//p:sp/p:nvSpPr/p:nvPr/p:ph", NAMESPACES):
+        if layout_ph.get("idx", "0") != idx:
+            continue
+        layout_sp = layout_ph.getparent().getparent().getparent()
+        box = _xfrm_box(layout_sp.find("p:spPr/a:xfrm", NAMESPACES))
+        if box is not None:
+            return box
+
+        master = load(master_name)
+        if master is None:
+            return None
+        master_type = MASTER_PLACEHOLDER_TYPES.get(layout_ph.get("type", "obj"), "body")
+        for master_ph in master.iterfind(".//p:sp/p:nvSpPr/p:nvPr/p:ph", NAMESPACES):
+            if master_ph.get("type", "obj") == master_type:
+                master_sp = master_ph.getparent().getparent().getparent()
+                return _xfrm_box(master_sp.find("p:spPr/a:xfrm", NAMESPACES))
+        return None
+
+    return None
 
 
 def convert_to_images(pptx_path, temp_dir, dpi):
-    """Convert PowerPoint to images via PDF, handling hidden slides."""
-    # Detect hidden slides
-    print("Analyzing presentation...")
-    prs = Presentation(str(pptx_path))
-    total_slides = len(prs.slides)
-
-    # Find hidden slides (1-based indexing for display)
-    hidden_slides = {
-        idx + 1
-        for idx, slide in enumerate(prs.slides)
-        if slide.element.get("show") == "0"
-    }
+    """Convert PowerPoint to images via PDF, handling hidden slides.
 
+    The presentation is analyzed in a background thread while LibreOffice
+    renders it, so reading the slide XML costs no extra wall time.
+
+    Returns a tuple of (image_paths, analysis) where analysis is the
+    PresentationAnalysis of the deck.
+    """
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        analysis_future = executor.submit(analyze_presentation, pptx_path)
+        visible_images = render_slide_images(pptx_path, temp_dir, dpi)
+        analysis = analysis_future.result()
+
+    total_slides = analysis.total_slides
+    hidden_slides = analysis.hidden_slides
     print(f"Total slides: {total_slides}")
     if hidden_slides:
         print(f"Hidden slides: {sorted(hidden_slides)}")
 
+    # Create full list with placeholders for hidden slides
+    all_images = []
+    visible_idx = 0
+
+    # Get placeholder dimensions from first visible slide
+    if visible_images:
+        with Image.open(visible_images[0]) as img:
+            placeholder_size = img.size
+    else:
+        placeholder_size = (1920, 1080)
+
+    for slide_num in range(1, total_slides + 1):
+        if slide_num in hidden_slides:
+            # Create placeholder image for hidden slide
+            placeholder_path = temp_dir / f"hidden-{slide_num:03d}.jpg"
+            placeholder_img = create_hidden_slide_placeholder(placeholder_size)
+            placeholder_img.save(placeholder_path, "JPEG")
+            all_images.append(placeholder_path)
+        else:
+            # Use the actual visible slide image
+            if visible_idx < len(visible_images):
+                all_images.append(visible_images[visible_idx])
+                visible_idx += 1
+
+    return all_images, analysis
+
+
+def render_slide_images(pptx_path, temp_dir, dpi):
+    """Render the visible slides to JPEG images via PDF with LibreOffice and pdftoppm."""
     pdf_path = temp_dir / f"{pptx_path.stem}.pdf"
 
     # Convert to PDF
@@ -242,33 +556,7 @@ def convert_to_images(pptx_path, temp_dir, dpi):
     if result.returncode != 0:
         raise RuntimeError("Image conversion failed")
 
-    visible_images = sorted(temp_dir.glob("slide-*.jpg"))
-
-    # Create full list with placeholders for hidden slides
-    all_images = []
-    visible_idx = 0
-
-    # Get placeholder dimensions from first visible slide
-    if visible_images:
-        with Image.open(visible_images[0]) as img:
-            placeholder_size = img.size
-    else:
-        placeholder_size = (1920, 1080)
-
-    for slide_num in range(1, total_slides + 1):
-        if slide_num in hidden_slides:
-            # Create placeholder image for hidden slide
-            placeholder_path = temp_dir / f"hidden-{slide_num:03d}.jpg"
-            placeholder_img = create_hidden_slide_placeholder(placeholder_size)
-            placeholder_img.save(placeholder_path, "JPEG")
-            all_images.append(placeholder_path)
-        else:
-            # Use the actual visible slide image
-            if visible_idx < len(visible_images):
-                all_images.append(visible_images[visible_idx])
-                visible_idx += 1
-
-    return all_images
+    return sorted(temp_dir.glob("slide-*.jpg"))
 
 
 def create_grids(
@@ -374,76 +662,214 @@ def create_grid(
         # Add thumbnail below label with proportional spacing
         y_thumbnail = y_base + label_padding + font_size + label_padding
 
-        with Image.open(img_path) as img:
-            # Get original dimensions before thumbnail
-            orig_w, orig_h = img.size
+        img = create_thumbnail(
+            img_path,
+            width,
+            height,
+            (placeholder_regions or {}).get(start_slide_num + i),
+            slide_dimensions,
+        )
+        w, h = img.size
+        tx = x + (width - w) // 2
+        ty = y_thumbnail + (height - h) // 2
+        grid.paste(img, (tx, ty))
+
+        # Add border
+        if BORDER_WIDTH > 0:
+            draw.rectangle(
+                [
+                    (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
+                    (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
+                ],
+                outline="gray",
+                width=BORDER_WIDTH,
+            )
 
-            # Apply placeholder outlines if enabled
-            if placeholder_regions and (start_slide_num + i) in placeholder_regions:
-                # Convert to RGBA for transparency support
-                if img.mode != "RGBA":
-                    img = img.convert("RGBA")
+    return grid
 
-                # Get the regions for this slide
-                regions = placeholder_regions[start_slide_num + i]
 
-                # Calculate scale factors using actual slide dimensions
-                if slide_dimensions:
-                    slide_width_inches, slide_height_inches = slide_dimensions
-                else:
-                    # Fallback: estimate from image size at CONVERSION_DPI
-                    slide_width_inches = orig_w / CONVERSION_DPI
-                    slide_height_inches = orig_h / CONVERSION_DPI
-
-                x_scale = orig_w / slide_width_inches
-                y_scale = orig_h / slide_height_inches
-
-                # Create a highlight overlay
-                overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
-                overlay_draw = ImageDraw.Draw(overlay)
-
-                # Highlight each placeholder region
-                for region in regions:
-                    # Convert from inches to pixels in the original image
-                    px_left = int(region["left"] * x_scale)
-                    px_top = int(region["top"] * y_scale)
-                    px_width = int(region["width"] * x_scale)
-                    px_height = int(region["height"] * y_scale)
-
-                    # Draw highlight outline with red color and thick stroke
-                    # Using a bright red outline instead of fill
-                    stroke_width = max(
-                        5, min(orig_w, orig_h) // 150
-                    )  # Thicker proportional stroke width
-                    overlay_draw.rectangle(
-                        [(px_left, px_top), (px_left + px_width, px_top + px_height)],
-                        outline=(255, 0, 0, 255),  # Bright red, fully opaque
-                        width=stroke_width,
-                    )
+def create_thumbnail(image_path, width, height, regions=None, slide_dimensions=None):
+    """Load a slide image, outline text regions if given, and scale it to fit width×height."""
+    with Image.open(image_path) as img:
+        # Get original dimensions before thumbnail
+        orig_w, orig_h = img.size
 
-                # Composite the overlay onto the image using alpha blending
-                img = Image.alpha_composite(img, overlay)
-                # Convert back to RGB for JPEG saving
-                img = img.convert("RGB")
-
-            img.thumbnail((width, height), Image.Resampling.LANCZOS)
-            w, h = img.size
-            tx = x + (width - w) // 2
-            ty = y_thumbnail + (height - h) // 2
-            grid.paste(img, (tx, ty))
-
-            # Add border
-            if BORDER_WIDTH > 0:
-                draw.rectangle(
-                    [
-                        (tx - BORDER_WIDTH, ty - BORDER_WIDTH),
-                        (tx + w + BORDER_WIDTH - 1, ty + h + BORDER_WIDTH - 1),
-                    ],
-                    outline="gray",
-                    width=BORDER_WIDTH,
+        # Apply placeholder outlines if enabled
+        if regions:
+            # Convert to RGBA for transparency support
+            img = img.convert("RGBA")
+
+            # Calculate scale factors using actual slide dimensions
+            if slide_dimensions:
+                slide_width_inches, slide_height_inches = slide_dimensions
+            else:
+                # Fallback: estimate from image size at CONVERSION_DPI
+                slide_width_inches = orig_w / CONVERSION_DPI
+                slide_height_inches = orig_h / CONVERSION_DPI
+
+            x_scale = orig_w / slide_width_inches
+            y_scale = orig_h / slide_height_inches
+
+            # Create a highlight overlay
+            overlay = Image.new("RGBA", img.size, (255, 255, 255, 0))
+            overlay_draw = ImageDraw.Draw(overlay)
+
+            # Highlight each placeholder region
+            for region in regions:
+                # Convert from inches to pixels in the original image
+                px_left = int(region["left"] * x_scale)
+                px_top = int(region["top"] * y_scale)
+                px_width = int(region["width"] * x_scale)
+                px_height = int(region["height"] * y_scale)
+
+                # Draw highlight outline with red color and thick stroke
+                # Using a bright red outline instead of fill
+                stroke_width = max(
+                    5, min(orig_w, orig_h) // 150
+                )  # Thicker proportional stroke width
+                overlay_draw.rectangle(
+                    [(px_left, px_top), (px_left + px_width, px_top + px_height)],
+                    outline=(255, 0, 0, 255),  # Bright red, fully opaque
+                    width=stroke_width,
                 )
 
-    return grid
+            # Composite the overlay onto the image using alpha blending
+            img = Image.alpha_composite(img, overlay)
+
+        # Convert to RGB (also detaches the image from the open file)
+        img = img.convert("RGB")
+
+    img.thumbnail((width, height), Image.Resampling.LANCZOS)
+    return img
+
+
+def save_image(img, path, image_format):
+    """Save an image using the PIL format for the given extension (jpg/webp/avif)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    quality = JPEG_QUALITY if image_format == "jpg" else WEB_QUALITY
+    img.save(str(path), IMAGE_FORMATS[image_format], quality=quality)
+
+
+def create_slide_thumbnails(
+    image_paths,
+    width,
+    output_path,
+    image_format,
+    placeholder_regions=None,
+    slide_dimensions=None,
+):
+    """Write one thumbnail per slide as {prefix}-slide-N.{ext}."""
+    with Image.open(image_paths[0]) as img:
+        height = int(width * img.height / img.width)
+
+    slide_files = []
+    for i, img_path in enumerate(image_paths):
+        thumb = create_thumbnail(
+            img_path,
+            width,
+            height,
+            (placeholder_regions or {}).get(i),
+            slide_dimensions,
+        )
+        slide_path = output_path.parent / f"{output_path.stem}-slide-{i}.{image_format}"
+        save_image(thumb, slide_path, image_format)
+        slide_files.append(str(slide_path))
+
+    return slide_files
+
+
+def create_sprites(
+    image_paths,
+    cols,
+    width,
+    output_path,
+    image_format,
+    hidden_slides=None,
+    placeholder_regions=None,
+    slide_dimensions=None,
+):
+    """Create sprite sheet(s) of bare thumbnails plus a JSON index.
+
+    Thumbnails are tiled left-to-right, top-to-bottom in cells of a fixed size,
+    without labels or padding, so clients can crop slides with plain offsets.
+    Decks too tall for one image are split across {prefix}-sprite-N.{ext}.
+
+    The index ({prefix}-sprite.json) records, for each zero-indexed slide, the
+    sprite file and the x/y/width/height of its cell, whether the slide is
+    hidden and a hash of the rendered thumbnail for client-side caching.
+
+    Args:
+        hidden_slides: Set of 1-based hidden slide numbers (PresentationAnalysis)
+
+    Returns a tuple of (sprite_files, index_file).
+    """
+    hidden_slides = hidden_slides or set()
+
+    with Image.open(image_paths[0]) as img:
+        height = int(width * img.height / img.width)
+
+    # Keep each sheet within the encoder's dimension limit
+    max_rows = max(1, MAX_SPRITE_DIMENSION // height)
+    max_images_per_sprite = cols * max_rows
+    single_sprite = len(image_paths) <= max_images_per_sprite
+
+    sprite_files = []
+    slides = []
+    for chunk_idx, start_idx in enumerate(
+        range(0, len(image_paths), max_images_per_sprite)
+    ):
+        chunk_images = image_paths[start_idx : start_idx + max_images_per_sprite]
+        rows = (len(chunk_images) + cols - 1) // cols
+        sprite = Image.new("RGB", (cols * width, rows * height), "white")
+
+        if single_sprite:
+            sprite_name = f"{output_path.stem}-sprite.{image_format}"
+        else:
+            sprite_name = f"{output_path.stem}-sprite-{chunk_idx + 1}.{image_format}"
+
+        for i, img_path in enumerate(chunk_images):
+            slide_idx = start_idx + i
+            thumb = create_thumbnail(
+                img_path,
+                width,
+                height,
+                (placeholder_regions or {}).get(slide_idx),
+                slide_dimensions,
+            )
+            x = (i % cols) * width
+            y = (i // cols) * height
+            sprite.paste(thumb, (x, y))
+
+            slides.append(
+                {
+                    "slide": slide_idx,
+                    "sprite": sprite_name,
+                    "x": x,
+                    "y": y,
+                    "width": thumb.width,
+                    "height": thumb.height,
+                    "hidden": (slide_idx + 1) in hidden_slides,
+                    "hash": hashlib.sha256(thumb.tobytes()).hexdigest()[:16],
+                }
+            )
+
+        sprite_path = output_path.parent / sprite_name
+        save_image(sprite, sprite_path, image_format)
+        sprite_files.append(str(sprite_path))
+
+    index = {
+        "cell_width": width,
+        "cell_height": height,
+        "columns": cols,
+        "format": image_format,
+        "sprites": [Path(f).name for f in sprite_files],
+        "slides": slides,
+    }
+    index_path = output_path.parent / f"{output_path.stem}-sprite.json"
+    with open(index_path, "w", encoding="utf-8") as f:
+        json.dump(index, f, indent=2)
+
+    return sprite_files, str(index_path)
 
 
 if __name__ == "__main__":
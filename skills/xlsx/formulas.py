@@ -0,0 +1,1317 @@
+#!/usr/bin/env python3
+"""
+Native Excel Formula Evaluation
+Evaluates the common Excel function subset in-process for recalc.py
+
+Formulas are tokenized with openpyxl's tokenizer, parsed into small
+expression trees and linked into a cell dependency graph from their cell and
+range references. Cells are then evaluated in topological order. Any formula
+outside the supported subset (unknown functions, defined names, array
+formulas, external or 3D references, circular references) raises
+UnsupportedFormula so the caller can fall back to LibreOffice.
+
+Supported:
+  - Arithmetic, comparison, concatenation (&) and percent operators
+  - SUM, AVERAGE, MIN, MAX, COUNT, COUNTA, PRODUCT, SUMPRODUCT, SUMIF, COUNTIF
+  - IF, IFERROR, IFNA, AND, OR, NOT, TRUE, FALSE
+  - ROUND, ROUNDUP, ROUNDDOWN, ABS, INT, MOD, SQRT, POWER
+  - VLOOKUP, HLOOKUP, INDEX, MATCH
+  - CONCATENATE, CONCAT, LEFT, RIGHT, MID, LEN, UPPER, LOWER, TRIM, VALUE
+  - DATE, YEAR, MONTH, DAY, TODAY
+"""
+
+import bisect
+import datetime
+import math
+import re
+from collections import deque
+from decimal import ROUND_DOWN, ROUND_HALF_UP, ROUND_UP, Decimal, InvalidOperation
+
+from openpyxl import load_workbook
+from openpyxl.formula.tokenizer import Token, Tokenizer
+from openpyxl.utils.cell import column_index_from_string, get_column_letter
+from openpyxl.utils.datetime import from_excel, to_excel
+
+
+MAX_ROW = 1048576
+MAX_COLUMN = 16384
+
+# Binding power of infix operators, lowest first (all left-associative)
+BINARY_PRECEDENCE = {
+    '=': 10, '<>': 10, '<': 10, '>': 10, '<=': 10, '>=': 10,
+    '&': 20,
+    '+': 30, '-': 30,
+    '*': 40, '/': 40,
+    '^': 50,
+}
+PERCENT_PRECEDENCE = 60
+PREFIX_PRECEDENCE = 70
+
+_REFERENCE = re.compile(
+    r"^(?:(?:'((?:[^']|'')+)'|([^'!:\[\]]+))!)?"
+    r"(\$?[A-Za-z]{0,3}\$?\d*)(?::(\$?[A-Za-z]{0,3}\$?\d*))?$"
+)
+_ENDPOINT = re.compile(r'^\$?([A-Za-z]{0,3})\$?(\d*)$')
+
+
+class UnsupportedFormula(Exception):
+    """Raised when a workbook uses formulas outside the native subset"""
+
+
+class ExcelError(str):
+    """An Excel error value such as #DIV/0! or #N/A"""
+
+
+class _ErrorResult(Exception):
+    """Carries an Excel error out of a function or operator evaluation"""
+
+    def __init__(self, error):
+        super().__init__(error)
+        self.error = ExcelError(error)
+
+
+# ==================== Parsing ====================
+
+
+def parse_formula(formula, sheet, sheet_names):
+    """
+    Parse a formula string into an expression tree
+
+    Args:
+        formula: Formula text starting with '='
+        sheet: Title of the sheet containing the formula
+        sheet_names: Titles of all sheets in the workbook
+
+    Returns:
+        Expression tree of nested tuples
+
+    Raises:
+        UnsupportedFormula: If the formula uses anything outside the subset
+    """
+    try:
+        tokens = [t for t in Tokenizer(formula).items if t.type != Token.WSPACE]
+    except Exception as e:
+        raise UnsupportedFormula(f'Cannot tokenize {formula}: {e}')
+    return _Parser(tokens, sheet, sheet_names, formula).parse()
+
+
+class _Parser:
+    """Pratt parser over openpyxl formula tokens"""
+
+    def __init__(self, tokens, sheet, sheet_names, formula):
+        self.tokens = tokens
+        self.pos = 0
+        self.sheet = sheet
+        self.sheet_names = sheet_names
+        self.formula = formula
+
+    def unsupported(self, reason):
+        return UnsupportedFormula(f'{reason} in {self.formula}')
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def advance(self):
+        token = self.peek()
+        if token is None:
+            raise self.unsupported('Unexpected end of formula')
+        self.pos += 1
+        return token
+
+    def parse(self):
+        node = self.expression(0)
+        if self.peek() is not None:
+            raise self.unsupported(f'Unexpected {self.peek().value!r}')
+        return node
+
+    def expression(self, min_precedence):
+        left = self.prefix()
+        while True:
+            token = self.peek()
+            if token is None:
+                break
+            if token.type == Token.OP_POST and token.value == '%':
+                if PERCENT_PRECEDENCE <= min_precedence:
+                    break
+                self.advance()
+                left = ('percent', left)
+            elif token.type == Token.OP_IN and token.value in BINARY_PRECEDENCE:
+                precedence = BINARY_PRECEDENCE[token.value]
+                if precedence <= min_precedence:
+                    break
+                self.advance()
+                left = ('op', token.value, left, self.expression(precedence))
+            else:
+                break
+        return left
+
+    def prefix(self):
+        token = self.advance()
+
+        if token.type == Token.OPERAND:
+            if token.subtype == Token.NUMBER:
+                return ('value', float(token.value))
+            if token.subtype == Token.TEXT:
+                return ('value', token.value[1:-1].replace('""', '"'))
+            if token.subtype == Token.LOGICAL:
+                return ('value', token.value.upper() == 'TRUE')
+            if token.subtype == Token.ERROR:
+                return ('value', ExcelError(token.value.upper()))
+            if token.subtype == Token.RANGE:
+                return self.reference(token.value)
+
+        elif token.type == Token.FUNC and token.subtype == Token.OPEN:
+            name = token.value[:-1].upper()
+            if name.startswith('_XLFN.'):
+                name = name[len('_XLFN.'):]
+            if name not in FUNCTIONS and name not in LAZY_FUNCTIONS:
+                raise self.unsupported(f'Unsupported function {name}')
+            return ('func', name, self.arguments())
+
+        elif token.type == Token.PAREN and token.subtype == Token.OPEN:
+            node = self.expression(0)
+            closing = self.advance()
+            if closing.type != Token.PAREN or closing.subtype != Token.CLOSE:
+                raise self.unsupported('Unbalanced parentheses')
+            return node
+
+        elif token.type == Token.OP_PRE:
+            operand = self.expression(PREFIX_PRECEDENCE)
+            return ('negate', operand) if token.value == '-' else operand
+
+        raise self.unsupported(f'Unsupported token {token.value!r}')
+
+    def arguments(self):
+        args = []
+        if self._is_func_close(self.peek()):
+            self.advance()
+            return args
+        while True:
+            token = self.peek()
+            if token is not None and (
+                self._is_func_close(token)
+                or (token.type == Token.SEP and token.subtype == Token.ARG)
+            ):
+                args.append(('empty',))
+            else:
+                args.append(self.expression(0))
+            token = self.advance()
+            if self._is_func_close(token):
+                return args
+            if token.type != Token.SEP or token.subtype != Token.ARG:
+                raise self.unsupported(f'Unexpected {token.value!r} in arguments')
+
+    @staticmethod
+    def _is_func_close(token):
+        return token is not None and token.type == Token.FUNC and token.subtype == Token.CLOSE
+
+    def reference(self, text):
+        """Parse A1, $A$1:B2, Sheet!A1, 'My Sheet'!A:A or 1:3 into a ref node"""
+        match = _REFERENCE.match(text)
+        if not match:
+            raise self.unsupported(f'Unsupported reference {text}')
+        quoted, bare, start, end = match.groups()
+        sheet = quoted.replace("''", "'") if quoted is not None else bare or self.sheet
+        if sheet not in self.sheet_names:
+            raise self.unsupported(f'Unknown sheet {sheet}')
+
+        col1, row1 = self._endpoint(text, start)
+        if end is None:
+            if col1 is None or row1 is None:
+                # Bare words like TAX are defined names, not columns
+                raise self.unsupported(f'Unsupported reference {text}')
+            return ('ref', sheet, row1, col1, row1, col1)
+
+        col2, row2 = self._endpoint(text, end)
+        if (col1 is None) != (col2 is None) or (row1 is None) != (row2 is None):
+            raise self.unsupported(f'Unsupported reference {text}')
+        # Whole columns/rows are open on one axis (resolved against sheet size)
+        row1, row2 = (row1, row2) if row1 is not None else (1, MAX_ROW)
+        col1, col2 = (col1, col2) if col1 is not None else (1, MAX_COLUMN)
+        return (
+            'ref', sheet,
+            min(row1, row2), min(col1, col2), max(row1, row2), max(col1, col2),
+        )
+
+    def _endpoint(self, text, endpoint):
+        match = _ENDPOINT.match(endpoint)
+        if not match or not (match.group(1) or match.group(2)):
+            raise self.unsupported(f'Unsupported reference {text}')
+        col = column_index_from_string(match.group(1).upper()) if match.group(1) else None
+        row = int(match.group(2)) if match.group(2) else None
+        if (col is not None and col > MAX_COLUMN) or (row is not None and not 1 <= row <= MAX_ROW):
+            raise self.unsupported(f'Reference out of bounds {text}')
+        return col, row
+
+
+def references(node):
+    """Yield every ('ref', sheet, r1, c1, r2, c2) node in an expression tree"""
+    kind = node[0]
+    if kind == 'ref':
+        yield node
+    elif kind == 'op':
+        yield from references(node[2])
+        yield from references(node[3])
+    elif kind in ('negate', 'percent'):
+        yield from references(node[1])
+    elif kind == 'func':
+        for arg in node[2]:
+            yield from references(arg)
+
+
+# ==================== Values and coercion ====================
+
+
+class _Range:
+    """A rectangular block of cell values"""
+
+    def __init__(self, values, sheet, r1, c1, r2, c2):
+        self.values = values
+        self.sheet = sheet
+        self.r1, self.c1, self.r2, self.c2 = r1, c1, r2, c2
+
+    @property
+    def height(self):
+        return self.r2 - self.r1 + 1
+
+    @property
+    def width(self):
+        return self.c2 - self.c1 + 1
+
+    def get(self, i, j):
+        """Value at zero-based row i, column j of the range"""
+        return self.values.get((self.sheet, self.r1 + i, self.c1 + j))
+
+    def __iter__(self):
+        for row in range(self.r1, self.r2 + 1):
+            for col in range(self.c1, self.c2 + 1):
+                yield self.values.get((self.sheet, row, col))
+
+    def vector(self):
+        """Values of a single-row or single-column range, or None if 2-D"""
+        if self.height == 1 or self.width == 1:
+            return list(self)
+        return None
+
+    def sub_range(self, i, j, height, width):
+        return _Range(
+            self.values, self.sheet,
+            self.r1 + i, self.c1 + j, self.r1 + i + height - 1, self.c1 + j + width - 1,
+        )
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _scalar(value):
+    """Reduce a range used as a single value to that value (#VALUE! if larger)"""
+    if isinstance(value, _Range):
+        if value.height == 1 and value.width == 1:
+            return value.get(0, 0)
+        raise _ErrorResult('#VALUE!')
+    return value
+
+
+def _check(value):
+    """Raise if value is an Excel error, else return it"""
+    if isinstance(value, ExcelError):
+        raise _ErrorResult(value)
+    return value
+
+
+def _to_number(value):
+    value = _check(_scalar(value))
+    if value is None:
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if _is_number(value):
+        return value
+    try:
+        return float(value.strip())
+    except ValueError:
+        raise _ErrorResult('#VALUE!')
+
+
+def _to_text(value):
+    value = _check(_scalar(value))
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'TRUE' if value else 'FALSE'
+    if _is_number(value):
+        return _format_number(value)
+    return value
+
+
+def _to_bool(value):
+    value = _check(_scalar(value))
+    if value is None:
+        return False
+    if isinstance(value, str):
+        if value.upper() in ('TRUE', 'FALSE'):
+            return value.upper() == 'TRUE'
+        raise _ErrorResult('#VALUE!')
+    return bool(value)
+
+
+def _format_number(value):
+    """Format a number the way Excel's General format does for text"""
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    return f'{value:.15g}'
+
+
+def _finite(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        raise _ErrorResult('#NUM!')
+    return value
+
+
+def _type_rank(value):
+    """Excel orders numbers < text < logicals when comparing mixed types"""
+    if isinstance(value, bool):
+        return 2
+    if isinstance(value, str):
+        return 1
+    return 0
+
+
+def _compare(left, right):
+    """Return -1, 0 or 1 comparing two scalar values with Excel semantics"""
+    left, right = _check(left), _check(right)
+    if left is None:
+        left = '' if isinstance(right, str) else False if isinstance(right, bool) else 0
+    if right is None:
+        right = '' if isinstance(left, str) else False if isinstance(left, bool) else 0
+    left_rank, right_rank = _type_rank(left), _type_rank(right)
+    if left_rank != right_rank:
+        return -1 if left_rank < right_rank else 1
+    if isinstance(left, str):
+        left, right = left.casefold(), right.casefold()
+    return (left > right) - (left < right)
+
+
+# ==================== Operators ====================
+
+
+def _binary(op, left, right):
+    left, right = _scalar(left), _scalar(right)
+    if op == '&':
+        return _to_text(left) + _to_text(right)
+    if op in ('=', '<>', '<', '>', '<=', '>='):
+        order = _compare(left, right)
+        return {
+            '=': order == 0, '<>': order != 0, '<': order < 0,
+            '>': order > 0, '<=': order <= 0, '>=': order >= 0,
+        }[op]
+
+    left, right = _to_number(left), _to_number(right)
+    if op == '+':
+        return _finite(left + right)
+    if op == '-':
+        return _finite(left - right)
+    if op == '*':
+        return _finite(left * right)
+    if op == '/':
+        if right == 0:
+            raise _ErrorResult('#DIV/0!')
+        return _finite(left / right)
+    # op == '^'
+    if left == 0 and right < 0:
+        raise _ErrorResult('#DIV/0!')
+    if left < 0 and not float(right).is_integer():
+        raise _ErrorResult('#NUM!')
+    try:
+        return _finite(float(left) ** right)
+    except OverflowError:
+        raise _ErrorResult('#NUM!')
+
+
+# ==================== Functions ====================
+
+
+def _numbers(args):
+    """Numbers for aggregate functions: ranges skip text/logicals, direct args coerce"""
+    for arg in args:
+        if isinstance(arg, _Range):
+            for value in arg:
+                _check(value)
+                if _is_number(value):
+                    yield value
+        elif arg is not None:
+            yield _to_number(arg)
+
+
+def _fn_sum(*args):
+    return _finite(sum(_numbers(args)))
+
+
+def _fn_average(*args):
+    numbers = list(_numbers(args))
+    if not numbers:
+        raise _ErrorResult('#DIV/0!')
+    return sum(numbers) / len(numbers)
+
+
+def _fn_min(*args):
+    return min(_numbers(args), default=0)
+
+
+def _fn_max(*args):
+    return max(_numbers(args), default=0)
+
+
+def _fn_product(*args):
+    return _finite(math.prod(_numbers(args)))
+
+
+def _fn_count(*args):
+    count = 0
+    for arg in args:
+        if isinstance(arg, _Range):
+            count += sum(1 for value in arg if _is_number(value))
+        else:
+            try:
+                _to_number(arg)
+                count += arg is not None
+            except _ErrorResult:
+                pass
+    return count
+
+
+def _fn_counta(*args):
+    count = 0
+    for arg in args:
+        if isinstance(arg, _Range):
+            count += sum(1 for value in arg if value is not None)
+        else:
+            count += 1
+    return count
+
+
+def _fn_sumproduct(*args):
+    if not all(isinstance(arg, _Range) for arg in args):
+        return _fn_product(*args)
+    if len({(arg.height, arg.width) for arg in args}) != 1:
+        raise _ErrorResult('#VALUE!')
+    total = 0
+    for values in zip(*args):
+        product = 1
+        for value in values:
+            _check(value)
+            product *= value if _is_number(value) else 0
+        total += product
+    return _finite(total)
+
+
+def _criteria_predicate(criteria):
+    """Build a matcher for SUMIF/COUNTIF criteria such as 5, ">=10" or "ab*" """
+    criteria = _check(_scalar(criteria))
+    if not isinstance(criteria, str):
+        return lambda value: value is not None and not isinstance(value, str) and _compare(value, criteria) == 0
+
+    match = re.match(r'^(<=|>=|<>|<|>|=)?(.*)$', criteria, re.S)
+    op, operand = match.group(1) or '=', match.group(2)
+    try:
+        target = float(operand)
+    except ValueError:
+        target = operand
+
+    if isinstance(target, str):
+        if op in ('=', '<>'):
+            if target == '':
+                matches = lambda value: value is None or value == ''
+            else:
+                pattern = _wildcard_pattern(target)
+                matches = lambda value: isinstance(value, str) and pattern.match(value) is not None
+            return matches if op == '=' else lambda value: not matches(value)
+        test = lambda value: isinstance(value, str)
+    else:
+        test = _is_number
+    checks = {
+        '=': lambda order: order == 0, '<>': lambda order: order != 0,
+        '<': lambda order: order < 0, '>': lambda order: order > 0,
+        '<=': lambda order: order <= 0, '>=': lambda order: order >= 0,
+    }[op]
+    if op == '<>':
+        return lambda value: not (test(value) and _compare(value, target) == 0)
+    return lambda value: test(value) and checks(_compare(value, target))
+
+
+def _wildcard_pattern(text):
+    """Compile an Excel wildcard pattern (* ? and ~ escapes), case-insensitive"""
+    parts = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '~' and i + 1 < len(text):
+            parts.append(re.escape(text[i + 1]))
+            i += 2
+            continue
+        parts.append('.*' if char == '*' else '.' if char == '?' else re.escape(char))
+        i += 1
+    return re.compile('^' + ''.join(parts) + '$', re.I | re.S)
+
+
+def _fn_sumif(criteria_range, criteria, sum_range=None):
+    if not isinstance(criteria_range, _Range):
+        raise _ErrorResult('#VALUE!')
+    if sum_range is None:
+        sum_range = criteria_range
+    elif not isinstance(sum_range, _Range):
+        raise _ErrorResult('#VALUE!')
+    else:
+        sum_range = sum_range.sub_range(0, 0, criteria_range.height, criteria_range.width)
+    matches = _criteria_predicate(criteria)
+    total = 0
+    for value, addend in zip(criteria_range, sum_range):
+        if matches(value):
+            _check(addend)
+            if _is_number(addend):
+                total += addend
+    return _finite(total)
+
+
+def _fn_countif(criteria_range, criteria):
+    if not isinstance(criteria_range, _Range):
+        raise _ErrorResult('#VALUE!')
+    matches = _criteria_predicate(criteria)
+    return sum(1 for value in criteria_range if matches(value))
+
+
+def _fn_and(*args):
+    return all([_to_bool(value) for value in _logicals(args)])
+
+
+def _fn_or(*args):
+    return any([_to_bool(value) for value in _logicals(args)])
+
+
+def _logicals(args):
+    values = []
+    for arg in args:
+        if isinstance(arg, _Range):
+            values.extend(_check(v) for v in arg if v is not None and not isinstance(v, str))
+        else:
+            values.append(arg)
+    if not values:
+        raise _ErrorResult('#VALUE!')
+    return values
+
+
+def _fn_not(value):
+    return not _to_bool(value)
+
+
+def _round(number, digits, rounding):
+    number, digits = _to_number(number), int(_to_number(digits))
+    quantum = Decimal(1).scaleb(-digits)
+    try:
+        return float(Decimal(repr(float(number))).quantize(quantum, rounding=rounding))
+    except (InvalidOperation, OverflowError, ValueError):
+        # More digits than Decimal's context allows, e.g. ROUND(1E300, 2)
+        raise _ErrorResult('#NUM!')
+
+
+def _fn_round(number, digits):
+    return _round(number, digits, ROUND_HALF_UP)
+
+
+def _fn_roundup(number, digits):
+    return _round(number, digits, ROUND_UP)
+
+
+def _fn_rounddown(number, digits):
+    return _round(number, digits, ROUND_DOWN)
+
+
+def _fn_abs(number):
+    return abs(_to_number(number))
+
+
+def _fn_int(number):
+    return math.floor(_to_number(number))
+
+
+def _fn_mod(number, divisor):
+    number, divisor = _to_number(number), _to_number(divisor)
+    if divisor == 0:
+        raise _ErrorResult('#DIV/0!')
+    return number - divisor * math.floor(number / divisor)
+
+
+def _fn_sqrt(number):
+    number = _to_number(number)
+    if number < 0:
+        raise _ErrorResult('#NUM!')
+    return math.sqrt(number)
+
+
+def _fn_power(number, power):
+    return _binary('^', number, power)
+
+
+def _lookup_index(value, vector, match_type):
+    """Zero-based position of value in vector for MATCH/VLOOKUP/HLOOKUP, or #N/A"""
+    value = _check(_scalar(value))
+    if match_type == 0:
+        if isinstance(value, str) and any(c in value for c in '*?~'):
+            pattern = _wildcard_pattern(value)
+            matches = lambda item: isinstance(item, str) and pattern.match(item) is not None
+        else:
+            matches = lambda item: (
+                item is not None and _type_rank(item) == _type_rank(value)
+                and _compare(item, value) == 0
+            )
+        for i, item in enumerate(vector):
+            if matches(item):
+                return i
+        raise _ErrorResult('#N/A')
+
+    # Approximate match over sorted data: last item <= value (or >= for -1)
+    found = None
+    for i, item in enumerate(vector):
+        if item is None or _type_rank(item) != _type_rank(value):
+            continue
+        order = _compare(item, value)
+        if order == 0 or (order < 0) == (match_type > 0):
+            found = i
+            if order == 0 and match_type > 0:
+                continue
+        else:
+            break
+    if found is None:
+        raise _ErrorResult('#N/A')
+    return found
+
+
+def _fn_match(value, lookup_range, match_type=1):
+    if not isinstance(lookup_range, _Range) or lookup_range.vector() is None:
+        raise _ErrorResult('#N/A')
+    match_type = _to_number(match_type) if match_type is not None else 1
+    match_type = (match_type > 0) - (match_type < 0)
+    return _lookup_index(value, lookup_range.vector(), match_type) + 1
+
+
+def _fn_vlookup(value, table, index, approximate=True):
+    return _table_lookup(value, table, index, approximate, by_row=True)
+
+
+def _fn_hlookup(value, table, index, approximate=True):
+    return _table_lookup(value, table, index, approximate, by_row=False)
+
+
+def _table_lookup(value, table, index, approximate, by_row):
+    if not isinstance(table, _Range):
+        raise _ErrorResult('#VALUE!')
+    index = int(_to_number(index))
+    approximate = True if approximate is None else _to_bool(approximate)
+    size = table.width if by_row else table.height
+    if index < 1:
+        raise _ErrorResult('#VALUE!')
+    if index > size:
+        raise _ErrorResult('#REF!')
+    if by_row:
+        keys = [table.get(i, 0) for i in range(table.height)]
+    else:
+        keys = [table.get(0, j) for j in range(table.width)]
+    position = _lookup_index(value, keys, 1 if approximate else 0)
+    result = table.get(position, index - 1) if by_row else table.get(index - 1, position)
+    return _check(result)
+
+
+def _fn_index(table, row=None, col=None):
+    if not isinstance(table, _Range):
+        raise _ErrorResult('#REF!')
+    row = int(_to_number(row)) if row is not None else 0
+    col = int(_to_number(col)) if col is not None else None
+    if col is None:
+        # A single index on a one-row range selects a column
+        if table.height == 1 and table.width > 1:
+            row, col = 1, row
+        else:
+            col = 1 if table.width == 1 else 0
+    if row < 0 or col < 0 or row > table.height or col > table.width:
+        raise _ErrorResult('#REF!')
+    return table.sub_range(
+        row - 1 if row else 0, col - 1 if col else 0,
+        1 if row else table.height, 1 if col else table.width,
+    )
+
+
+def _fn_concatenate(*args):
+    return ''.join(_to_text(arg) for arg in args)
+
+
+def _fn_concat(*args):
+    parts = []
+    for arg in args:
+        if isinstance(arg, _Range):
+            parts.extend(_to_text(value) for value in arg)
+        else:
+            parts.append(_to_text(arg))
+    return ''.join(parts)
+
+
+def _fn_left(text, count=1):
+    count = int(_to_number(count if count is not None else 1))
+    if count < 0:
+        raise _ErrorResult('#VALUE!')
+    return _to_text(text)[:count]
+
+
+def _fn_right(text, count=1):
+    count = int(_to_number(count if count is not None else 1))
+    if count < 0:
+        raise _ErrorResult('#VALUE!')
+    text = _to_text(text)
+    return text[len(text) - count:] if count else ''
+
+
+def _fn_mid(text, start, count):
+    start, count = int(_to_number(start)), int(_to_number(count))
+    if start < 1 or count < 0:
+        raise _ErrorResult('#VALUE!')
+    return _to_text(text)[start - 1:start - 1 + count]
+
+
+def _fn_len(text):
+    return len(_to_text(text))
+
+
+def _fn_upper(text):
+    return _to_text(text).upper()
+
+
+def _fn_lower(text):
+    return _to_text(text).lower()
+
+
+def _fn_trim(text):
+    return re.sub(' +', ' ', _to_text(text).strip(' '))
+
+
+def _fn_value(text):
+    value = _check(_scalar(text))
+    if isinstance(value, bool):
+        raise _ErrorResult('#VALUE!')
+    return _to_number(value)
+
+
+class _DateFunctions:
+    """Date functions bound to the workbook's date epoch"""
+
+    def __init__(self, epoch):
+        self.epoch = epoch
+
+    def serial(self, value):
+        return to_excel(value, self.epoch)
+
+    def date(self, value):
+        serial = _to_number(value)
+        if serial < 0:
+            raise _ErrorResult('#NUM!')
+        try:
+            return from_excel(serial, self.epoch)
+        except (OverflowError, ValueError):
+            raise _ErrorResult('#NUM!')
+
+    def fn_date(self, year, month, day):
+        year, month, day = int(_to_number(year)), int(_to_number(month)), int(_to_number(day))
+        if year < 1900:
+            year += 1900
+        year, month = divmod(year * 12 + month - 1, 12)
+        try:
+            value = datetime.datetime(year, month + 1, 1) + datetime.timedelta(days=day - 1)
+        except (ValueError, OverflowError):
+            raise _ErrorResult('#NUM!')
+        return self.serial(value)
+
+    def fn_year(self, value):
+        return self.date(value).year
+
+    def fn_month(self, value):
+        return self.date(value).month
+
+    def fn_day(self, value):
+        return self.date(value).day
+
+    def fn_today(self):
+        return self.serial(datetime.datetime.combine(datetime.date.today(), datetime.time()))
+
+
+FUNCTIONS = {
+    'SUM': _fn_sum, 'AVERAGE': _fn_average, 'MIN': _fn_min, 'MAX': _fn_max,
+    'COUNT': _fn_count, 'COUNTA': _fn_counta, 'PRODUCT': _fn_product,
+    'SUMPRODUCT': _fn_sumproduct, 'SUMIF': _fn_sumif, 'COUNTIF': _fn_countif,
+    'AND': _fn_and, 'OR': _fn_or, 'NOT': _fn_not,
+    'TRUE': lambda: True, 'FALSE': lambda: False,
+    'ROUND': _fn_round, 'ROUNDUP': _fn_roundup, 'ROUNDDOWN': _fn_rounddown,
+    'ABS': _fn_abs, 'INT': _fn_int, 'MOD': _fn_mod, 'SQRT': _fn_sqrt, 'POWER': _fn_power,
+    'VLOOKUP': _fn_vlookup, 'HLOOKUP': _fn_hlookup, 'INDEX': _fn_index, 'MATCH': _fn_match,
+    'CONCATENATE': _fn_concatenate, 'CONCAT': _fn_concat,
+    'LEFT': _fn_left, 'RIGHT': _fn_right, 'MID': _fn_mid, 'LEN': _fn_len,
+    'UPPER': _fn_upper, 'LOWER': _fn_lower, 'TRIM': _fn_trim, 'VALUE': _fn_value,
+    'DATE': 'fn_date', 'YEAR': 'fn_year', 'MONTH': 'fn_month', 'DAY': 'fn_day',
+    'TODAY': 'fn_today',
+}
+
+# Functions whose arguments are evaluated on demand
+LAZY_FUNCTIONS = {'IF', 'IFERROR', 'IFNA'}
+
+
+# ==================== Workbook evaluation ====================
+
+
+class FormulaEngine:
+    """
+    Dependency-ordered evaluator for the formulas of one workbook
+
+    Cells are keyed by (sheet_title, row, column). Constant cell values and
+    evaluated formula results share one dict, so ranges read both.
+
+    Example:
+        engine = FormulaEngine.from_file('model.xlsx')  # may raise UnsupportedFormula
+        values = engine.recalculate()  # {sheet: {'B2': 42.0, ...}}
+    """
+
+    def __init__(self, workbook, cached=None):
+        """
+        Load values and formulas from an openpyxl workbook (data_only=False)
+
+        Args:
+            workbook: Workbook loaded with data_only=False
+            cached: Optional workbook loaded with data_only=True whose cached
+                formula results seed the values, for recalculate_cells()
+
+        Raises:
+            UnsupportedFormula: If any formula is outside the supported subset
+        """
+        self.dates = _DateFunctions(workbook.epoch)
+        self.values = {}
+        self.formulas = {}
+        self.sheet_sizes = {}
+        sheet_names = set(workbook.sheetnames)
+
+        for ws in workbook.worksheets:
+            self.sheet_sizes[ws.title] = (ws.max_row, ws.max_column)
+        for key, cell in _cells(workbook):
+            if cell.data_type == 'f':
+                if not isinstance(cell.value, str):
+                    raise UnsupportedFormula(f'Array or table formula in {key[0]}!{cell.coordinate}')
+                self.formulas[key] = parse_formula(cell.value, key[0], sheet_names)
+            else:
+                self.values[key] = self._cell_value(cell)
+
+        if cached is not None:
+            for key, cell in _cells(cached):
+                if key in self.formulas:
+                    self.values[key] = self._cell_value(cell)
+
+        # Clamp whole-row/column references to the used area of each sheet
+        self.formulas = {key: self._clamp(tree) for key, tree in self.formulas.items()}
+        self.precedents = self._build_precedents()
+        self.formula_dependents = {}
+        for key, precedents in self.precedents.items():
+            for precedent in precedents:
+                self.formula_dependents.setdefault(precedent, []).append(key)
+        self.order = self._topological_order(self.formulas)
+        # Which formulas reference each cell, built on the first dependents() call
+        self._cell_references = None
+        self._range_references = None
+
+    def _cell_value(self, cell):
+        value = cell.value
+        if cell.data_type == 'e':
+            return ExcelError(value)
+        if isinstance(value, (datetime.datetime, datetime.date, datetime.time, datetime.timedelta)):
+            return self.dates.serial(value)
+        return value
+
+    @classmethod
+    def from_file(cls, filename, cached_from=None):
+        """
+        Build an engine from a workbook file
+
+        Args:
+            filename: Path to Excel file
+            cached_from: Optional workbook file (usually filename itself or
+                its previous recalculated version) to read cached formula
+                results from
+        """
+        workbook = load_workbook(filename, data_only=False)
+        cached = load_workbook(cached_from, data_only=True) if cached_from else None
+        try:
+            return cls(workbook, cached)
+        finally:
+            workbook.close()
+            if cached is not None:
+                cached.close()
+
+    def recalculate(self):
+        """
+        Evaluate every formula in dependency order
+
+        Returns:
+            dict mapping sheet title to {coordinate: value} for formula cells
+        """
+        for key in self.order:
+            self.values[key] = self.evaluate_cell(key)
+        return self.results(self.order)
+
+    def recalculate_cells(self, changed):
+        """
+        Re-evaluate only the formulas affected by a set of changed cells
+
+        Every formula cell that (transitively) references a changed cell is
+        evaluated again in dependency order; all other values keep their
+        cached results. Formula cells without a cached result are treated
+        as changed too.
+
+        Args:
+            changed: Iterable of (sheet, row, column) keys
+
+        Returns:
+            dict with:
+              - recalculated: keys of the re-evaluated formula cells, in order
+              - changed_values: {'Sheet!A1': {'old': ..., 'new': ...}}
+              - new_errors: [{'cell', 'error', 'origin', 'from'?}] for cells
+                that became errors. origin is 'source' when the cell itself
+                produced the error and 'propagated' when it references an
+                error cell (named in 'from').
+        """
+        changed = set(changed)
+        changed.update(key for key in self.formulas if self.values.get(key) is None)
+        affected = self.dependents(changed)
+        order = self._topological_order(affected)
+
+        old_values = {key: self.values.get(key) for key in order}
+        for key in order:
+            self.values[key] = self.evaluate_cell(key)
+
+        changed_values = {}
+        new_errors = []
+        for key in order:
+            old, new = old_values[key], self.values[key]
+            if type(old) is type(new) and old == new:
+                continue
+            name = _cell_name(key)
+            changed_values[name] = {'old': old, 'new': new}
+            if isinstance(new, ExcelError) and new != old:
+                source = self.error_source(key)
+                error = {'cell': name, 'error': str(new), 'origin': 'propagated' if source else 'source'}
+                if source:
+                    error['from'] = _cell_name(source)
+                new_errors.append(error)
+
+        return {'recalculated': order, 'changed_values': changed_values, 'new_errors': new_errors}
+
+    def dependents(self, changed):
+        """Formula cells in changed plus every formula that transitively references one"""
+        if self._cell_references is None:
+            self._index_references()
+
+        affected = {key for key in changed if key in self.formulas}
+        for key in changed:
+            affected.update(self._cell_references.get(key, ()))
+            affected.update(self._range_references.containing(*key))
+
+        # Breadth-first over the formula dependency graph
+        pending = deque(affected)
+        while pending:
+            for dependent in self.formula_dependents.get(pending.popleft(), ()):
+                if dependent not in affected:
+                    affected.add(dependent)
+                    pending.append(dependent)
+        return affected
+
+    def _index_references(self):
+        """Index every formula's references by the cell or column ranges they cover"""
+        self._cell_references = {}
+        self._range_references = _RangeIndex()
+        for key, tree in self.formulas.items():
+            for _, sheet, r1, c1, r2, c2 in references(tree):
+                if r1 == r2 and c1 == c2:
+                    self._cell_references.setdefault((sheet, r1, c1), set()).add(key)
+                else:
+                    self._range_references.add(sheet, r1, c1, r2, c2, key)
+        self._range_references.freeze()
+
+    def error_source(self, key):
+        """First referenced cell of a formula that holds an error, or None"""
+        for _, sheet, r1, c1, r2, c2 in references(self.formulas[key]):
+            for row in range(r1, r2 + 1):
+                for col in range(c1, c2 + 1):
+                    if isinstance(self.values.get((sheet, row, col)), ExcelError):
+                        return (sheet, row, col)
+        return None
+
+    def results(self, keys):
+        """Group the current values of the given cells by sheet and A1 coordinate"""
+        results = {}
+        for sheet, row, col in keys:
+            value = self.values.get((sheet, row, col))
+            results.setdefault(sheet, {})[f'{get_column_letter(col)}{row}'] = value
+        return results
+
+    def evaluate_cell(self, key):
+        """Evaluate one formula cell against the current values"""
+        try:
+            value = _scalar(self._evaluate(self.formulas[key]))
+        except _ErrorResult as e:
+            return e.error
+        except UnsupportedFormula:
+            raise
+        except Exception as e:
+            # An input the native functions do not handle; LibreOffice will
+            sheet, row, col = key
+            raise UnsupportedFormula(
+                f'Cannot evaluate {sheet}!{get_column_letter(col)}{row}: {e}') from e
+        # A formula pointing at an empty cell shows 0
+        return 0 if value is None else value
+
+    def _evaluate(self, node):
+        kind = node[0]
+        if kind == 'value':
+            return node[1]
+        if kind == 'empty':
+            return None
+        if kind == 'ref':
+            _, sheet, r1, c1, r2, c2 = node
+            if r1 == r2 and c1 == c2:
+                return self.values.get((sheet, r1, c1))
+            return _Range(self.values, sheet, r1, c1, r2, c2)
+        if kind == 'negate':
+            return -_to_number(self._evaluate(node[1]))
+        if kind == 'percent':
+            return _to_number(self._evaluate(node[1])) / 100
+        if kind == 'op':
+            return _binary(node[1], self._evaluate(node[2]), self._evaluate(node[3]))
+        return self._call(node[1], node[2])
+
+    def _argument(self, node):
+        """Evaluate a function argument, keeping references as ranges"""
+        if node[0] == 'ref':
+            return _Range(self.values, *node[1:])
+        if node[0] == 'empty':
+            return None
+        return self._evaluate(node)
+
+    def _call(self, name, args):
+        try:
+            if name == 'IF':
+                if not 1 <= len(args) <= 3:
+                    raise _ErrorResult('#VALUE!')
+                if _to_bool(self._evaluate(args[0])):
+                    return self._argument(args[1]) if len(args) > 1 else True
+                return self._argument(args[2]) if len(args) > 2 else False
+            if name in ('IFERROR', 'IFNA'):
+                if len(args) != 2:
+                    raise _ErrorResult('#VALUE!')
+                try:
+                    value = _check(_scalar(self._argument(args[0])))
+                except _ErrorResult as e:
+                    if name == 'IFERROR' or e.error == '#N/A':
+                        return self._argument(args[1])
+                    raise
+                return value
+
+            function = FUNCTIONS[name]
+            if isinstance(function, str):
+                function = getattr(self.dates, function)
+            values = [self._argument(arg) for arg in args]
+            try:
+                return function(*values)
+            except TypeError:
+                # Wrong number of arguments
+                raise _ErrorResult('#VALUE!')
+        except _ErrorResult as e:
+            return e.error
+
+    def _clamp(self, node):
+        kind = node[0]
+        if kind == 'ref':
+            _, sheet, r1, c1, r2, c2 = node
+            max_row, max_col = self.sheet_sizes[sheet]
+            if r2 == MAX_ROW and r1 == 1:
+                r2 = max(max_row, 1)
+            if c2 == MAX_COLUMN and c1 == 1:
+                c2 = max(max_col, 1)
+            return ('ref', sheet, r1, c1, r2, c2)
+        if kind == 'op':
+            return ('op', node[1], self._clamp(node[2]), self._clamp(node[3]))
+        if kind in ('negate', 'percent'):
+            return (kind, self._clamp(node[1]))
+        if kind == 'func':
+            return ('func', node[1], [self._clamp(arg) for arg in node[2]])
+        return node
+
+    def _build_precedents(self):
+        """Map each formula cell to the formula cells it references"""
+        formula_cells = _CellIndex(self.formulas)
+
+        precedents = {}
+        for key, tree in self.formulas.items():
+            found = set()
+            for _, sheet, r1, c1, r2, c2 in references(tree):
+                if r1 == r2 and c1 == c2:
+                    if (sheet, r1, c1) in self.formulas:
+                        found.add((sheet, r1, c1))
+                    continue
+                found.update(formula_cells.within(sheet, r1, c1, r2, c2))
+            precedents[key] = found
+        return precedents
+
+    def _topological_order(self, keys):
+        """Order formula cells so every cell follows its precedents (Kahn's algorithm)"""
+        keys = set(keys)
+        remaining = {key: len(self.precedents[key] & keys) for key in keys}
+        dependents = {}
+        for key in keys:
+            for precedent in self.precedents[key] & keys:
+                dependents.setdefault(precedent, []).append(key)
+
+        ready = sorted(key for key, count in remaining.items() if count == 0)
+        order = []
+        while ready:
+            key = ready.pop()
+            order.append(key)
+            for dependent in dependents.get(key, ()):
+                remaining[dependent] -= 1
+                if remaining[dependent] == 0:
+                    ready.append(dependent)
+
+        if len(order) != len(keys):
+            raise UnsupportedFormula('Circular reference')
+        return order
+
+
+class _CellIndex:
+    """Cell keys grouped by sheet and column with sorted rows, for range lookups"""
+
+    def __init__(self, keys):
+        rows = {}
+        for sheet, row, col in keys:
+            rows.setdefault(sheet, {}).setdefault(col, []).append(row)
+        self.rows = {
+            sheet: {col: sorted(col_rows) for col, col_rows in columns.items()}
+            for sheet, columns in rows.items()
+        }
+        self.columns = {sheet: sorted(columns) for sheet, columns in self.rows.items()}
+
+    def within(self, sheet, r1, c1, r2, c2):
+        """Yield the indexed keys inside a range"""
+        columns = self.columns.get(sheet, [])
+        for col in columns[bisect.bisect_left(columns, c1):bisect.bisect_right(columns, c2)]:
+            rows = self.rows[sheet][col]
+            for row in rows[bisect.bisect_left(rows, r1):bisect.bisect_right(rows, r2)]:
+                yield (sheet, row, col)
+
+
+class _RangeIndex:
+    """
+    Row intervals of range references per sheet and column, for finding the
+    formulas whose ranges contain a cell
+
+    Intervals are sorted by first row with a running maximum of last rows,
+    so a lookup stops at the first interval before which every range ends
+    above the cell.
+    """
+
+    def __init__(self):
+        self.intervals = {}
+
+    def add(self, sheet, r1, c1, r2, c2, key):
+        for col in range(c1, c2 + 1):
+            self.intervals.setdefault((sheet, col), []).append((r1, r2, key))
+
+    def freeze(self):
+        """Sort the intervals once all references are added"""
+        self.index = {}
+        for column, intervals in self.intervals.items():
+            intervals.sort(key=lambda interval: interval[0])
+            max_ends = []
+            max_end = 0
+            for _, r2, _ in intervals:
+                max_end = max(max_end, r2)
+                max_ends.append(max_end)
+            self.index[column] = ([r1 for r1, _, _ in intervals], max_ends, intervals)
+
+    def containing(self, sheet, row, col):
+        """Yield the keys of the ranges that contain a cell"""
+        if (sheet, col) not in self.index:
+            return
+        starts, max_ends, intervals = self.index[(sheet, col)]
+        i = bisect.bisect_right(starts, row) - 1
+        while i >= 0 and max_ends[i] >= row:
+            if intervals[i][1] >= row:
+                yield intervals[i][2]
+            i -= 1
+
+
+def _cells(workbook):
+    """Yield ((sheet, row, column), cell) for every non-empty cell"""
+    for ws in workbook.worksheets:
+        for row in ws.iter_rows():
+            for cell in row:
+                if cell.value is not None:
+                    yield (ws.title, cell.row, cell.column), cell
+
+
+def _cell_name(key):
+    sheet, row, col = key
+    return f'{sheet}!{get_column_letter(col)}{row}'
+
+
+def parse_cell(text, default_sheet=None):
+    """
+    Parse 'Sheet1!B2', "'My Sheet'!B2" or 'B2' into a (sheet, row, column) key
+
+    Raises:
+        ValueError: If text is not a single cell reference
+    """
+    sheet, _, coordinate = text.rpartition('!')
+    if sheet.startswith("'") and sheet.endswith("'") and len(sheet) > 1:
+        sheet = sheet[1:-1].replace("''", "'")
+    sheet = sheet or default_sheet
+    match = _ENDPOINT.match(coordinate.strip())
+    if not sheet or not match or not match.group(1) or not match.group(2):
+        raise ValueError(f'Not a cell reference: {text}')
+    return (sheet, int(match.group(2)), column_index_from_string(match.group(1).upper()))
+
+
+def changed_cells(previous, current):
+    """
+    Keys of every cell whose value or formula differs between two workbook files
+
+    Cells of sheets that exist in only one of the workbooks all count as changed.
+    """
+    old = load_workbook(previous, data_only=False)
+    new = load_workbook(current, data_only=False)
+    try:
+        old_cells = {key: cell.value for key, cell in _cells(old)}
+        new_cells = {key: cell.value for key, cell in _cells(new)}
+    finally:
+        old.close()
+        new.close()
+    return {
+        key for key in old_cells.keys() | new_cells.keys()
+        if old_cells.get(key) != new_cells.get(key)
+    }
+
+
+def evaluate_workbook(filename):
+    """
+    Evaluate all formulas of a workbook natively
+
+    Returns:
+        dict mapping sheet title to {coordinate: value} for formula cells
+
+    Raises:
+        UnsupportedFormula: If any formula is outside the supported subset
+    """
+    return FormulaEngine.from_file(filename).recalculate()
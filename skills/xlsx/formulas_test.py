@@ -0,0 +1,35 @@
+import unittest
+from unittest import mock
+
+from openpyxl import Workbook
+
+from formulas import FormulaEngine, UnsupportedFormula
+
+
+# Currently this is not run automatically in CI; it's just for documentation and manual checking.
+class TestArithmeticLimits(unittest.TestCase):
+
+    def recalculate(self, value, formula):
+        workbook = Workbook()
+        sheet = workbook.active
+        sheet['A1'] = value
+        sheet['A2'] = formula
+        return FormulaEngine(workbook).recalculate()[sheet.title]['A2']
+
+    def test_round_of_huge_number_is_num_error(self):
+        self.assertEqual(self.recalculate(1e300, '=ROUND(A1,2)'), '#NUM!')
+        self.assertEqual(self.recalculate(1e300, '=ROUNDUP(A1,2)'), '#NUM!')
+
+    def test_date_parts_of_huge_serial_are_num_errors(self):
+        self.assertEqual(self.recalculate(1e10, '=YEAR(A1)'), '#NUM!')
+        self.assertEqual(self.recalculate(1e10, '=MONTH(A1)'), '#NUM!')
+        self.assertEqual(self.recalculate(1e10, '=DAY(A1)'), '#NUM!')
+
+    def test_unexpected_exception_is_unsupported(self):
+        with mock.patch.object(FormulaEngine, '_evaluate', side_effect=RuntimeError('boom')):
+            with self.assertRaises(UnsupportedFormula):
+                self.recalculate(1, '=NOT(A1)')
+
+
+if __name__ == '__main__':
+    unittest.main()
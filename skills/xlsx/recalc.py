@@ -1,21 +1,121 @@
 #!/usr/bin/env python3
 """
 Excel Formula Recalculation Script
-Recalculates all formulas in an Excel file using LibreOffice
+Recalculates all formulas in Excel files using LibreOffice
 """
 
+import importlib.util
 import json
 import sys
 import subprocess
 import os
 import platform
+import posixpath
+import queue
+import shutil
+import tempfile
+import time
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from openpyxl import load_workbook
+from openpyxl.utils.cell import column_index_from_string, coordinate_from_string, get_column_letter
+from openpyxl.utils.exceptions import InvalidFileException
 
 
-def setup_libreoffice_macro():
-    """Setup LibreOffice macro for recalculation if not already configured"""
-    if platform.system() == 'Darwin':
+def _load_formulas():
+    """Load the native formula engine (formulas.py next to this script) by path
+    
+    A plain import would only work with this directory on sys.path and could
+    pick up the unrelated PyPI 'formulas' package instead.
+    """
+    spec = importlib.util.spec_from_file_location(
+        'xlsx_formulas', Path(__file__).resolve().with_name('formulas.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+formulas = sys.modules.get('xlsx_formulas') or _load_formulas()
+
+EXCEL_ERRORS = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
+MAX_ERROR_LOCATIONS = 20  # Locations reported per error type
+PARALLEL_SCAN_MIN_BYTES = 16 * 1024 * 1024  # Sheet XML size before scanning sheets in parallel
+
+SPREADSHEETML = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+RELATIONSHIPS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_RELATIONSHIPS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+MACRO_CONTENT = '''<?xml version="1.0" encoding="UTF-8"?>
+<!DOCTYPE script:module PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "module.dtd">
+<script:module xmlns:script="http://openoffice.org/2000/script" script:name="Module1" script:language="StarBasic">
+    Sub RecalculateAndSave()
+      ThisComponent.calculateAll()
+      ThisComponent.store()
+      ThisComponent.close(True)
+    End Sub
+
+    Sub RecalculateBatch(manifest As String, report As String)
+      Dim inFile As Integer, outFile As Integer, url As String, status As String
+      inFile = FreeFile
+      Open manifest For Input As #inFile
+      Do While Not EOF(inFile)
+        Line Input #inFile, url
+        If url &lt;&gt; "" Then
+          status = RecalculateFile(url)
+          outFile = FreeFile
+          Open report For Append As #outFile
+          Print #outFile, status &amp; Chr(9) &amp; url
+          Close #outFile
+        End If
+      Loop
+      Close #inFile
+    End Sub
+
+    Function RecalculateFile(url As String) As String
+      On Error GoTo Failed
+      Dim props(0) As New com.sun.star.beans.PropertyValue
+      Dim doc As Object
+      props(0).Name = "Hidden"
+      props(0).Value = True
+      doc = StarDesktop.loadComponentFromURL(url, "_blank", 0, props())
+      doc.calculateAll()
+      doc.store()
+      doc.close(True)
+      RecalculateFile = "OK"
+      Exit Function
+    Failed:
+      RecalculateFile = "ERROR " &amp; Error$
+      &apos; A document that loaded but failed later must not stay open in the session
+      If Not IsNull(doc) Then CloseQuietly(doc)
+    End Function
+
+    Sub CloseQuietly(doc As Object)
+      On Error Resume Next
+      doc.close(True)
+    End Sub
+</script:module>'''
+
+
+def profile_args(profile_dir=None):
+    """Return soffice arguments selecting an isolated user profile (if any)"""
+    if profile_dir is None:
+        return []
+    return [f'-env:UserInstallation={Path(profile_dir).absolute().as_uri()}']
+
+
+def setup_libreoffice_macro(profile_dir=None):
+    """
+    Setup LibreOffice macro for recalculation if not already configured
+    
+    Args:
+        profile_dir: Optional isolated user profile directory (as passed to
+            -env:UserInstallation). Defaults to the user's standard profile.
+    """
+    if profile_dir is not None:
+        macro_dir = os.path.join(profile_dir, 'user', 'basic', 'Standard')
+    elif platform.system() == 'Darwin':
         macro_dir = os.path.expanduser('~/Library/Application Support/LibreOffice/4/user/basic/Standard')
     else:
         macro_dir = os.path.expanduser('~/.config/libreoffice/4/user/basic/Standard')
@@ -24,39 +124,53 @@ def setup_libreoffice_macro():
     
     if os.path.exists(macro_file):
         with open(macro_file, 'r') as f:
-            if 'RecalculateAndSave' in f.read():
+            if f.read() == MACRO_CONTENT:
                 return True
     
     if not os.path.exists(macro_dir):
-        subprocess.run(['soffice', '--headless', '--terminate_after_init'], 
+        subprocess.run(['soffice', '--headless', '--terminate_after_init'] + profile_args(profile_dir),
                       capture_output=True, timeout=10)
         os.makedirs(macro_dir, exist_ok=True)
     
-    macro_content = '''<?xml version="1.0" encoding="UTF-8"?>
-<!DOCTYPE script:module PUBLIC "-//OpenOffice.org//DTD OfficeDocument 1.0//EN" "module.dtd">
-<script:module xmlns:script="http://openoffice.org/2000/script" script:name="Module1" script:language="StarBasic">
-    Sub RecalculateAndSave()
-      ThisComponent.calculateAll()
-      ThisComponent.store()
-      ThisComponent.close(True)
-    End Sub
-</script:module>'''
-    
     try:
         with open(macro_file, 'w') as f:
-            f.write(macro_content)
+            f.write(MACRO_CONTENT)
         return True
     except Exception:
         return False
 
 
-def recalc(filename, timeout=30):
+def timeout_command(timeout):
+    """Return the command prefix that limits a process to timeout seconds"""
+    # Handle timeout command differences between Linux and macOS
+    if platform.system() == 'Windows':
+        return []
+    
+    timeout_cmd = 'timeout' if platform.system() == 'Linux' else None
+    if platform.system() == 'Darwin':
+        # Check if gtimeout is available on macOS
+        try:
+            subprocess.run(['gtimeout', '--version'], capture_output=True, timeout=1, check=False)
+            timeout_cmd = 'gtimeout'
+        except (FileNotFoundError, subprocess.TimeoutExpired):
+            pass
+    
+    return [timeout_cmd, str(timeout)] if timeout_cmd else []
+
+
+def recalc(filename, timeout=30, profile_dir=None, native=True):
     """
     Recalculate formulas in Excel file and report any errors
     
+    Workbooks whose formulas all fall in the subset supported by formulas.py
+    are evaluated in-process and their cached values written back directly;
+    anything else is recalculated by LibreOffice.
+    
     Args:
         filename: Path to Excel file
         timeout: Maximum time to wait for recalculation (seconds)
+        profile_dir: Optional isolated LibreOffice user profile to run in
+        native: Try the native evaluator before falling back to LibreOffice
     
     Returns:
         dict with error locations and counts
@@ -64,31 +178,23 @@ def recalc(filename, timeout=30):
     if not Path(filename).exists():
         return {'error': f'File {filename} does not exist'}
     
+    if native and recalc_native(filename):
+        try:
+            return scan_workbook(filename)
+        except Exception as e:
+            return {'error': str(e)}
+    
     abs_path = str(Path(filename).absolute())
     
-    if not setup_libreoffice_macro():
+    if not setup_libreoffice_macro(profile_dir):
         return {'error': 'Failed to setup LibreOffice macro'}
     
-    cmd = [
-        'soffice', '--headless', '--norestore',
+    cmd = timeout_command(timeout) + [
+        'soffice', '--headless', '--norestore'] + profile_args(profile_dir) + [
         'vnd.sun.star.script:Standard.Module1.RecalculateAndSave?language=Basic&location=application',
         abs_path
     ]
     
-    # Handle timeout command differences between Linux and macOS
-    if platform.system() != 'Windows':
-        timeout_cmd = 'timeout' if platform.system() == 'Linux' else None
-        if platform.system() == 'Darwin':
-            # Check if gtimeout is available on macOS
-            try:
-                subprocess.run(['gtimeout', '--version'], capture_output=True, timeout=1, check=False)
-                timeout_cmd = 'gtimeout'
-            except (FileNotFoundError, subprocess.TimeoutExpired):
-                pass
-        
-        if timeout_cmd:
-            cmd = [timeout_cmd, str(timeout)] + cmd
-    
     result = subprocess.run(cmd, capture_output=True, text=True)
     
     if result.returncode != 0 and result.returncode != 124:  # 124 is timeout exit code
@@ -100,77 +206,668 @@ def recalc(filename, timeout=30):
     
     # Check for Excel errors in the recalculated file - scan ALL cells
     try:
-        wb = load_workbook(filename, data_only=True)
-        
-        excel_errors = ['#VALUE!', '#DIV/0!', '#REF!', '#NAME?', '#NULL!', '#NUM!', '#N/A']
-        error_details = {err: [] for err in excel_errors}
-        total_errors = 0
+        return scan_workbook(filename)
+    except Exception as e:
+        return {'error': str(e)}
+
+
+def recalc_native(filename):
+    """
+    Recalculate a workbook with the native formula evaluator
+    
+    Returns:
+        True if every formula was evaluated and the cached values were
+        written, False if the workbook needs LibreOffice
+    """
+    try:
+        values = formulas.FormulaEngine.from_file(filename).recalculate()
+    except (formulas.UnsupportedFormula, InvalidFileException, zipfile.BadZipFile):
+        # Formulas outside the subset, or a file openpyxl cannot read (such
+        # as .xls), leave the workbook untouched for LibreOffice
+        return False
+    write_cached_values(filename, values)
+    return True
+
+
+def recalc_incremental(filename, changed=None, previous=None, timeout=30):
+    """
+    Recalculate only the formulas affected by changed cells
+    
+    Formula results that do not depend on the changed cells keep their
+    cached values. Changed cells are given explicitly, or found by diffing
+    against the previous version of the workbook, whose cached results are
+    then used as the starting point (so the workbook itself may have been
+    saved by openpyxl without any). Workbooks outside the native formula
+    subset are fully recalculated instead.
+    
+    Args:
+        filename: Path to Excel file
+        changed: Iterable of changed cells such as 'Sheet1!B2'
+        previous: Path to the previous, recalculated version of the workbook
+        timeout: Timeout for a full LibreOffice recalculation fallback
+    
+    Returns:
+        recalc() style dict, plus (when incremental) recalculated_cells,
+        changed_values and new_errors
+    """
+    if not Path(filename).exists():
+        return {'error': f'File {filename} does not exist'}
+    if previous is not None and not Path(previous).exists():
+        return {'error': f'File {previous} does not exist'}
+    if changed is None and previous is None:
+        return {'error': 'Give the changed cells or the previous workbook'}
+    
+    try:
+        engine = formulas.FormulaEngine.from_file(filename, cached_from=previous or filename)
+        if changed is None:
+            keys = formulas.changed_cells(previous, filename)
+        else:
+            keys = [formulas.parse_cell(cell) for cell in changed]
+        report = engine.recalculate_cells(keys)
+    except formulas.UnsupportedFormula:
+        return recalc(filename, timeout)
+    except (ValueError, InvalidFileException, zipfile.BadZipFile) as e:
+        return {'error': str(e)}
+    
+    # Without a previous version only the re-evaluated cells need writing;
+    # otherwise the carried-over results are restored as well
+    written = report['recalculated'] if previous is None else engine.formulas
+    try:
+        write_cached_values(filename, engine.results(written))
+        result = scan_workbook(filename)
+    except Exception as e:
+        return {'error': str(e)}
+    
+    result['recalculated_cells'] = len(report['recalculated'])
+    result['changed_values'] = report['changed_values']
+    result['new_errors'] = report['new_errors']
+    return result
+
+
+def write_cached_values(filename, values):
+    """
+    Store formula results as the cached <v> values of their cells
+    
+    Only the worksheet parts holding formula cells are rewritten; every other
+    zip member is copied through unchanged. The workbook is replaced
+    atomically once the new file is complete.
+    
+    Args:
+        filename: Path to Excel file
+        values: dict mapping sheet name to {coordinate: value}
+    """
+    from lxml import etree
+    
+    with zipfile.ZipFile(filename) as zf:
+        parts = {part_name: values[sheet_name]
+                 for sheet_name, part_name in _worksheet_parts(zf)
+                 if values.get(sheet_name)}
         
-        for sheet_name in wb.sheetnames:
-            ws = wb[sheet_name]
-            # Check ALL rows and columns - no limits
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value is not None and isinstance(cell.value, str):
-                        for err in excel_errors:
-                            if err in cell.value:
-                                location = f"{sheet_name}!{cell.coordinate}"
-                                error_details[err].append(location)
-                                total_errors += 1
-                                break
+        fd, temp_path = tempfile.mkstemp(suffix='.xlsx', dir=os.path.dirname(os.path.abspath(filename)))
+        os.close(fd)
+        try:
+            with zipfile.ZipFile(temp_path, 'w') as out:
+                for info in zf.infolist():
+                    data = zf.read(info)
+                    if info.filename in parts:
+                        root = etree.fromstring(data)
+                        _set_cached_values(root, parts[info.filename], formulas.ExcelError)
+                        data = etree.tostring(root, xml_declaration=True, encoding='UTF-8', standalone=True)
+                    out.writestr(info, data)
+            os.replace(temp_path, filename)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+def _set_cached_values(root, sheet_values, error_type):
+    """Set the cached value of every formula cell in a parsed sheet part"""
+    for row in root.iter(f'{SPREADSHEETML}row'):
+        row_num = row.get('r')
+        col_num = 0
+        for cell in row.iter(f'{SPREADSHEETML}c'):
+            ref = cell.get('r')
+            if ref:
+                col_num = column_index_from_string(coordinate_from_string(ref)[0])
+            else:
+                col_num += 1
+                ref = f'{get_column_letter(col_num)}{row_num}'
+            
+            if cell.find(f'{SPREADSHEETML}f') is None or ref not in sheet_values:
+                continue
+            value = sheet_values[ref]
+            
+            for child in cell.findall(f'{SPREADSHEETML}v') + cell.findall(f'{SPREADSHEETML}is'):
+                cell.remove(child)
+            if isinstance(value, error_type):
+                cell.set('t', 'e')
+                text = str(value)
+            elif isinstance(value, bool):
+                cell.set('t', 'b')
+                text = '1' if value else '0'
+            elif isinstance(value, str):
+                cell.set('t', 'str')
+                text = value
+            else:
+                cell.attrib.pop('t', None)
+                if isinstance(value, float) and value.is_integer() and abs(value) < 1e15:
+                    text = str(int(value))
+                else:
+                    text = repr(value)
+            
+            # <v> follows <f> in CT_Cell
+            formula = cell.find(f'{SPREADSHEETML}f')
+            v = formula.makeelement(f'{SPREADSHEETML}v')
+            v.text = text
+            formula.addnext(v)
+
+
+def recalc_batch(filenames, timeout=30, profile_dir=None, native=True):
+    """
+    Recalculate many Excel files in a single LibreOffice session
+    
+    Workbooks the native evaluator can handle are recalculated in-process
+    first (unless native is False); only the rest go to LibreOffice. Every
+    workbook is opened, recalculated and stored by one soffice process
+    running the RecalculateBatch macro, which records a status per file as it
+    goes. A file that fails to load or store is reported on its own without
+    stopping the batch. If the session dies or times out (timeout seconds per
+    workbook), files it never reached are retried one by one with recalc().
+    Retries share what is left of the session's time limit, so a hanging
+    workbook cannot make the batch take much more than timeout seconds per
+    workbook overall; files left when it runs out are reported as timed out.
+    
+    Args:
+        filenames: Paths to Excel files
+        timeout: Maximum time to wait per workbook (seconds)
+        profile_dir: Optional isolated LibreOffice user profile to run in
+    
+    Returns:
+        dict mapping each filename to its recalc() style result
+    """
+    results = {}
+    pending = []
+    for filename in filenames:
+        if not Path(filename).exists():
+            results[filename] = {'error': f'File {filename} does not exist'}
+        elif filename in pending or filename in results:
+            continue
+        elif native and recalc_native(filename):
+            try:
+                results[filename] = scan_workbook(filename)
+            except Exception as e:
+                results[filename] = {'error': str(e)}
+        else:
+            pending.append(filename)
+    
+    if pending and not setup_libreoffice_macro(profile_dir):
+        for filename in pending:
+            results[filename] = {'error': 'Failed to setup LibreOffice macro'}
+        pending = []
+    
+    statuses = {}
+    deadline = time.monotonic() + timeout * len(pending)
+    if pending:
+        urls = {Path(filename).absolute().as_uri(): filename for filename in pending}
+        with tempfile.TemporaryDirectory() as temp_dir:
+            manifest = Path(temp_dir) / 'manifest.txt'
+            report = Path(temp_dir) / 'report.txt'
+            manifest.write_text('\n'.join(urls) + '\n', encoding='utf-8')
+            
+            # Passed as percent-encoded file URLs (which Basic's Open accepts), so
+            # quotes or commas in the temp path cannot break the macro arguments
+            cmd = timeout_command(timeout * len(pending)) + [
+                'soffice', '--headless', '--norestore'] + profile_args(profile_dir) + [
+                f'macro:///Standard.Module1.RecalculateBatch("{manifest.as_uri()}","{report.as_uri()}")'
+            ]
+            subprocess.run(cmd, capture_output=True, text=True)
+            
+            if report.exists():
+                for line in report.read_text(encoding='utf-8', errors='replace').splitlines():
+                    status, _, url = line.partition('\t')
+                    if url in urls:
+                        statuses[urls[url]] = status
+    
+    for filename in pending:
+        status = statuses.get(filename)
+        if status is None:
+            # Not reached before the session ended - retry on its own
+            remaining = deadline - time.monotonic()
+            if remaining < 1:
+                results[filename] = {'error': 'Recalculation timed out'}
+            else:
+                retry_timeout = min(timeout, int(remaining))
+                results[filename] = recalc(filename, retry_timeout, profile_dir, native=False)
+        elif status != 'OK':
+            results[filename] = {'error': status.removeprefix('ERROR ') or 'Recalculation failed'}
+        else:
+            try:
+                results[filename] = scan_workbook(filename)
+            except Exception as e:
+                results[filename] = {'error': str(e)}
+    
+    return {filename: results[filename] for filename in filenames}
+
+
+class RecalcPool:
+    """
+    Pool of LibreOffice workers that recalculate workbooks in parallel
+    
+    soffice allows one running instance per user profile, so concurrent
+    recalc() calls against the default profile queue up behind its lock.
+    Each worker here owns its own profile (selected with
+    -env:UserInstallation) with the macro pre-installed, so up to `workers`
+    recalculations run at the same time. recalc() and submit() are safe to
+    call from multiple threads.
+    
+    Example:
+        with RecalcPool(workers=4) as pool:
+            result = pool.recalc('report.xlsx')
+            results = pool.recalc_batch(['a.xlsx', 'b.xlsx', 'c.xlsx'])
+    """
+    
+    def __init__(self, workers=None, profiles_dir=None):
+        """
+        Create the pool and provision one profile per worker
         
-        wb.close()
+        Args:
+            workers: Number of parallel workers (default: CPU count)
+            profiles_dir: Directory holding the worker profiles. Profiles kept
+                there are reused by later pools; if omitted, a temporary
+                directory is used and removed by close().
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self._owns_profiles_dir = profiles_dir is None
+        self.profiles_dir = Path(profiles_dir or tempfile.mkdtemp(prefix='recalc_profiles_'))
+        self._profiles = queue.Queue()
         
-        # Build result summary
-        result = {
-            'status': 'success' if total_errors == 0 else 'errors_found',
-            'total_errors': total_errors,
-            'error_summary': {}
-        }
+        profile_dirs = [self.profiles_dir / f'worker-{i}' for i in range(self.workers)]
+        try:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                provisioned = list(executor.map(lambda d: setup_libreoffice_macro(str(d)), profile_dirs))
+        except BaseException:
+            # e.g. soffice timing out - don't leak the temporary profiles
+            self.close()
+            raise
+        if not all(provisioned):
+            self.close()
+            raise RuntimeError('Failed to setup LibreOffice macro in worker profiles')
+        for profile_dir in profile_dirs:
+            self._profiles.put(str(profile_dir))
         
-        # Add non-empty error categories
-        for err_type, locations in error_details.items():
-            if locations:
-                result['error_summary'][err_type] = {
-                    'count': len(locations),
-                    'locations': locations[:20]  # Show up to 20 locations
-                }
+        self._executor = ThreadPoolExecutor(max_workers=self.workers)
+    
+    def _run(self, func, *args):
+        """Run func with a free worker profile as its last argument"""
+        profile_dir = self._profiles.get()
+        try:
+            return func(*args, profile_dir)
+        finally:
+            self._profiles.put(profile_dir)
+    
+    def recalc(self, filename, timeout=30):
+        """Recalculate one workbook on the next free worker (blocking)"""
+        return self._run(recalc, filename, timeout)
+    
+    def submit(self, filename, timeout=30):
+        """Queue a workbook for recalculation and return a Future of its result"""
+        return self._executor.submit(self._run, recalc, filename, timeout)
+    
+    def recalc_batch(self, filenames, timeout=30):
+        """
+        Recalculate many workbooks, spreading them over all workers
         
-        # Add formula count for context - also check ALL cells
-        wb_formulas = load_workbook(filename, data_only=False)
-        formula_count = 0
-        for sheet_name in wb_formulas.sheetnames:
-            ws = wb_formulas[sheet_name]
-            for row in ws.iter_rows():
-                for cell in row:
-                    if cell.value and isinstance(cell.value, str) and cell.value.startswith('='):
-                        formula_count += 1
-        wb_formulas.close()
+        Files are dealt round-robin into one chunk per worker and each chunk
+        runs as a single-session recalc_batch() in that worker's profile.
         
-        result['total_formulas'] = formula_count
+        Returns:
+            dict mapping each filename to its recalc() style result
+        """
+        chunks = [filenames[i::self.workers] for i in range(self.workers)]
+        futures = [
+            self._executor.submit(self._run, recalc_batch, chunk, timeout)
+            for chunk in chunks if chunk
+        ]
+        results = {}
+        for future in futures:
+            results.update(future.result())
+        return {filename: results[filename] for filename in filenames}
+    
+    def close(self):
+        """Shut down the workers and remove temporary profiles"""
+        if hasattr(self, '_executor'):
+            self._executor.shutdown(wait=True)
+        if self._owns_profiles_dir:
+            shutil.rmtree(self.profiles_dir, ignore_errors=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def read_manifest(manifest_path):
+    """Read workbook paths from a manifest file, one per line (# starts a comment)"""
+    filenames = []
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                filenames.append(line)
+    return filenames
+
+
+def scan_workbook(filename, workers=None):
+    """
+    Scan every worksheet for Excel errors and formulas in one streaming pass
+    
+    Cached values and formulas live in the same <c> elements of each sheet
+    part, so both are collected together while iterparsing the sheet XML.
+    Rows are discarded as soon as they are scanned and only the first
+    MAX_ERROR_LOCATIONS locations per error type are kept, so memory stays
+    bounded regardless of workbook size.
+    
+    Workbooks with several sheets and more than PARALLEL_SCAN_MIN_BYTES of
+    sheet XML are scanned one sheet per worker process, each reading its
+    part straight from the zip. Per-sheet results are merged in workbook
+    order, so the output is the same as a sequential scan.
+    
+    Args:
+        filename: Path to Excel file
+        workers: Number of scan processes (default: CPU count when the
+            workbook is large enough, 1 forces a sequential scan)
+    
+    Returns:
+        dict with status, total_errors, error_summary and total_formulas
+    """
+    with zipfile.ZipFile(filename) as zf:
+        error_strings = _error_shared_strings(zf)
+        sheets = [(sheet_name, part_name, zf.getinfo(part_name).file_size)
+                  for sheet_name, part_name in _worksheet_parts(zf)]
+    
+    if workers is None:
+        large = sum(size for _, _, size in sheets) >= PARALLEL_SCAN_MIN_BYTES
+        workers = (os.cpu_count() or 1) if large else 1
+    workers = min(workers, len(sheets))
+    
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # Start the largest sheets first so one big sheet does not finish last
+            futures = {
+                part_name: executor.submit(_scan_sheet_part, filename, sheet_name, part_name, error_strings)
+                for sheet_name, part_name, _ in sorted(sheets, key=lambda sheet: -sheet[2])
+            }
+            sheet_results = [futures[part_name].result() for _, part_name, _ in sheets]
+    else:
+        sheet_results = [
+            _scan_sheet_part(filename, sheet_name, part_name, error_strings)
+            for sheet_name, part_name, _ in sheets
+        ]
+    
+    # Merge per-sheet results in workbook order
+    error_counts = {err: 0 for err in EXCEL_ERRORS}
+    error_locations = {err: [] for err in EXCEL_ERRORS}
+    formula_count = 0
+    for sheet_counts, sheet_locations, sheet_formulas in sheet_results:
+        formula_count += sheet_formulas
+        for err in EXCEL_ERRORS:
+            error_counts[err] += sheet_counts[err]
+            room = MAX_ERROR_LOCATIONS - len(error_locations[err])
+            error_locations[err].extend(sheet_locations[err][:room])
+    
+    total_errors = sum(error_counts.values())
+    
+    # Build result summary
+    result = {
+        'status': 'success' if total_errors == 0 else 'errors_found',
+        'total_errors': total_errors,
+        'error_summary': {}
+    }
+    
+    # Add non-empty error categories
+    for err_type, count in error_counts.items():
+        if count:
+            result['error_summary'][err_type] = {
+                'count': count,
+                'locations': error_locations[err_type]
+            }
+    
+    # Add formula count for context
+    result['total_formulas'] = formula_count
+    
+    return result
+
+
+def _scan_sheet_part(filename, sheet_name, part_name, error_strings):
+    """
+    Scan one worksheet part read directly from the workbook zip
+    
+    Runs in a worker process for parallel scans. Locations stop being
+    collected once MAX_ERROR_LOCATIONS per error type are found, but every
+    error is still counted.
+    
+    Returns:
+        (error_counts, error_locations, formula_count) for the sheet
+    """
+    error_counts = {err: 0 for err in EXCEL_ERRORS}
+    error_locations = {err: [] for err in EXCEL_ERRORS}
+    with zipfile.ZipFile(filename) as zf:
+        with zf.open(part_name) as sheet_xml:
+            formula_count = _scan_sheet(
+                sheet_xml, sheet_name, error_strings, error_counts, error_locations
+            )
+    return error_counts, error_locations, formula_count
+
+
+def _match_error(value):
+    """Return the Excel error contained in a cell value, or None"""
+    for err in EXCEL_ERRORS:
+        if err in value:
+            return err
+    return None
+
+
+def _worksheet_parts(zf):
+    """List (sheet_name, part_name) for every worksheet, in workbook order"""
+    rels_root = ET.fromstring(zf.read('xl/_rels/workbook.xml.rels'))
+    targets = {}
+    for rel in rels_root.iter(f'{PACKAGE_RELATIONSHIPS}Relationship'):
+        if not rel.get('Type', '').endswith('/worksheet'):
+            continue
+        target = rel.get('Target', '')
+        if target.startswith('/'):
+            targets[rel.get('Id')] = target.lstrip('/')
+        else:
+            targets[rel.get('Id')] = posixpath.normpath(posixpath.join('xl', target))
+    
+    workbook_root = ET.fromstring(zf.read('xl/workbook.xml'))
+    parts = []
+    for sheet in workbook_root.iter(f'{SPREADSHEETML}sheet'):
+        part_name = targets.get(sheet.get(f'{RELATIONSHIPS}id'))
+        if part_name:
+            parts.append((sheet.get('name'), part_name))
+    return parts
+
+
+def _error_shared_strings(zf):
+    """
+    Map shared string indices to the Excel error they contain
+    
+    Only matching strings are kept, so huge string tables are never held
+    in memory.
+    """
+    try:
+        sst = zf.open('xl/sharedStrings.xml')
+    except KeyError:
+        return {}
+    
+    error_strings = {}
+    table = None
+    with sst:
+        index = 0
+        for event, elem in ET.iterparse(sst, events=('start', 'end')):
+            if event == 'start':
+                if elem.tag == f'{SPREADSHEETML}sst':
+                    table = elem
+                continue
+            if elem.tag != f'{SPREADSHEETML}si':
+                continue
+            # Plain text is in <t>, rich text in <r><t>; phonetic runs are ignored
+            text = ''.join(
+                t.text or ''
+                for t in (elem.findall(f'{SPREADSHEETML}t')
+                          + elem.findall(f'{SPREADSHEETML}r/{SPREADSHEETML}t'))
+            )
+            err = _match_error(text)
+            if err:
+                error_strings[index] = err
+            index += 1
+            # Drop scanned strings to keep memory bounded
+            if table is not None:
+                table.remove(elem)
+            else:
+                elem.clear()
+    return error_strings
+
+
+def _scan_sheet(sheet_xml, sheet_name, error_strings, error_counts, error_locations):
+    """
+    Stream one worksheet part, recording error cells and counting formulas
+    
+    Returns:
+        Number of formula cells in the sheet
+    """
+    formula_count = 0
+    sheet_data = None
+    row_num = 0
+    
+    for event, elem in ET.iterparse(sheet_xml, events=('start', 'end')):
+        if event == 'start':
+            if elem.tag == f'{SPREADSHEETML}sheetData':
+                sheet_data = elem
+            continue
+        if elem.tag != f'{SPREADSHEETML}row':
+            continue
         
-        return result
+        row_num = int(elem.get('r', row_num + 1))
+        col_num = 0
+        for cell in elem.iter(f'{SPREADSHEETML}c'):
+            ref = cell.get('r')
+            if ref:
+                col_letter, row_num = coordinate_from_string(ref)
+                col_num = column_index_from_string(col_letter)
+            else:
+                col_num += 1
+                ref = f'{get_column_letter(col_num)}{row_num}'
+            
+            if cell.find(f'{SPREADSHEETML}f') is not None:
+                formula_count += 1
+            
+            cell_type = cell.get('t', 'n')
+            err = None
+            if cell_type == 's':
+                value = cell.findtext(f'{SPREADSHEETML}v')
+                if value is not None:
+                    err = error_strings.get(int(value))
+            elif cell_type == 'inlineStr':
+                err = _match_error(''.join(
+                    t.text or '' for t in cell.iter(f'{SPREADSHEETML}t')
+                ))
+            elif cell_type in ('e', 'str'):
+                err = _match_error(cell.findtext(f'{SPREADSHEETML}v') or '')
+            
+            if err:
+                error_counts[err] += 1
+                if len(error_locations[err]) < MAX_ERROR_LOCATIONS:
+                    error_locations[err].append(f"{sheet_name}!{ref}")
         
-    except Exception as e:
-        return {'error': str(e)}
+        # Drop scanned rows to keep memory bounded
+        if sheet_data is not None:
+            sheet_data.remove(elem)
+        else:
+            elem.clear()
+    
+    return formula_count
 
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: python recalc.py <excel_file> [timeout_seconds]")
-        print("\nRecalculates all formulas in an Excel file using LibreOffice")
+    args = sys.argv[1:]
+    if not args:
+        print("Usage: python recalc.py <excel_file> [excel_file ...] [timeout_seconds] [--workers N]")
+        print("       python recalc.py --manifest <file_list> [timeout_seconds] [--workers N]")
+        print("\nRecalculates all formulas in Excel files using LibreOffice")
+        print("Multiple files (or a manifest with one path per line) are recalculated")
+        print("in a single LibreOffice session; timeout_seconds applies per file")
+        print("--workers N spreads files over N parallel sessions with isolated profiles")
+        print("\nIncremental: python recalc.py <excel_file> --changed Sheet1!B2,Sheet1!B3")
+        print("             python recalc.py <excel_file> --previous <previous_version>")
+        print("recomputes only formulas depending on the changed cells and adds")
+        print("changed_values and new_errors (origin 'source' or 'propagated') to the JSON")
         print("\nReturns JSON with error details:")
         print("  - status: 'success' or 'errors_found'")
         print("  - total_errors: Total number of Excel errors found")
         print("  - total_formulas: Number of formulas in the file")
         print("  - error_summary: Breakdown by error type with locations")
         print("    - #VALUE!, #DIV/0!, #REF!, #NAME?, #NULL!, #NUM!, #N/A")
+        print("For multiple files, the JSON maps each file to its result")
         sys.exit(1)
     
-    filename = sys.argv[1]
-    timeout = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    changed = None
+    if '--changed' in args:
+        i = args.index('--changed')
+        if i + 1 >= len(args):
+            print("Error: --changed takes a comma-separated cell list")
+            sys.exit(1)
+        changed = [cell.strip() for cell in args[i + 1].split(',') if cell.strip()]
+        del args[i:i + 2]
+    
+    previous = None
+    if '--previous' in args:
+        i = args.index('--previous')
+        if i + 1 >= len(args):
+            print("Error: --previous takes a workbook path")
+            sys.exit(1)
+        previous = args[i + 1]
+        del args[i:i + 2]
+    
+    workers = 1
+    if '--workers' in args:
+        i = args.index('--workers')
+        if i + 1 >= len(args) or not args[i + 1].isdigit():
+            print("Error: --workers takes a number")
+            sys.exit(1)
+        workers = max(1, int(args[i + 1]))
+        del args[i:i + 2]
+    
+    timeout = 30
+    if len(args) > 1 and args[-1].isdigit():
+        timeout = int(args.pop())
     
-    result = recalc(filename, timeout)
+    if args and args[0] == '--manifest':
+        if len(args) != 2:
+            print("Error: --manifest takes exactly one file list")
+            sys.exit(1)
+        filenames = read_manifest(args[1])
+    else:
+        filenames = args
+    
+    if not filenames:
+        print("Error: No Excel files given")
+        sys.exit(1)
+    
+    if changed is not None or previous is not None:
+        if len(filenames) != 1 or args[0] == '--manifest':
+            print("Error: --changed/--previous take exactly one Excel file")
+            sys.exit(1)
+        result = recalc_incremental(filenames[0], changed, previous, timeout)
+    elif len(filenames) == 1 and args[0] != '--manifest':
+        result = recalc(filenames[0], timeout)
+    elif workers > 1:
+        with RecalcPool(workers=min(workers, len(filenames))) as pool:
+            result = pool.recalc_batch(filenames, timeout)
+    else:
+        result = recalc_batch(filenames, timeout)
     print(json.dumps(result, indent=2))
 
 